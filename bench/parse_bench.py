@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+解析器基准测试：生成数百万行的 M3U / TXT 文件，比较 m3u_core.parser（逐行读取 / mmap）
+和原来的两个解析器（检测器的 parse_m3u、split_m3u_auto_balance.parse_any_format）。
+每项一个独立子进程，输出 用时、行/秒、MB/秒、峰值 RSS 和解析出的条目数。
+
+  python bench/parse_bench.py
+  python bench/parse_bench.py --lines 5000000 --formats m3u
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from m3u_core.parser import parse_file                              # noqa: E402
+from run_bench import peak_rss_mb                                    # noqa: E402
+
+GROUPS = ('央视', '卫视', '岛国🍓', '电影', '体育', 'NewTV')
+HOSTS = ('w9n76.cdnedge.live', 'e2fa6.cdnedge.live', '108.181.20.159:75234', 'cdn.example.com')
+
+
+# ================== 原来的解析器（对照组，照抄） ==================
+def legacy_parse_m3u(lines):
+    current_title = "未知频道"
+    current_group = "默认分组"
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#EXTM3U"):
+            continue
+        if line.startswith("#EXTINF:"):
+            match = re.search(r'group-title="([^"]*)"', line)
+            if match:
+                current_group = match.group(1).strip() or "默认分组"
+            parts = line.split(",", 1)
+            if len(parts) > 1:
+                current_title = parts[1].strip()
+            continue
+        if 'group-title=' in line:
+            match = re.search(r'group-title="([^"]*)"', line)
+            if match:
+                current_group = match.group(1).strip() or "默认分组"
+        if re.match(r'^(https?|rtmp|p3p|rtsp)://', line, re.I):
+            yield current_group, current_title, line
+            current_title = "未知频道"
+            current_group = "默认分组"
+
+
+def _normalize_group(name):
+    n = re.sub(r'[\d\s\W_]+', '', name)
+    return n if n else "未分类"
+
+
+def legacy_parse_any_format(file):
+    with open(file, 'r', encoding='utf-8', errors='ignore') as f:
+        lines = [l.strip() for l in f if l.strip()]
+    entries = []
+    for i in range(len(lines)):
+        if lines[i].startswith("#EXTINF"):
+            m = re.search(r',\s*(.+)$', lines[i])
+            if m and i + 1 < len(lines):
+                title = m.group(1).strip()
+                url = lines[i + 1].strip()
+                if re.match(r'^(https?|p3p|rtmp)://', url):
+                    entries.append((_normalize_group(title), title, url))
+    pattern_custom = re.compile(r'^\[([^\]]+)\]\s*(.+?),\s*(https?://.*)', re.IGNORECASE)
+    pattern_simple = re.compile(r'^(.+?),\s*(https?://.*)', re.IGNORECASE)
+    for line in lines:
+        if not line.startswith("#"):
+            m = pattern_custom.match(line)
+            if m:
+                group, title, url = m.groups()
+                entries.append((group.strip(), title.strip(), url.strip()))
+                continue
+            m2 = pattern_simple.match(line)
+            if m2:
+                title, url = m2.groups()
+                entries.append((_normalize_group(title), title.strip(), url.strip()))
+    return entries
+
+
+# ================== 合成输入 ==================
+def generate(path, lines, fmt, seed=0):
+    """m3u：#EXTINF + URL 两行一条；txt：分类行 + [分组] 名称,URL / 名称,URL"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        if fmt == 'm3u':
+            f.write('#EXTM3U\n')
+            for i in range(lines // 2):
+                group = rng.choice(GROUPS)
+                f.write(f'#EXTINF:-1 tvg-id="{i}" tvg-name="{group}{i}" group-title="{group}",{group}{i % 100:02d}\n')
+                f.write(f'https://{rng.choice(HOSTS)}/file/hls/{i:08x}{rng.getrandbits(64):016x}/playlist.m3u8\n')
+        else:
+            for i in range(lines):
+                group = rng.choice(GROUPS)
+                url = f'https://{rng.choice(HOSTS)}/live/{i:08x}.m3u8'
+                if i % 1000 == 0:
+                    f.write(f'{group},#genre#\n')
+                elif i % 3:
+                    f.write(f'{group}{i % 100:02d},{url}\n')
+                else:
+                    f.write(f'[{group}] {group}{i % 100:02d},{url}\n')
+
+
+PARSERS = {
+    'parser': lambda path: parse_file(path),
+    'parser-mmap': lambda path: parse_file(path, use_mmap=True),
+    'legacy-checker': lambda path: legacy_parse_m3u(open(path, 'r', encoding='utf-8', errors='ignore')),
+    'legacy-splitter': legacy_parse_any_format,
+}
+
+
+def run_worker(path, name):
+    start = time.monotonic()
+    count = sum(1 for _ in PARSERS[name](path))
+    wall = time.monotonic() - start
+    print(json.dumps({'parser': name, 'entries': count, 'wall_s': wall, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='M3U / TXT 解析器基准测试')
+    parser.add_argument('--lines', type=int, default=2_000_000, help='合成文件的行数')
+    parser.add_argument('--formats', nargs='+', default=['m3u', 'txt'], choices=['m3u', 'txt'])
+    parser.add_argument('--parsers', nargs='+', default=list(PARSERS), choices=list(PARSERS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--worker', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'格式':<4} {'解析器':<16} {'条目':>9} {'用时':>7} {'万行/秒':>8} {'MB/秒':>7} {'峰值RSS':>8}")
+        for fmt in args.formats:
+            path = os.path.join(tmp, f'bench.{fmt}')
+            generate(path, args.lines, fmt, args.seed)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            for name in args.parsers:
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', path, name],
+                                     capture_output=True, text=True)
+                if out.returncode != 0:
+                    print(f"{fmt:<4} {name:<16} 运行失败：{out.stderr.strip()[-300:]}")
+                    continue
+                row = json.loads(out.stdout.strip().splitlines()[-1])
+                wall = row['wall_s']
+                rss = f"{row['peak_rss_mb']:.0f}MB" if row['peak_rss_mb'] is not None else '-'
+                print(f"{fmt:<4} {name:<16} {row['entries']:>9} {wall:>6.2f}s {args.lines / wall / 1e4:>8.1f} "
+                      f"{size_mb / wall:>7.1f} {rss:>8}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
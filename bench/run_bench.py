@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+离线基准测试：不依赖线上 CDN，客观比较各版本检测策略和引擎
+启动本地桩服务器（stub_server.py），生成合成 M3U 输入，按 条目数 × 引擎 × 策略 逐项运行，
+每项一个独立子进程（峰值内存互不影响），输出 条/秒、用时、峰值 RSS 和分类准确率。
+默认按检测器的默认设置限速（Settings.host_rate），并另跑一组全部条目在同一主机上的输入（单 CDN 的列表）。
+
+  python bench/run_bench.py
+  python bench/run_bench.py --entries 1000 10000 100000 --engines async --profiles v8.0
+  python bench/run_bench.py --mix live=50,missing=30,reset=10,slow=10 --json bench_output.json
+  python bench/run_bench.py --host-rate 0                       # 不限速，对比限速的开销
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from m3u_core import RunContext, run_checks                        # noqa: E402
+from m3u_core.app import Settings                                   # noqa: E402
+from m3u_core.parser import parse_file                              # noqa: E402
+from m3u_core.profiles import PROFILES                              # noqa: E402
+from stub_server import KINDS, VALID_KINDS                          # noqa: E402
+
+DEFAULT_MIX = 'live=35,vod=10,redirect=10,slow=5,deadseg=10,forbidden=5,missing=15,reset=5,html=5'
+
+
+# ================== 合成输入 ==================
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise SystemExit(f"未知的场景 {kind!r}，可选：{', '.join(KINDS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def stub_url(kind, i, host, port):
+    base = f'http://{host}:{port}'
+    if kind == 'live':
+        return f'{base}/live/{i}/master.m3u8'
+    if kind == 'redirect':
+        return f'{base}/redirect/{i}'
+    return f'{base}/{kind}/{i}.m3u8'
+
+
+def generate_m3u(path, n, mix, hosts, port, seed=0):
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=n)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('#EXTM3U\n')
+        for i, kind in enumerate(kinds):
+            f.write(f'#EXTINF:-1 group-title="{kind}",{kind}-{i}\n')
+            f.write(stub_url(kind, i, hosts[i % len(hosts)], port) + '\n')
+
+
+def expected_ok(url):
+    kind = url.split('/', 3)[3].split('/', 1)[0]
+    return kind in VALID_KINDS
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+# ================== 单项运行（子进程） ==================
+def run_worker(args):
+    verdicts = []
+    ctx = RunContext(engine=args.engine, threads=args.threads, concurrency=args.concurrency,
+                     host_concurrency=args.host_concurrency, host_rate=args.host_rate)
+    profile = PROFILES[args.profile](ffmpeg_cmd=[args.ffmpeg] if args.ffmpeg else None,
+                                     hls_validate=not args.no_hls)
+    start = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_checks(parse_file(args.worker), profile,
+                   lambda group, title, url, result: verdicts.append((group, result.ok == expected_ok(url))),
+                   ctx)
+    wall = time.monotonic() - start
+
+    wrong = {}
+    for kind, correct in verdicts:
+        if not correct:
+            wrong[kind] = wrong.get(kind, 0) + 1
+    latency = ctx.stats.to_dict()['latency'].get('check', {})
+    print(json.dumps({
+        'entries': len(verdicts),
+        'engine': args.engine,
+        'profile': args.profile,
+        'wall_s': round(wall, 2),
+        'checks_per_s': round(len(verdicts) / wall, 1) if wall > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'accuracy': round(1 - sum(wrong.values()) / len(verdicts), 4) if verdicts else 0.0,
+        'wrong': wrong,
+        'http_ops': ctx.stats.get('http_ops'),
+        'check_p95_ms': latency.get('p95_ms'),
+    }))
+
+
+# ================== 主流程 ==================
+def start_stub(port, hosts):
+    proc = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(__file__), 'stub_server.py'),
+                             '--port', str(port), '--hosts', str(hosts)],
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if proc.poll() is not None:
+        raise SystemExit("桩服务器启动失败")
+    print(line.strip())
+    return proc, line.split('：', 1)[1].split(' 端口')[0].split(', ')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='M3U 检测器离线基准测试')
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000], help='合成输入的条目数，可给多个')
+    parser.add_argument('--engines', nargs='+', default=['thread', 'async'], choices=['thread', 'async'])
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'各场景比例，默认 {DEFAULT_MIX}')
+    parser.add_argument('--hosts', type=int, nargs='+', default=[8, 1],
+                        help='模拟的主机数，可给多个（默认 8 个主机和单一主机各跑一组）')
+    parser.add_argument('--port', type=int, default=18766)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--host-concurrency', type=int, default=4)
+    parser.add_argument('--host-rate', type=float, default=Settings().host_rate,
+                        help='每主机每秒开始的检测数，默认同检测器设置，0 不限速')
+    parser.add_argument('--ffmpeg', help='ffprobe/ffmpeg 路径（默认不启用 FFmpeg 验证）')
+    parser.add_argument('--no-hls', action='store_true', help='关闭原生 HLS 校验（对比用）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='把全部结果写入此 JSON 文件')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--engine', help=argparse.SUPPRESS)
+    parser.add_argument('--profile', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    mix = parse_mix(args.mix)
+    server, hosts = start_stub(args.port, max(args.hosts))
+    print(f"每主机限速：{args.host_rate:g} 条/秒" if args.host_rate > 0 else "每主机限速：不限")
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"{'条目':>7} {'主机':>4} {'引擎':<6} {'策略':<5} {'用时':>8} {'条/秒':>8} {'峰值RSS':>9} {'准确率':>7}  错判")
+            for n, n_hosts in ((n, h) for n in args.entries for h in args.hosts):
+                path = os.path.join(tmp, f'bench_{n}_{n_hosts}.m3u')
+                generate_m3u(path, n, mix, hosts[:n_hosts], args.port, args.seed)
+                for engine in args.engines:
+                    for profile in args.profiles:
+                        cmd = [sys.executable, os.path.abspath(__file__), '--worker', path,
+                               '--engine', engine, '--profile', profile,
+                               '--threads', str(args.threads), '--concurrency', str(args.concurrency),
+                               '--host-concurrency', str(args.host_concurrency),
+                               '--host-rate', str(args.host_rate)]
+                        if args.ffmpeg:
+                            cmd += ['--ffmpeg', args.ffmpeg]
+                        if args.no_hls:
+                            cmd.append('--no-hls')
+                        out = subprocess.run(cmd, capture_output=True, text=True)
+                        if out.returncode != 0:
+                            print(f"{n:>7} {n_hosts:>4} {engine:<6} {profile:<5} 运行失败：{out.stderr.strip()[-300:]}")
+                            continue
+                        row = json.loads(out.stdout.strip().splitlines()[-1])
+                        row.update(hosts=n_hosts, host_rate=args.host_rate)
+                        rows.append(row)
+                        rss = f"{row['peak_rss_mb']:.0f}MB" if row['peak_rss_mb'] is not None else '-'
+                        wrong = ', '.join(f'{k} {v}' for k, v in sorted(row['wrong'].items())) or '-'
+                        print(f"{n:>7} {n_hosts:>4} {engine:<6} {profile:<5} {row['wall_s']:>7.1f}s {row['checks_per_s']:>8.1f} "
+                              f"{rss:>9} {row['accuracy'] * 100:>6.1f}%  {wrong}", flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'mix': mix, 'hosts': hosts, 'results': rows}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
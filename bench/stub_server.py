@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+离线基准测试用的本地桩服务器（只用标准库）
+在 127.0.0.1 ~ 127.0.0.N 上各监听同一端口，模拟 N 个 CDN 主机；
+URL 的第一段决定返回什么，基准脚本据此知道每条的正确结论：
+
+  /live/<id>/master.m3u8      master → variant → 直播分片（有效）
+  /vod/<id>.m3u8              点播 media playlist（有效）
+  /redirect/<id>              3 次 302 后到 /live/<id>/master.m3u8（有效）
+  /slow/<id>.m3u8             响应头之后一点点慢慢发送播放列表（有效）
+  /deadseg/<id>.m3u8          播放列表正常，分片 404（失效）
+  /forbidden/<id>.m3u8        403（失效）
+  /missing/<id>.m3u8          404（失效）
+  /reset/<id>.m3u8            不回应，直接 RST 断开连接（失效）
+  /html/<id>.m3u8             200 但内容是 HTML 页面（失效）
+
+单独运行：python bench/stub_server.py [--port 8766] [--hosts 8]
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEGMENTS = 5
+SEGMENT_PACKETS = 500             # 每个分片 500 个 188 字节的 TS 包
+REDIRECT_HOPS = 3
+TRICKLE_CHUNK = 64
+TRICKLE_DELAY = 0.05              # 每 64 字节停 50ms
+
+VALID_KINDS = ('live', 'vod', 'redirect', 'slow')
+INVALID_KINDS = ('deadseg', 'forbidden', 'missing', 'reset', 'html')
+KINDS = VALID_KINDS + INVALID_KINDS
+
+TS_SEGMENT = (b'\x47\x40\x00\x10' + bytes(184)) * SEGMENT_PACKETS
+
+
+def media_playlist(prefix, endlist, first_seq=0):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:6',
+             f'#EXT-X-MEDIA-SEQUENCE:{first_seq}']
+    for n in range(first_seq, first_seq + SEGMENTS):
+        lines += ['#EXTINF:6.000,', f'{prefix}seg{n}.ts']
+    if endlist:
+        lines.append('#EXT-X-ENDLIST')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+MASTER = (b'#EXTM3U\n'
+          b'#EXT-X-STREAM-INF:BANDWIDTH=2000000,RESOLUTION=1280x720\nhi/index.m3u8\n'
+          b'#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360\nlo/index.m3u8\n')
+
+HTML = b'<!DOCTYPE html><html><head><title>404</title></head><body>Not Found</body></html>\n'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def send_body(self, body, status=200, ctype='application/vnd.apple.mpegurl'):
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_ranged(self, data):
+        """支持 Range: bytes=a-b（分片校验只取开头一小段）"""
+        rng = self.headers.get('Range', '')
+        if rng.startswith('bytes='):
+            start, _, end = rng[6:].partition('-')
+            start = int(start or 0)
+            end = min(int(end) if end else len(data) - 1, len(data) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+            data = data[start:end + 1]
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp2t')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def reset(self):
+        # SO_LINGER=0 后关闭，客户端收到 RST（Connection reset by peer）
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        self.close_connection = True
+        self.connection.close()
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        kind, _, rest = path.lstrip('/').partition('/')
+
+        if path.endswith('.ts'):
+            if kind == 'deadseg':
+                self.send_body(b'not found', 404, 'text/plain')
+            else:
+                self.send_ranged(TS_SEGMENT)
+        elif kind == 'live':
+            if rest.endswith('master.m3u8'):
+                self.send_body(MASTER)
+            else:
+                self.send_body(media_playlist('', endlist=False, first_seq=int(time.time() // 6)))
+        elif kind == 'vod':
+            self.send_body(media_playlist(f'/vod/{rest[:-5]}/', endlist=True))
+        elif kind == 'redirect':
+            hop = int(self.path.rpartition('hop=')[2]) if 'hop=' in self.path else 0
+            ident = rest
+            target = (f'/live/{ident}/master.m3u8' if hop + 1 >= REDIRECT_HOPS
+                      else f'/redirect/{ident}?hop={hop + 1}')
+            self.send_response(302)
+            self.send_header('Location', target)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif kind == 'slow':
+            body = media_playlist(f'/slow/{rest[:-5]}/', endlist=True)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            for i in range(0, len(body), TRICKLE_CHUNK):
+                self.wfile.write(body[i:i + TRICKLE_CHUNK])
+                self.wfile.flush()
+                time.sleep(TRICKLE_DELAY)
+        elif kind == 'deadseg':
+            self.send_body(media_playlist(f'/deadseg/{rest[:-5]}/', endlist=True))
+        elif kind == 'forbidden':
+            self.send_body(b'forbidden', 403, 'text/plain')
+        elif kind == 'reset':
+            self.reset()
+        elif kind == 'html':
+            self.send_body(HTML, 200, 'text/html')
+        else:
+            self.send_body(b'not found', 404, 'text/plain')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        pass              # reset 场景和客户端提前断开都会走到这里，不输出 traceback
+
+
+def available_hosts(n, port):
+    """127.0.0.1 ~ 127.0.0.n 中能绑定的地址（macOS 默认只有 127.0.0.1）"""
+    hosts = []
+    for i in range(1, n + 1):
+        addr = f'127.0.0.{i}'
+        try:
+            with socket.socket() as s:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                s.bind((addr, port))
+        except OSError:
+            continue
+        hosts.append(addr)
+    return hosts or ['127.0.0.1']
+
+
+def serve(port, hosts):
+    servers = [_Server((addr, port), StubHandler) for addr in hosts]
+    for srv in servers:
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='M3U 检测器基准测试桩服务器')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--hosts', type=int, default=8, help='模拟的主机数（127.0.0.1 ~ 127.0.0.N）')
+    args = parser.parse_args()
+    hosts = available_hosts(args.hosts, args.port)
+    serve(args.port, hosts)
+    print(f"桩服务器已启动：{', '.join(hosts)} 端口 {args.port}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -2,337 +2,86 @@
 """
 终极 M3U 检测器 v8.1 (最终完美版 - 增强重试)
 支持 CGTN 全系列 | 强制 FFmpeg 验证 | 防封 IP | 自动重试
+检测逻辑在 m3u_core 包中（三个版本共用），本文件只保留配置。
 """
 
-import requests
-import threading
-import queue
-import time
-import re
-import os
-import urllib3
-import random
-import subprocess
-import json
-from collections import defaultdict
-
-# ================== 屏蔽警告 ==================
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-requests.packages.urllib3.disable_warnings()
+from m3u_core.app import Settings, run_main
 
 # ================== 配置区 ==================
 TIMEOUT = 15
+CONNECT_TIMEOUT = 10        # 建立连接的超时，与读取超时（TIMEOUT）分开
+ADAPTIVE_TIMEOUT = True     # 按主机实际延迟缩短超时（p95 的 4 倍，不超过上面两个值）
 THREADS = 8
-MIN_BYTES = 512
 RETRY_COUNT = 1  # 额外的重试次数，总尝试次数 = 1 + RETRY_COUNT
-USE_FFMPEG = True
-
-# FFmpeg 路径（Termux 固定）
-FFMPEG_PATH = '/data/data/com.termux/files/usr/bin/ffmpeg'
-FFMPEG_AVAILABLE = False
-FFMPEG_CMD = None
-
-# 伪装浏览器 UA（关键！）
-BROWSER_UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-
-# 全局变量
-url_queue = queue.Queue()
-valid_list = defaultdict(list)
-invalid_list = defaultdict(list)
-lock = threading.Lock()
-checked_count = 0
-total_count = 0
-
-# ================== 自动扫描 Download ==================
-DOWNLOAD_DIR = '/storage/emulated/0/Download'
-if not os.path.exists(DOWNLOAD_DIR):
-    DOWNLOAD_DIR = '/sdcard/Download'
-    if not os.path.exists(DOWNLOAD_DIR):
-        print("无法访问 Download 文件夹！请检查存储权限。")
-        exit(1)
-
-def select_file_auto():
-    files = [os.path.join(DOWNLOAD_DIR, f) for f in os.listdir(DOWNLOAD_DIR)
-             if f.lower().endswith(('.m3u', '.m3u8', '.txt'))]
-    if not files:
-        print(f"在 {DOWNLOAD_DIR} 中未找到 .m3u/.m3u8/.txt 文件")
-        return None
-    print(f"在 {DOWNLOAD_DIR} 找到 {len(files)} 个文件：")
-    for i, f in enumerate(files, 1):
-        print(f"  {i}. {os.path.basename(f)}")
-    while True:
-        try:
-            choice = input(f"\n请输入要检测的文件编号（1-{len(files)}），或回车检测全部：").strip()
-            if not choice:
-                return files
-            idx = int(choice) - 1
-            if 0 <= idx < len(files):
-                return [files[idx]]
-        except:
-            pass
-        print("输入无效，请重试。")
-
-# ================== M3U 解析器（修复 #EXTM3U 跳过）==================
-def parse_m3u(lines):
-    entries = []
-    current_title = "未知频道"
-    current_group = "默认分组"
-    for line in lines:
-        line = line.strip()
-        if not line:  # 只跳过空行
-            continue
-        if line.startswith("#EXTM3U"):  # 保留 #EXTM3U
-            continue
-        if line.startswith("#EXTINF:"):
-            match = re.search(r'group-title="([^"]*)"', line)
-            if match:
-                current_group = match.group(1).strip() or "默认分组"
-            parts = line.split(",", 1)
-            if len(parts) > 1:
-                current_title = parts[1].strip()
-            continue
-        if 'group-title=' in line and not line.startswith("#EXTINF:"):
-            match = re.search(r'group-title="([^"]*)"', line)
-            if match:
-                current_group = match.group(1).strip() or "默认分组"
-        if re.match(r'^(https?|rtmp|p3p|rtsp)://', line, re.I):
-            entries.append((current_group, current_title, line))
-            current_title = "未知频道"
-            current_group = "默认分组"
-    return entries
-
-# ================== 查找 FFmpeg ==================
-def find_ffmpeg():
-    global FFMPEG_AVAILABLE, FFMPEG_CMD
-    if os.path.exists(FFMPEG_PATH):
-        try:
-            result = subprocess.run([FFMPEG_PATH, '-version'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0 and 'ffmpeg version' in result.stdout:
-                FFMPEG_CMD = [FFMPEG_PATH]
-                FFMPEG_AVAILABLE = True
-                print(f"FFmpeg 已就绪: {FFMPEG_PATH}")
-                return
-        except:
-            pass
-    print("未找到 ffmpeg！请在 Termux 执行：pkg install ffmpeg")
-    global USE_FFMPEG
-    USE_FFMPEG = False
-
-# ================== 检测线程（最终版 - 增加重试机制）==================
-def check_url_worker():
-    global checked_count
-    session = requests.Session()
-    session.headers.update({'User-Agent': BROWSER_UA})
-    session.allow_redirects = True
-
-    while True:
-        try:
-            group, title, url = url_queue.get(timeout=1)
-        except queue.Empty:
-            break
-
-        # 默认为失败状态
-        ok = False 
-        
-        # --- 增加重试循环 ---
-        # 总共尝试次数 = 1 (首次尝试) + RETRY_COUNT (额外重试次数)
-        for attempt in range(RETRY_COUNT + 1):
-            if attempt > 0:
-                # 打印重试信息，并短暂等待
-                print(f"   [重试 {attempt}/{RETRY_COUNT}] {title}")
-                time.sleep(random.uniform(1, 3)) 
-            
-            resp = None
-            force_ffmpeg = False
-            http_ok = False # 初始化 HTTP 检查结果
-
-            # 强制 CGTN 系列使用 FFmpeg
-            if any(kw in url.lower() or kw in title.lower() for kw in ['cgtn', '0472.org']):
-                force_ffmpeg = True
-                if attempt == 0: # 首次尝试时打印提示
-                    print(f"   [关键源，强制 FFmpeg 验证] {title}")
-
-            try:
-                # 第一次尝试：HTTP 请求
-                resp = session.get(url, timeout=TIMEOUT, stream=True, verify=False,
-                                 headers={'User-Agent': BROWSER_UA},
-                                 allow_redirects=True)
-
-                if resp.status_code != 200:
-                    print(f"   [HTTP {resp.status_code}] {title}")
-                else:
-                    # 检查是否为 M3U/M3U8 列表内容
-                    chunk = b""
-                    try:
-                        chunk = resp.raw.read(4096)
-                    except:
-                        pass
-
-                    if len(chunk) > 0:
-                        text = chunk.decode('utf-8', errors='ignore').strip()
-                        if text.startswith('#EXTM3U'):
-                            lines = text.splitlines()
-                            has_stream = any(line.startswith('#EXT-X-STREAM-INF') for line in lines)
-                            has_segment = any(line.startswith('#EXTINF:') or '.m3u8' in line for line in lines)
-                            if has_stream or has_segment:
-                                http_ok = True
-                
-                # 第二次验证：FFmpeg
-                ffmpeg_validation_needed = force_ffmpeg or (http_ok and not force_ffmpeg)
-                
-                if ffmpeg_validation_needed and USE_FFMPEG and FFMPEG_AVAILABLE:
-                    # 如果 HTTP 检查通过且不需要 FFmpeg 强制验证，则视为成功 (可选优化)
-                    if http_ok and not force_ffmpeg:
-                         ok = True
-                         break # 直接成功，跳出重试循环
-                    
-                    # 否则，执行 FFmpeg 验证 (或强制 FFmpeg 验证)
-                    try:
-                        cmd = FFMPEG_CMD + [
-                            '-v', 'quiet', '-print_format', 'json',
-                            '-show_format', '-show_streams',
-                            '-t', '8',
-                            '-user_agent', BROWSER_UA,
-                            '-headers', 'Referer: https://www.cgtn.com/\r\n',
-                            '-reconnect', '1',
-                            '-reconnect_at_eof', '1',
-                            '-reconnect_streamed', '1',
-                            '-reconnect_delay_max', '5',
-                            url
-                        ]
-                        result = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
-                        
-                        if result.returncode == 0:
-                            try:
-                                data = json.loads(result.stdout)
-                                if data.get('streams') or data.get('format'):
-                                    ok = True # FFmpeg 验证成功
-                                    print(f"   [FFmpeg 确认] {title}")
-                                    break # 验证成功，跳出重试循环
-                            except:
-                                pass
-                        else:
-                            print(f"   [FFmpeg 返回码 {result.returncode}] {title}")
-                    except subprocess.TimeoutExpired:
-                        print(f"   [FFmpeg 超时] {title}")
-                    except Exception as e:
-                        print(f"   [FFmpeg 异常] {title}: {e}")
-
-            except Exception as e:
-                print(f"   [异常] {title}: {e}")
-            finally:
-                if resp:
-                    try: resp.close()
-                    except: pass
-                
-            # 如果成功，会通过上面的 break 跳出循环
-            if ok:
-                break
-        # --- 重试循环结束 ---
-
-        # 最终结果处理（使用锁确保线程安全）
-        with lock:
-            checked_count += 1
-            if ok:
-                valid_list[group].append((title, url))
-                print(f"有效: {title}")
-            else:
-                invalid_list[group].append((title, url))
-                print(f"失效: {title}")
-
-        time.sleep(random.uniform(0.2, 0.6))
-        url_queue.task_done()
-
-# ================== 进度条 ==================
-def show_progress():
-    while checked_count < total_count:
-        with lock:
-            done = checked_count
-        pct = done / total_count * 100 if total_count > 0 else 0
-        print(f"\r[检测中] {done}/{total_count} ({pct:.1f}%)", end="", flush=True)
-        time.sleep(0.5)
-    print(f"\r[完成] {checked_count}/{total_count} (100%)      ")
-
-# ================== 主函数 ==================
-def main():
-    global total_count
-    print("="*60)
-    print("M3U 检测器 v8.1 (最终完美版 - 增强重试)")
-    print("   支持 CGTN 全系列 | 强制 FFmpeg 验证 | 防封 IP")
-    print("="*60)
-
-    find_ffmpeg()
-    file_list = select_file_auto()
-    if not file_list:
-        return
-
-    all_entries = []
-    for file_path in file_list:
-        print(f"\n正在解析：{os.path.basename(file_path)}")
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                lines = f.readlines()
-            entries = parse_m3u(lines)
-            if entries:
-                print(f"  → 解析出 {len(entries)} 条频道")
-                all_entries.extend([(file_path, *e) for e in entries])
-            else:
-                print("  → 无有效频道")
-        except Exception as e:
-            print(f"  → 读取失败: {e}")
-
-    if not all_entries:
-        print("\n未找到任何可检测的频道")
-        return
-
-    print(f"\n共 {len(all_entries)} 条待检测，开始多线程检测...\n")
-    total_count = len(all_entries)
-    for item in all_entries:
-        _, group, title, url = item
-        url_queue.put((group, title, url))
-
-    start_time = time.time()
-    threading.Thread(target=show_progress, daemon=True).start()
-
-    threads = [threading.Thread(target=check_url_worker, daemon=True)
-               for _ in range(min(THREADS, total_count))]
-    for t in threads: t.start()
-    for t in threads: t.join()
-
-    # 输出结果
-    output_dir = DOWNLOAD_DIR
-    all_groups = set(valid_list.keys()) | set(invalid_list.keys())
-    for group in sorted(all_groups):
-        safe_name = re.sub(r'[\/:*?"<>|]', '_', group)
-        valid_path = os.path.join(output_dir, f"{safe_name}_有效.m3u")
-        invalid_path = os.path.join(output_dir, f"{safe_name}_失效.m3u")
-
-        with open(valid_path, "w", encoding="utf-8") as f:
-            f.write("#EXTM3U\n")
-            for t, u in valid_list[group]:
-                f.write(f"#EXTINF:-1 group-title=\"{group}\",{t}\n{u}\n")
-        with open(invalid_path, "w", encoding="utf-8") as f:
-            f.write("#EXTM3U\n")
-            for t, u in invalid_list[group]:
-                f.write(f"#EXTINF:-1 group-title=\"{group}\",{t}\n{u}\n")
-
-        v_count = len(valid_list[group])
-        i_count = len(invalid_list[group])
-        print(f"分组 '{group}' → {v_count} 有效 | {i_count} 失效")
-
-    duration = time.time() - start_time
-    total_valid = sum(len(v) for v in valid_list.values())
-    total_invalid = sum(len(v) for v in invalid_list.values())
-    print("\n" + "="*60)
-    print(f"检测完成！有效 {total_valid}，失效 {total_invalid}，用时 {duration:.1f}s")
-    print(f"结果已保存至：{output_dir}")
-    print("="*60)
+USE_FFMPEG = True           # 备用验证（首次运行时查找 FFmpeg，结果缓存，之后启动不再检查）
+FFMPEG_PATH = None          # None 自动查找（Termux：/data/data/com.termux/files/usr/bin/ffmpeg，或 PATH）
+ENGINE = 'async'            # 'thread' 多线程 | 'async' asyncio 单事件循环（需 pip install aiohttp）
+ASYNC_CONCURRENCY = 200     # asyncio 模式同时在途的探测数
+PROCESSES = 1               # 检测进程数：> 1 时按主机把源分给多个进程，各自运行上面的引擎（0 为 CPU 核数）
+HLS_VALIDATE = True         # 原生 HLS 校验（variant + 分片 Range 请求），通过则不再启动 FFmpeg
+SNIFF = True                # 不是播放列表时按文件头识别（TS / MP4 / FLV 判有效，HTML 错误页判失效），能确定的不再启动 FFmpeg
+PROBE_MODE = 'range'        # 主请求：'get' 读 4KB | 'range' 带 Range 只取需要的字节（省流量）| 'head' 直链 .ts/.mp4 先发 HEAD
+MEDIA_WORKERS = 2           # FFmpeg 同时运行的进程数（独立队列，不占用 HTTP 工作者）
+POOL_PER_HOST = 8           # 每个主机保持的 keep-alive 连接数（所有线程 / 协程共用）
+HOST_CONCURRENCY = 4        # 每个主机同时在途的请求数（防 CDN 限流）
+HOST_RATE = 20.0            # 每个主机每秒最多开始几条检测（防封 IP，取代每条检测后的随机延迟）
+BREAKER_THRESHOLD = 3       # 同一主机连续连不上 3 次后，该主机剩余的源直接判失效（0 关闭）
+BREAKER_COOLDOWN = 60       # 熔断 60 秒后再放一个请求试探主机是否恢复
+MEASURE = False             # 测速：记录有效源的响应时间和分片下载速度，输出同名频道最快在前的优选列表
+MEASURE_BYTES = 1024 * 1024 # 测速时每个源下载的字节数（HLS 取一个分片）
+MIRROR_TOP_N = 0            # 优选列表中每个频道保留几个最快的地址（0 全部保留）
+MIRROR_STRIP_INDEX = False  # 标题只差末尾编号（岛国🍓01 / 岛国🍓03）也算同一频道
+RANKED_FILE = '优选.m3u'
+USE_CACHE = True            # 结果缓存：有效期内的 URL 不再重复探测
+CACHE_VALID_TTL = 12 * 3600     # 有效结论缓存 12 小时
+CACHE_INVALID_TTL = 2 * 3600    # 失效结论缓存 2 小时（可能只是临时故障）
+CACHE_FILE = '.m3u_checker_cache.db'   # 保存在 Download 文件夹
+USE_HISTORY = True          # 检测历史：记录每个 URL 每次检测的结论，用于安排检测顺序
+HISTORY_FILE = '.m3u_checker_history.db'   # 保存在 Download 文件夹
+TIME_BUDGET = 0             # 每次检测的时间预算（秒）：> 0 时新条目、最近翻转的先测，长期稳定的最后，超时的沿用上次结论（0 不限）
+RESUME = True               # 上次检测中断时，重新运行从中断处继续（已有结论的条目不再检测）
+JOURNAL_FILE = '.m3u_checker_journal.jsonl'   # 结果日志，检测正常结束后自动删除
+METRICS_FILE = 'm3u_checker_metrics.json'     # 导出延迟分布、各主机成败等统计（None 不导出）
+DOWNLOAD_DIR = None         # None 自动查找（/storage/emulated/0/Download、/sdcard/Download）
+
+SETTINGS = Settings(
+    version='v8.1',
+    timeout=TIMEOUT,
+    connect_timeout=CONNECT_TIMEOUT,
+    adaptive_timeouts=ADAPTIVE_TIMEOUT,
+    threads=THREADS,
+    retry_count=RETRY_COUNT,
+    use_ffmpeg=USE_FFMPEG,
+    ffmpeg_path=FFMPEG_PATH,
+    engine=ENGINE,
+    async_concurrency=ASYNC_CONCURRENCY,
+    processes=PROCESSES,
+    hls_validate=HLS_VALIDATE,
+    sniff=SNIFF,
+    probe_mode=PROBE_MODE,
+    media_workers=MEDIA_WORKERS,
+    pool_per_host=POOL_PER_HOST,
+    host_concurrency=HOST_CONCURRENCY,
+    host_rate=HOST_RATE,
+    breaker_threshold=BREAKER_THRESHOLD,
+    breaker_cooldown=BREAKER_COOLDOWN,
+    measure=MEASURE,
+    measure_bytes=MEASURE_BYTES,
+    mirror_top_n=MIRROR_TOP_N,
+    mirror_strip_index=MIRROR_STRIP_INDEX,
+    ranked_file=RANKED_FILE,
+    use_cache=USE_CACHE,
+    cache_valid_ttl=CACHE_VALID_TTL,
+    cache_invalid_ttl=CACHE_INVALID_TTL,
+    cache_file=CACHE_FILE,
+    use_history=USE_HISTORY,
+    history_file=HISTORY_FILE,
+    time_budget=TIME_BUDGET,
+    resume=RESUME,
+    journal_file=JOURNAL_FILE,
+    metrics_file=METRICS_FILE,
+    download_dir=DOWNLOAD_DIR,
+)
 
 if __name__ == "__main__":
-    try:
-        main()
-    except KeyboardInterrupt:
-        print("\n\n用户已中断。")
-    except Exception as e:
-        print(f"\n程序异常: {e}")
+    run_main(SETTINGS)
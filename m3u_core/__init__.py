@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+M3U 检测器公共核心
+三个检测脚本共用的检测逻辑与引擎（多线程 / asyncio）
+引擎模块（requests / aiohttp）在第一次检测时才导入，导入本包本身很快。
+"""
+
+import importlib
+import threading
+from importlib.util import find_spec
+
+from .probe import CheckProfile, ProbeResult, check_steps
+from .cache import ResultCache
+from .context import RunContext
+from .history import ResultHistory
+from .journal import ResultJournal
+from .stats import RunStats
+from .urls import UrlDeduper, normalize_url
+
+ENGINES = ('thread', 'async')
+AIOHTTP_AVAILABLE = find_spec('aiohttp') is not None
+
+_ENGINE_MODULES = {'thread': '.engine_thread', 'async': '.engine_async'}
+
+
+def _engine_module(engine):
+    return importlib.import_module(_ENGINE_MODULES[engine], __name__)
+
+
+def preload_engine(engine):
+    """在后台线程导入引擎（HTTP 库导入较慢），与选择文件、解析输入同时进行"""
+    if engine == 'async' and not AIOHTTP_AVAILABLE:
+        engine = 'thread'
+    threading.Thread(target=_engine_module, args=(engine,), daemon=True).start()
+
+
+def __getattr__(name):
+    if name == 'run_threaded':
+        return _engine_module('thread').run_threaded
+    if name == 'run_async':
+        return _engine_module('async').run_async
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def run_checks(entries, profile, on_result, ctx=None):
+    """
+    按 ctx.engine 选择检测引擎，返回 ctx。
+    entries 为 (group, title, url) 的任意可迭代对象（可以是边读边解析的生成器），
+    引擎边取边测，在途条目超过 ctx.max_pending 时暂停读取。
+    相同 URL 只探测一次，结论回填给列出它的每一条（on_result 仍按条目调用）。
+    设置了 ctx.journal 时，每个结论先写入日志；日志中已有结论的 URL 不再探测。
+    设置了 ctx.time_budget 时按 ctx.history 安排检测顺序（先读完全部条目），预算用完后沿用上次结论（见 RunContext.cached_result）。
+    """
+    ctx = ctx or RunContext()
+    if ctx.journal is not None:
+        entries = ctx.journal.filter(entries, on_result)
+        on_result = ctx.journal.recorder(on_result)
+    if ctx.history is not None and ctx.time_budget > 0:
+        entries = ctx.history.order(entries)
+    dedup = UrlDeduper(on_result, ctx.stats)
+    unique = dedup.filter(entries)
+    if ctx.engine == 'async':
+        if AIOHTTP_AVAILABLE:
+            _engine_module('async').run_async(unique, profile, dedup.on_result, ctx)
+            return ctx
+        print("未安装 aiohttp，改用多线程引擎（pip install aiohttp）")
+    _engine_module('thread').run_threaded(unique, profile, dedup.on_result, ctx)
+    return ctx
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+命令行入口（适合 Linux 上由 cron 定时运行，不需要交互）：
+
+  python -m m3u_core --profile v8.0 --dir ~/iptv a.m3u b.m3u
+  python -m m3u_core --engine thread --no-ffmpeg          # 扫描 --dir（或 Download 文件夹）让用户选择
+"""
+
+import argparse
+import os
+
+from .app import Settings, find_download_dir, run_main
+from .probe import PROBE_MODES
+from .profiles import PROFILES
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m m3u_core', description='M3U 直播源检测器')
+    parser.add_argument('files', nargs='*', help='要检测的文件；不给则扫描工作目录让用户选择')
+    parser.add_argument('--profile', default='v8.0', choices=list(PROFILES), help='检测策略（对应原来的三个脚本）')
+    parser.add_argument('--dir', help='工作目录（缓存、日志、输出文件的位置），默认 Download 文件夹或当前目录')
+    parser.add_argument('--engine', default='async', choices=['thread', 'async'])
+    parser.add_argument('-j', '--processes', type=int, default=1, help='检测进程数（0 为 CPU 核数，默认单进程）')
+    parser.add_argument('--no-ffmpeg', action='store_true', help='不使用 FFmpeg 验证')
+    parser.add_argument('--probe', default='range', choices=list(PROBE_MODES),
+                        help='主请求方式：get 读 4KB | range 带 Range 只取需要的字节 | head 直链媒体文件先发 HEAD')
+    parser.add_argument('--no-sniff', action='store_true', help='不按文件头识别内容（不是播放列表的一律交给 FFmpeg）')
+    parser.add_argument('--ffmpeg', help='FFmpeg 路径（默认自动查找）')
+    parser.add_argument('--budget', type=float, default=0,
+                        help='时间预算（秒）：按检测历史先测新条目和最近翻转的，超时的沿用上次结论（默认不限）')
+    parser.add_argument('--no-resume', action='store_true', help='忽略上次中断留下的结果日志，从头检测')
+    parser.add_argument('--measure', action='store_true', help='给有效的源测速，输出同名频道最快在前的优选列表')
+    parser.add_argument('--top', type=int, default=0, help='优选列表中每个频道保留的地址数（默认全部）')
+    args = parser.parse_args()
+
+    settings = Settings(
+        version=args.profile,
+        engine=args.engine,
+        processes=args.processes,
+        use_ffmpeg=not args.no_ffmpeg,
+        ffmpeg_path=args.ffmpeg,
+        sniff=not args.no_sniff,
+        probe_mode=args.probe,
+        resume=not args.no_resume,
+        time_budget=args.budget,
+        measure=args.measure,
+        mirror_top_n=args.top,
+        download_dir=args.dir or find_download_dir() or os.getcwd(),
+    )
+    run_main(settings, [os.path.abspath(f) for f in args.files] or None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+检测器主流程（v7.4 / v8.0 / v8.1 三个脚本共用）
+导入本模块不做任何检查、不启动子进程、不访问存储：
+Download 文件夹和 FFmpeg 都在 main() 里按需查找，HTTP 库在后台预先导入。
+"""
+
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from functools import partial
+
+from . import preload_engine, run_checks
+from .cache import ResultCache
+from .history import ResultHistory
+from .context import RunContext
+from .journal import ResultJournal
+from .multiproc import default_processes, run_processes
+from .parser import parse_file
+from .profiles import BANNERS, PROFILES
+from .quality import rank_mirrors, write_ranked
+from .redirects import shared_summary_lines, shared_targets
+from .tools import find_ffmpeg
+
+DOWNLOAD_DIRS = ('/storage/emulated/0/Download', '/sdcard/Download')
+INPUT_EXTS = ('.m3u', '.m3u8', '.txt')
+
+
+@dataclass
+class Settings:
+    version: str = 'v8.0'             # 检测策略：'v7.4' | 'v8.0' | 'v8.1'
+    timeout: float = 15               # 读取超时（按主机自适应时的上限）
+    connect_timeout: float = 10       # 建立连接超时（按主机自适应时的上限）
+    adaptive_timeouts: bool = True
+    threads: int = 8
+    retry_count: int = 1              # 额外的重试次数（v8.1），总尝试次数 = 1 + retry_count
+    use_ffmpeg: bool = True
+    ffmpeg_path: str = None           # None 自动查找（Termux 路径、PATH）
+    engine: str = 'async'             # 'thread' 多线程 | 'async' asyncio 单事件循环（需 pip install aiohttp）
+    async_concurrency: int = 200
+    processes: int = 1                # > 1 多进程检测（每个进程各自的引擎、线程 / 并发数、FFmpeg 进程数），0 为 CPU 核数
+    hls_validate: bool = True
+    sniff: bool = True                # 不是播放列表时按文件头识别，TS / MP4 / FLV 流和 HTML 错误页不再启动 FFmpeg
+    probe_mode: str = 'range'         # 主请求方式：'get' | 'range' | 'head'（见 CheckProfile.probe_mode）
+    media_workers: int = 2
+    pool_per_host: int = 8
+    host_concurrency: int = 4
+    host_rate: float = 20.0            # 每个主机每秒最多开始几条检测（一条检测的后续请求不再计）
+    breaker_threshold: int = 3
+    breaker_cooldown: float = 60
+    measure: bool = False             # 给有效的源测速，输出同名频道按速度排序的优选列表
+    measure_bytes: int = 1024 * 1024
+    mirror_top_n: int = 0             # 每个频道保留几个最快的地址（0 全部保留）
+    mirror_strip_index: bool = False  # 标题末尾的编号不同也算同一频道
+    ranked_file: str = '优选.m3u'
+    use_cache: bool = True
+    cache_valid_ttl: float = 12 * 3600
+    cache_invalid_ttl: float = 2 * 3600
+    cache_file: str = '.m3u_checker_cache.db'
+    use_history: bool = True          # 记录每次检测的结论（按 URL 统计翻转次数、连续相同次数）
+    history_file: str = '.m3u_checker_history.db'
+    time_budget: float = 0            # > 0 时按历史排序（新条目 → 最近翻转 → 变化概率高），只检测这么多秒
+    resume: bool = True
+    journal_file: str = '.m3u_checker_journal.jsonl'
+    metrics_file: str = 'm3u_checker_metrics.json'
+    download_dir: str = None          # None 自动查找 Download 文件夹
+
+
+def find_download_dir():
+    """环境变量 M3U_CHECKER_DIR 优先，其次安卓的 Download 文件夹；都没有返回 None"""
+    for path in (os.environ.get('M3U_CHECKER_DIR'),) + DOWNLOAD_DIRS:
+        if path and os.path.isdir(path):
+            return path
+    return None
+
+
+def select_file_auto(download_dir):
+    files = [os.path.join(download_dir, f) for f in os.listdir(download_dir)
+             if f.lower().endswith(INPUT_EXTS)]
+    if not files:
+        print(f"在 {download_dir} 中未找到 .m3u/.m3u8/.txt 文件")
+        return None
+    print(f"在 {download_dir} 找到 {len(files)} 个文件：")
+    for i, f in enumerate(files, 1):
+        print(f"  {i}. {os.path.basename(f)}")
+    while True:
+        try:
+            choice = input(f"\n请输入要检测的文件编号（1-{len(files)}），或回车检测全部：").strip()
+            if not choice:
+                return files
+            idx = int(choice) - 1
+            if 0 <= idx < len(files):
+                return [files[idx]]
+        except ValueError:
+            pass
+        except EOFError:          # 没有交互输入（如 cron 运行）
+            return None
+        print("输入无效，请重试。")
+
+
+class CheckerRun:
+    """一次检测的进度计数（原脚本中的全局变量）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_count = 0
+        self.total_count = 0
+        self.parsing_done = threading.Event()
+        self.progress_changed = threading.Event()
+
+    # ================== 结果记录 ==================
+    def record_result(self, group, title, url, result):
+        tag = "（缓存）" if result.cached else ""
+        with self.lock:
+            self.checked_count += 1
+            print(f"{'有效' if result.ok else '失效'}{tag}: {title}")
+        self.progress_changed.set()
+
+    # ================== 读取输入 ==================
+    def iter_entries(self, file_list):
+        """逐个文件边读边解析，解析出一条就交给检测引擎，不把整个文件读进内存"""
+        try:
+            for file_path in file_list:
+                print(f"\n正在解析：{os.path.basename(file_path)}")
+                count = 0
+                try:
+                    for entry in parse_file(file_path):
+                        count += 1
+                        with self.lock:
+                            self.total_count += 1
+                        yield entry
+                except Exception as e:
+                    print(f"  → 读取失败: {e}")
+                    continue
+                print(f"  → 解析出 {count} 条频道" if count else "  → 无有效频道")
+        finally:
+            self.parsing_done.set()
+
+    # ================== 进度条 ==================
+    def show_progress(self, stats):
+        """有新结论时刷新（最多每 0.5 秒一次），显示实时速度和检测耗时 p95"""
+        while True:
+            self.progress_changed.wait(1.0)
+            self.progress_changed.clear()
+            with self.lock:
+                done, total = self.checked_count, self.total_count
+            if self.parsing_done.is_set() and done >= total:
+                break
+            pct = done / total * 100 if total > 0 else 0
+            more = "+" if not self.parsing_done.is_set() else ""
+            print(f"\r[检测中] {done}/{total}{more} ({pct:.1f}%) | {stats.rate('checks'):.1f} 条/秒"
+                  f" | p95 {stats.percentile('check', 95) / 1000:.1f}s | HTTP 队列 {stats.current('http_queue')}"
+                  f" | FFmpeg 队列 {stats.current('media_queue')}", end="", flush=True)
+            time.sleep(0.5)
+        print(f"\r[完成] {self.checked_count}/{self.total_count} (100%)      ")
+
+
+def write_outputs(journal, output_dir):
+    """由结果日志生成每个分组的 _有效 / _失效 文件（包括中断前已完成的部分），返回 (有效数, 失效数)"""
+    valid_list = defaultdict(list)
+    invalid_list = defaultdict(list)
+    for group, title, url, result in journal.results():
+        (valid_list if result.ok else invalid_list)[group].append((title, url))
+
+    all_groups = set(valid_list.keys()) | set(invalid_list.keys())
+    for group in sorted(all_groups):
+        safe_name = re.sub(r'[\/:*?"<>|]', '_', group)
+        valid_path = os.path.join(output_dir, f"{safe_name}_有效.m3u")
+        invalid_path = os.path.join(output_dir, f"{safe_name}_失效.m3u")
+
+        with open(valid_path, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            for t, u in valid_list[group]:
+                f.write(f"#EXTINF:-1 group-title=\"{group}\",{t}\n{u}\n")
+        with open(invalid_path, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            for t, u in invalid_list[group]:
+                f.write(f"#EXTINF:-1 group-title=\"{group}\",{t}\n{u}\n")
+
+        v_count = len(valid_list[group])
+        i_count = len(invalid_list[group])
+        print(f"分组 '{group}' → {v_count} 有效 | {i_count} 失效")
+
+    total_valid = sum(len(v) for v in valid_list.values())
+    total_invalid = sum(len(v) for v in invalid_list.values())
+    return total_valid, total_invalid
+
+
+def resolve_ffmpeg(settings):
+    if not settings.use_ffmpeg:
+        return None
+    cmd = find_ffmpeg(settings.ffmpeg_path)
+    if cmd:
+        print(f"FFmpeg 已就绪: {cmd[0]}")
+    else:
+        print("未找到 ffmpeg！请在 Termux 执行：pkg install ffmpeg")
+    return cmd
+
+
+def build_profile(settings, ffmpeg_cmd=None):
+    profile = PROFILES[settings.version](settings.timeout, settings.retry_count, ffmpeg_cmd,
+                                         settings.hls_validate, settings.sniff)
+    profile = replace(profile, probe_mode=settings.probe_mode)
+    if settings.measure:
+        profile = replace(profile, measure_bytes=settings.measure_bytes)
+    return profile
+
+
+def write_ranked_playlist(journal, settings, output_dir):
+    """同名频道按测得的速度排序（最快的在前），写出优选列表"""
+    ranked = rank_mirrors(journal.results(), settings.mirror_top_n,
+                          settings.mirror_strip_index)
+    count = write_ranked(os.path.join(output_dir, settings.ranked_file), ranked)
+    mirrored = sum(1 for _, mirrors in ranked if len(mirrors) > 1)
+    print(f"优选列表：{settings.ranked_file}，{len(ranked)} 个频道 {count} 个地址"
+          f"（{mirrored} 个频道有多个地址，最快的排在前面）")
+
+
+def make_context(settings, download_dir, readonly=False):
+    """
+    按设置创建 RunContext（含结果缓存，不含结果日志）；多进程检测时每个子进程各调用一次，
+    readonly=True：子进程只读缓存 / 历史，结论回到父进程后由父进程写入（SQLite 同时只能有一个写者）
+    """
+    ctx = RunContext(engine=settings.engine, threads=settings.threads,
+                     concurrency=settings.async_concurrency, media_workers=settings.media_workers,
+                     pool_per_host=settings.pool_per_host, host_concurrency=settings.host_concurrency,
+                     host_rate=settings.host_rate, breaker_threshold=settings.breaker_threshold,
+                     breaker_cooldown=settings.breaker_cooldown, connect_timeout=settings.connect_timeout,
+                     adaptive_timeouts=settings.adaptive_timeouts)
+    open_storage(ctx, settings, download_dir, readonly)
+    return ctx
+
+
+def open_storage(ctx, settings, download_dir, readonly=False):
+    if settings.use_history:
+        ctx.history = ResultHistory(os.path.join(download_dir, settings.history_file), ctx.stats, readonly)
+        ctx.time_budget = settings.time_budget
+    if settings.use_cache:
+        ctx.cache = ResultCache(os.path.join(download_dir, settings.cache_file),
+                                settings.cache_valid_ttl, settings.cache_invalid_ttl, ctx.stats, readonly)
+
+
+def open_context(settings, download_dir, processes):
+    """本次检测的 RunContext；多进程时父进程只写日志、缓存和历史，排检测顺序、汇总统计，不探测"""
+    if processes <= 1:
+        return make_context(settings, download_dir)
+    ctx = RunContext(engine=settings.engine)
+    open_storage(ctx, settings, download_dir)
+    return ctx
+
+
+def check_entries(entries, profile, on_result, ctx, settings, download_dir, processes):
+    """单进程或多进程检测 entries；返回多进程时合并的各主机超时（单进程为 None）"""
+    if processes > 1:
+        worker_context = partial(make_context, settings, download_dir, readonly=True)
+        return run_processes(entries, profile, on_result, ctx, worker_context, processes)
+    run_checks(entries, profile, on_result, ctx)
+    return None
+
+
+def close_context(ctx):
+    if ctx.journal is not None:
+        ctx.journal.close()
+    if ctx.cache is not None:
+        ctx.cache.close()
+    if ctx.history is not None:
+        ctx.history.close()
+
+
+# ================== 主函数 ==================
+def main(settings=None, file_list=None):
+    """file_list 为 None 时扫描 Download 文件夹并让用户选择；返回检测的 RunContext（未检测返回 None）"""
+    settings = settings or Settings()
+    preload_engine(settings.engine)     # 用户选择文件、查找 FFmpeg 的同时在后台导入 HTTP 库
+
+    title, subtitle = BANNERS[settings.version]
+    print("="*60)
+    print(title)
+    print(subtitle)
+    print("="*60)
+
+    download_dir = settings.download_dir or find_download_dir()
+    if download_dir is None:
+        print("无法访问 Download 文件夹！请检查存储权限。")
+        return None
+    ffmpeg_cmd = resolve_ffmpeg(settings)
+    file_list = file_list or select_file_auto(download_dir)
+    if not file_list:
+        return None
+
+    engine_name = "asyncio" if settings.engine == 'async' else "多线程"
+    print(f"\n开始{engine_name}检测（边解析边检测）...\n")
+
+    processes = settings.processes if settings.processes > 0 else default_processes()
+    if processes > 1:
+        print(f"多进程检测：{processes} 个进程，同一主机的源在同一进程里检测\n")
+    ctx = open_context(settings, download_dir, processes)
+    if ctx.time_budget > 0:
+        print(f"时间预算 {ctx.time_budget:g} 秒：读完全部条目后按检测历史排序，"
+              f"新条目和最近翻转的先测，预算用完后还没开始的沿用上次结论\n")
+    ctx.journal = ResultJournal(os.path.join(download_dir, settings.journal_file), file_list,
+                                settings.resume, ctx.stats)
+    if ctx.journal.resumed:
+        print(f"从上次中断处继续：日志中已有 {ctx.journal.resumed_count} 条结论\n")
+    run = CheckerRun()
+    start_time = time.time()
+    threading.Thread(target=run.show_progress, args=(ctx.stats,), daemon=True).start()
+    profile = build_profile(settings, ffmpeg_cmd)
+    try:
+        host_timeouts = check_entries(run.iter_entries(file_list), profile, run.record_result, ctx,
+                                      settings, download_dir, processes)
+    finally:
+        close_context(ctx)
+
+    if run.total_count == 0:
+        print("\n未找到任何可检测的频道")
+        ctx.journal.complete()
+        return ctx
+
+    output_dir = download_dir
+    total_valid, total_invalid = write_outputs(ctx.journal, output_dir)
+    if settings.measure:
+        write_ranked_playlist(ctx.journal, settings, output_dir)
+
+    duration = time.time() - start_time
+    print("\n" + "="*60)
+    rate = run.checked_count / duration if duration > 0 else 0
+    print(f"检测完成！有效 {total_valid}，失效 {total_invalid}，用时 {duration:.1f}s（{rate:.1f} 条/秒）")
+    for line in ctx.stats.summary_lines():
+        print(line)
+    shared = shared_targets(ctx.journal.results())
+    for line in shared_summary_lines(shared):
+        print(line)
+    if settings.metrics_file:
+        ctx.stats.export_json(os.path.join(output_dir, settings.metrics_file),
+                              timeouts=host_timeouts or ctx.timeouts.to_dict(settings.timeout),
+                              shared_targets={final: [{'group': g, 'title': t, 'url': u} for g, t, u in items]
+                                              for final, items in shared.items()})
+        print(f"统计数据：{settings.metrics_file}")
+    print(f"结果已保存至：{output_dir}")
+    print("="*60)
+    ctx.journal.complete()
+    return ctx
+
+
+def run_main(settings, file_list=None):
+    """脚本入口：Ctrl+C 和未预料的异常只打印提示，不输出 traceback"""
+    try:
+        main(settings, file_list)
+    except KeyboardInterrupt:
+        print("\n\n用户已中断。" + ("已完成的结论已保存，重新运行将从中断处继续。" if settings.resume else ""))
+    except Exception as e:
+        print(f"\n程序异常: {e}")
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+按主机（主机名 + 端口）熔断：同一主机连续 threshold 次连不上（连接被拒 / 连接超时 / 域名不存在）后，
+该主机剩余的 URL 直接判为失效，不再每条都等满超时；cooldown 秒后放一个请求去试探，
+连上了就恢复，仍连不上则再熔断 cooldown 秒。
+"""
+
+import threading
+import time
+
+from .ops import HostUnavailable
+
+
+class _HostState:
+    __slots__ = ('failures', 'open_until', 'probing')
+
+    def __init__(self):
+        self.failures = 0         # 连续连不上的次数
+        self.open_until = 0.0     # 熔断到此时刻（0 表示未熔断）
+        self.probing = 0.0        # 冷却结束后放出的试探请求开始时刻
+
+
+class HostBreaker:
+    def __init__(self, threshold=3, cooldown=60.0, stats=None):
+        self.threshold = threshold    # <= 0 表示不熔断
+        self.cooldown = cooldown
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _count(self, key):
+        if self.stats is not None:
+            self.stats.incr(key)
+
+    def check(self, host, claim=True):
+        """
+        主机已熔断时返回 HostUnavailable（不要发请求），否则 None。
+        claim=False 只查看状态：排队等主机限速之前先查一次，拿到名额、真正发请求前再 claim。
+        """
+        if self.threshold <= 0:
+            return None
+        with self._lock:
+            st = self._hosts.get(host)
+            if st is None or not st.open_until:
+                return None
+            now = time.monotonic()
+            if now >= st.open_until and not (st.probing and now - st.probing < self.cooldown):
+                if claim:
+                    st.probing = now  # 半开：只放这一个请求去试探
+                return None
+        self._count('breaker_fast_fail')
+        return HostUnavailable(f"主机已熔断（连续 {self.threshold} 次连不上）")
+
+    def record(self, host, reachable):
+        """reachable：这次是否连上了主机（HTTP 错误状态码也算连上）"""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            st = self._hosts.get(host)
+            if reachable:
+                if st is not None:
+                    if st.open_until:
+                        self._count('breaker_closed')
+                    del self._hosts[host]
+                return
+            if st is None:
+                st = self._hosts[host] = _HostState()
+            st.failures += 1
+            if st.failures < self.threshold:
+                return
+            reopen = st.probing or not st.open_until
+            st.open_until = time.monotonic() + self.cooldown
+            st.probing = 0.0
+        if reopen:
+            self._count('breaker_open')
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+检测结果缓存（SQLite）：按规范化 URL 保存结论，有效 / 失效分别设置有效期，
+有效期内的 URL 直接沿用上次结论，不再联网探测
+"""
+
+import sqlite3
+import threading
+import time
+
+from .probe import ProbeResult
+from .urls import normalize_url
+
+COMMIT_EVERY = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    url        TEXT PRIMARY KEY,
+    ok         INTEGER NOT NULL,
+    status     INTEGER,
+    method     TEXT NOT NULL,
+    reason     TEXT NOT NULL DEFAULT '',
+    checked_at REAL NOT NULL
+)
+"""
+
+
+class ResultCache:
+    def __init__(self, path, valid_ttl=12 * 3600, invalid_ttl=2 * 3600, stats=None, readonly=False):
+        self.path = path
+        self.readonly = readonly      # 只读：put / close 不写库（多进程检测的子进程，结论由父进程统一写）
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._pending = 0
+        # 线程模式多线程共用一个连接，由 _lock 串行化
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if readonly:
+            return
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def _count(self, key):
+        if self.stats is not None:
+            self.stats.incr(key)
+
+    def get(self, url, now=None):
+        """有效期内的结论返回 ProbeResult(cached=True)，否则 None"""
+        now = now or time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT ok, status, method, reason, checked_at FROM results WHERE url = ?",
+                (normalize_url(url),)).fetchone()
+        if row is not None:
+            ok, status, method, reason, checked_at = row
+            ttl = self.valid_ttl if ok else self.invalid_ttl
+            if now - checked_at < ttl:
+                self._count('cache_hit')
+                return ProbeResult(bool(ok), status, method, reason, cached=True, checked_at=checked_at)
+        self._count('cache_miss')
+        return None
+
+    def put(self, url, result):
+        if result.cached or self.readonly:
+            return
+        checked_at = result.checked_at or time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (url, ok, status, method, reason, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), int(result.ok), result.status, result.method, result.reason, checked_at))
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if not self.readonly:
+                self._db.commit()
+            self._db.close()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+一次检测运行的共享状态（引擎参数、连接池、统计），线程引擎和 asyncio 引擎共用
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from .breaker import HostBreaker
+from .cache import ResultCache
+from .dns import DnsCache
+from .history import ResultHistory
+from .hls import memo_ttl
+from .journal import ResultJournal
+from .memo import RunMemo
+from .ops import ExchangeResult
+from .ranges import RangeTable
+from .redirects import RedirectCache
+from .scheduler import HostScheduler
+from .stats import RunStats
+from .timeouts import HostTimeouts
+from .urls import endpoint_of
+
+
+@dataclass
+class RunContext:
+    engine: str = 'thread'        # 'thread' | 'async'
+    threads: int = 8              # 线程模式的工作线程数
+    concurrency: int = 200        # asyncio 模式同时在途的探测数
+    max_pending: int = 2000       # 已读入但未出结论的条目上限（背压，内存不随输入增长）
+    media_workers: int = 2        # FFmpeg/ffprobe 同时运行的进程数（独立于 HTTP 工作者）
+    pool_per_host: int = 8        # 每个主机保持的 keep-alive 连接数
+    host_concurrency: int = 4     # 每个主机同时在途的请求数
+    host_rate: float = 20.0       # 每个主机每秒开始的检测数（<= 0 不限速；一条检测的后续请求不再计）
+    breaker_threshold: int = 3    # 同一主机连续连不上几次后熔断（<= 0 不熔断）
+    breaker_cooldown: float = 60  # 熔断多久后再试探
+    connect_timeout: float = 10   # 建立连接超时的上限（读取超时的上限为检测策略的 timeout）
+    adaptive_timeouts: bool = True  # 按主机观测到的延迟缩短超时
+    redirect_ttl: float = 600     # 没有缓存头的临时跳转（302/303/307）缓存多久（<= 0 只缓存永久 / 带缓存头的）
+    time_budget: float = 0        # > 0 时按检测历史排序，只检测这么多秒，剩下的沿用上次结论（需要 history）
+    stats: RunStats = field(default_factory=RunStats)
+    scheduler: HostScheduler = None
+    cache: ResultCache = None     # None 表示不使用结果缓存
+    journal: ResultJournal = None # 结果日志（断点续检），None 表示不写日志
+    history: ResultHistory = None # 检测历史，None 表示不记录
+    playlists: RunMemo = None     # 本次运行抓过的 HLS 播放列表
+    breaker: HostBreaker = None
+    dns: DnsCache = None          # 所有工作者共用的 DNS 缓存
+    timeouts: HostTimeouts = None
+    redirects: RedirectCache = None   # 本次运行学到的跳转，之后直接请求最终地址
+    deadline: float = field(default=None, init=False)   # 时间预算到期的时刻（time.monotonic()），第一条检测开始时确定
+    ranges: RangeTable = None     # 各主机对 Range 请求的支持情况
+
+    def __post_init__(self):
+        if self.scheduler is None:
+            self.scheduler = HostScheduler(self.host_concurrency, self.host_rate, stats=self.stats)
+        if self.playlists is None:
+            self.playlists = RunMemo(self.stats, 'playlist', ttl_of=memo_ttl)
+        if self.breaker is None:
+            self.breaker = HostBreaker(self.breaker_threshold, self.breaker_cooldown, stats=self.stats)
+        if self.dns is None:
+            self.dns = DnsCache(stats=self.stats)
+        if self.timeouts is None:
+            self.timeouts = HostTimeouts(self.connect_timeout, self.adaptive_timeouts, stats=self.stats)
+        if self.redirects is None:
+            self.redirects = RedirectCache(self.redirect_ttl, stats=self.stats)
+        if self.ranges is None:
+            self.ranges = RangeTable(stats=self.stats)
+
+    def cached_result(self, url):
+        """联网探测前先查结果缓存；时间预算用完后沿用检测历史中的上次结论（新条目仍然检测）"""
+        if self.cache is not None:
+            result = self.cache.get(url)
+            if result is not None:
+                return result
+        if self.time_budget > 0 and self.history is not None:
+            if self.deadline is None:
+                self.deadline = time.monotonic() + self.time_budget
+            elif time.monotonic() >= self.deadline:
+                return self.history.last_result(url)
+        return None
+
+    def host_blocked(self, url, claim=True):
+        """URL 所在主机已熔断时返回 HostUnavailable，调用方不要再发请求"""
+        return self.breaker.check(endpoint_of(url), claim)
+
+    def host_reached(self, url, result):
+        """把一次请求（FetchResult / ExchangeResult）是否连上主机计入熔断"""
+        self.breaker.record(endpoint_of(url), not result.unreachable)
+
+    def timeouts_for(self, url, timeout):
+        """这次请求的 (连接, 读取) 超时"""
+        return self.timeouts.pick(endpoint_of(url), timeout)
+
+    def learn_timeouts(self, url, timeout, result, phase):
+        """把请求的耗时计入该主机的超时统计；phase 为超时阶段（没超时为 None）"""
+        endpoint = endpoint_of(url)
+        if isinstance(result, ExchangeResult) and result.connect_ms is not None:
+            self.timeouts.observe_connect(endpoint, result.connect_ms)
+        if result.ttfb_ms is not None:
+            self.timeouts.observe_ttfb(endpoint, result.ttfb_ms)
+        if phase is not None and result.timeouts is not None:
+            self.timeouts.expired(endpoint, phase, result.timeouts, timeout)
+
+    def finish(self, url, result):
+        if result.checked_at is None:
+            result.checked_at = time.time()
+        if self.cache is not None:
+            self.cache.put(url, result)
+        if self.history is not None:
+            self.history.record(url, result)
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+监控模式：常驻运行，输入文件解析一次留在内存里，按周期反复检测，
+同时在本地 HTTP 端口提供按当前结论过滤好的列表（请求时不探测，直接返回内存里生成好的内容）：
+
+  python -m m3u_core.daemon a.m3u b.txt --port 8899 --interval 1800
+
+  /playlist.m3u              全部有效频道
+  /playlist/<分组>.m3u        单个分组的有效频道（分组名按 URL 编码）
+  /lives.txt                 TVBox 直播列表（分组,#genre# / 名称,URL）
+  /tvbox.json                只有 lives 的 TVBox 配置，指向本服务的 /lives.txt
+  /status.json               各分组有效 / 失效 / 未检测的数量和检测轮次
+
+每轮检测的结论边出边写进索引，列表最多每 PUBLISH_EVERY 秒重新生成一次；
+启动时先用检测历史里的上次结论填充，不用等第一轮检测完。输入文件修改后，下一轮开始前重新解析。
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from . import preload_engine
+from .app import (Settings, build_profile, check_entries, close_context, find_download_dir, open_context,
+                  resolve_ffmpeg)
+from .history import ResultHistory
+from .multiproc import default_processes
+from .ops import describe_error
+from .parser import parse_file
+from .profiles import PROFILES
+
+PUBLISH_EVERY = 5.0       # 检测进行中时列表重新生成的最短间隔（秒）
+DEFAULT_PORT = 8899
+DEFAULT_INTERVAL = 1800   # 两轮检测开始的间隔（秒）
+
+M3U_TYPE = 'audio/x-mpegurl; charset=utf-8'
+TEXT_TYPE = 'text/plain; charset=utf-8'
+JSON_TYPE = 'application/json; charset=utf-8'
+
+_HOST = re.compile(r'(?:[A-Za-z0-9.-]{1,253}|\[[0-9A-Fa-f:.]+\])(?::\d{1,5})?')
+
+
+# ================== 结论索引 ==================
+class VerdictIndex:
+    """当前结论的内存索引；生成好的响应按版本缓存，结论变化后才重新生成"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []        # 输入中的 (group, title, url)，保持原顺序
+        self._verdicts = {}       # (group, title, url) -> ProbeResult
+        self._rendered = {}       # 缓存键 -> 响应内容（bytes），版本变化时清空
+        self._dirty = False
+        self._published = 0.0
+        self.version = 0
+        self.rounds = 0
+        self.round_started = None
+        self.round_finished = None
+        self.last_error = None    # 最近一轮出错的原因（成功完成一轮后清空）
+
+    def _bump(self):
+        self.version += 1
+        self._dirty = False
+        self._published = time.monotonic()
+        self._rendered.clear()
+
+    def set_entries(self, entries, seed=None):
+        """换成新的条目列表（保留仍在列表中的结论）；seed 为 url -> 上次结论 的函数，填充没有结论的条目"""
+        entries = list(entries)
+        with self._lock:
+            keep = set(entries)
+            verdicts = {e: r for e, r in self._verdicts.items() if e in keep}
+        if seed is not None:
+            for entry in entries:
+                if entry not in verdicts:
+                    result = seed(entry[2])
+                    if result is not None:
+                        verdicts[entry] = result
+        with self._lock:
+            self._entries, self._verdicts = entries, verdicts
+            self._bump()
+
+    def update(self, group, title, url, result):
+        """检测引擎的 on_result；结论（有效 / 失效）没变时列表不用重新生成，ETag 也不变"""
+        key = (group, title, url)
+        with self._lock:
+            previous = self._verdicts.get(key)
+            self._verdicts[key] = result
+            if previous is None or previous.ok != result.ok:
+                self._dirty = True
+
+    def publish(self, force=False):
+        with self._lock:
+            if self._dirty and (force or time.monotonic() - self._published >= PUBLISH_EVERY):
+                self._bump()
+
+    def groups(self):
+        with self._lock:
+            return list(dict.fromkeys(group for group, _, _ in self._entries))
+
+    def _valid(self, group=None):
+        return [(g, t, u) for g, t, u in self._entries
+                if (group is None or g == group) and getattr(self._verdicts.get((g, t, u)), 'ok', False)]
+
+    def render(self, key, build):
+        """key 对应的响应内容；当前版本已生成过的直接返回，build(valid_entries) 只在版本变化后调用"""
+        self.publish()
+        with self._lock:
+            body = self._rendered.get(key)
+            if body is None:
+                group = key[1] if key[0] == 'group' else None
+                body = self._rendered[key] = build(self._valid(group))
+            return self.version, body
+
+    def status(self):
+        with self._lock:
+            groups = {}
+            for g, t, u in self._entries:
+                counts = groups.setdefault(g, {'valid': 0, 'invalid': 0, 'unchecked': 0})
+                result = self._verdicts.get((g, t, u))
+                counts['unchecked' if result is None else 'valid' if result.ok else 'invalid'] += 1
+            total = {key: sum(c[key] for c in groups.values()) for key in ('valid', 'invalid', 'unchecked')}
+            return {'version': self.version, 'rounds': self.rounds, 'round_started': self.round_started,
+                    'round_finished': self.round_finished, 'last_error': self.last_error,
+                    'entries': len(self._entries), **total, 'groups': groups}
+
+
+# ================== 输出格式 ==================
+def m3u_body(entries):
+    lines = ["#EXTM3U"]
+    for group, title, url in entries:
+        lines.append(f'#EXTINF:-1 group-title="{group}",{title}\n{url}')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def lives_body(entries):
+    """TVBox 的 TXT 直播格式：分组行之后是该分组的频道"""
+    by_group = {}
+    for group, title, url in entries:
+        by_group.setdefault(group, []).append(f"{title},{url}")
+    lines = []
+    for group, channels in by_group.items():
+        lines.append(f"{group},#genre#")
+        lines.extend(channels)
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def tvbox_body(base):
+    config = {'lives': [{'name': '直播（已检测）', 'type': 0, 'url': f"{base}/lives.txt"}]}
+    return json.dumps(config, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+# ================== HTTP 服务 ==================
+class PlaylistHandler(BaseHTTPRequestHandler):
+    server_version = 'm3u-checker'
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def route(self):
+        """返回 (版本, 内容类型, 内容)，路径不存在返回 None"""
+        index = self.server.index
+        path = unquote(urlsplit(self.path).path)
+        if path in ('/', '/playlist.m3u'):
+            return (M3U_TYPE, *index.render(('all',), m3u_body))
+        if path.startswith('/playlist/') and path.endswith('.m3u'):
+            group = path[len('/playlist/'):-len('.m3u')]
+            if group not in index.groups():
+                return None
+            return (M3U_TYPE, *index.render(('group', group), m3u_body))
+        if path == '/lives.txt':
+            return (TEXT_TYPE, *index.render(('lives',), lives_body))
+        if path == '/tvbox.json':
+            # 内容只取决于访问用的地址，每次现生成，不进按版本的缓存（客户端随意填的 Host 不会让缓存无限增长）
+            return JSON_TYPE, None, tvbox_body(f"http://{self.base_host()}")
+        if path == '/status.json':
+            status = index.status()
+            status['playlists'] = [f"/playlist/{quote(g)}.m3u" for g in status['groups']]
+            return JSON_TYPE, None, json.dumps(status, ensure_ascii=False, indent=2).encode('utf-8')
+        return None
+
+    def base_host(self):
+        """客户端访问用的 主机[:端口]（Host 头格式不对时用监听地址）"""
+        host = self.headers.get('Host') or ''
+        if _HOST.fullmatch(host):
+            return host
+        return '%s:%d' % self.server.server_address[:2]
+
+    def respond(self, send_body):
+        found = self.route()
+        if found is None:
+            self.send_error(404)
+            return
+        ctype, version, body = found
+        etag = f'"{self.server.tag}-{version}"' if version is not None else None
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self.respond(True)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+
+def serve(index, bind, port):
+    """在后台线程启动 HTTP 服务，返回 server（server.shutdown() 停止）"""
+    server = ThreadingHTTPServer((bind, port), PlaylistHandler)
+    server.daemon_threads = True
+    server.index = index
+    server.tag = f"{int(time.time()):x}"     # 重启后版本号从头算，ETag 带上启动时刻以免与重启前的混淆
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ================== 周期检测 ==================
+def load_entries(file_list):
+    entries = []
+    for path in file_list:
+        try:
+            count = len(entries)
+            entries.extend(parse_file(path))
+            print(f"解析 {os.path.basename(path)}：{len(entries) - count} 条频道")
+        except OSError as e:
+            print(f"读取 {os.path.basename(path)} 失败: {e}")
+    return entries
+
+
+def _mtimes(file_list):
+    return [os.path.getmtime(p) if os.path.exists(p) else None for p in file_list]
+
+
+def run_rounds(settings, file_list, index, interval, stop):
+    """一轮接一轮地检测，直到 stop 被设置；某一轮出错时保留已发布的列表，下一个周期再试"""
+    download_dir = settings.download_dir
+    processes = settings.processes if settings.processes > 0 else default_processes()
+    profile = build_profile(settings, resolve_ffmpeg(settings))
+    history = settings.use_history and os.path.join(download_dir, settings.history_file)
+    mtimes, entries = None, []
+    while not stop.is_set():
+        started = time.monotonic()
+        index.round_started = time.time()
+        try:
+            current = _mtimes(file_list)
+            if current != mtimes:
+                entries = load_entries(file_list)
+                seed = ResultHistory(history) if history else None
+                try:
+                    index.set_entries(entries, seed.last_result if seed else None)
+                finally:
+                    if seed is not None:
+                        seed.close()
+                mtimes = current
+
+            print(f"\n第 {index.rounds + 1} 轮检测开始：{len(entries)} 条")
+            ctx = open_context(settings, download_dir, processes)
+            try:
+                check_entries(iter(entries), profile, index.update, ctx, settings, download_dir, processes)
+            finally:
+                close_context(ctx)
+        except Exception as e:
+            index.last_error = f"{type(e).__name__}: {describe_error(e)}"
+            index.publish(force=True)     # 出错前已经出来的结论照常发布
+            wait = max(interval - (time.monotonic() - started), 0)
+            print(f"第 {index.rounds + 1} 轮检测出错：{index.last_error}；继续提供上次的列表，{wait:.0f}s 后重试")
+            stop.wait(wait)
+            continue
+
+        index.rounds += 1
+        index.round_finished = time.time()
+        index.last_error = None
+        index.publish(force=True)
+
+        status = index.status()
+        elapsed = time.monotonic() - started
+        wait = max(interval - elapsed, 0)
+        print(f"第 {index.rounds} 轮检测完成：有效 {status['valid']}，失效 {status['invalid']}，"
+              f"用时 {elapsed:.1f}s，{wait:.0f}s 后开始下一轮")
+        stop.wait(wait)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m m3u_core.daemon',
+                                     description='M3U 直播源监控：周期检测，本地 HTTP 提供过滤后的列表')
+    parser.add_argument('files', nargs='+', help='要监控的 M3U / TXT 文件')
+    parser.add_argument('--profile', default='v8.0', choices=list(PROFILES), help='检测策略')
+    parser.add_argument('--dir', help='工作目录（检测历史的位置），默认 Download 文件夹或当前目录')
+    parser.add_argument('--engine', default='async', choices=['thread', 'async'])
+    parser.add_argument('-j', '--processes', type=int, default=1, help='检测进程数（0 为 CPU 核数，默认单进程）')
+    parser.add_argument('--no-ffmpeg', action='store_true', help='不使用 FFmpeg 验证')
+    parser.add_argument('--bind', default='127.0.0.1', help='HTTP 监听地址（局域网内的播放器访问用 0.0.0.0）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='两轮检测开始的间隔（秒）')
+    parser.add_argument('--budget', type=float, default=0,
+                        help='每轮的时间预算（秒）：按检测历史先测新条目和最近翻转的，其余沿用上次结论')
+    args = parser.parse_args()
+
+    # 结果缓存会让有效期内的 URL 整轮跳过，监控模式只用检测历史
+    settings = Settings(version=args.profile, engine=args.engine, processes=args.processes,
+                        use_ffmpeg=not args.no_ffmpeg, use_cache=False, time_budget=args.budget,
+                        download_dir=args.dir or find_download_dir() or os.getcwd())
+    preload_engine(settings.engine)
+    index = VerdictIndex()
+    server = serve(index, args.bind, args.port)
+    host, port = server.server_address[:2]
+    print(f"HTTP 服务：http://{host}:{port}/playlist.m3u | /playlist/<分组>.m3u | /lives.txt | /tvbox.json"
+          f" | /status.json")
+    stop = threading.Event()
+    try:
+        run_rounds(settings, [os.path.abspath(f) for f in args.files], index, args.interval, stop)
+    finally:
+        stop.set()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n已停止监控。")
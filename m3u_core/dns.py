@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+所有工作线程 / 协程共用的 DNS 缓存
+同一主机只解析一次（并发的相同解析等第一个完成），解析失败（如 NXDOMAIN）也缓存一段时间，
+死域名上的几百条 URL 不会每条都再查一次 DNS。
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+
+DNS_TTL = 300             # 解析结果缓存 5 分钟
+NEGATIVE_TTL = 60         # 解析失败缓存 1 分钟
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class DnsCache:
+    def __init__(self, ttl=DNS_TTL, negative_ttl=NEGATIVE_TTL, stats=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._entries = {}        # host -> (过期时间, [(family, ip)] 或 socket.gaierror)
+        self._inflight = {}       # host -> threading.Event / asyncio.Future
+
+    def _count(self, key):
+        if self.stats is not None:
+            self.stats.incr(key)
+
+    def _cached(self, host):
+        entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _answer(self, value):
+        self._count('dns_hit')
+        if isinstance(value, socket.gaierror):
+            raise value
+        return value
+
+    def _store(self, host, infos, error, start):
+        now = time.monotonic()
+        if self.stats is not None:
+            self.stats.incr('dns_miss')
+            self.stats.observe('dns', (now - start) * 1000)
+        if error is not None:
+            self._count('dns_fail')
+            value, expires = error, now + self.negative_ttl
+        else:
+            value = list(dict.fromkeys((info[0], info[4][0]) for info in infos))
+            expires = now + self.ttl
+        self._entries[host] = (expires, value)
+        return value
+
+    def resolve_sync(self, host, port=0):
+        """返回 [(family, ip)]，解析失败抛 socket.gaierror"""
+        if _is_ip(host):
+            return [(socket.AF_INET6 if ':' in host else socket.AF_INET, host)]
+        while True:
+            with self._lock:
+                value = self._cached(host)
+                if value is not None:
+                    return self._answer(value)
+                event = self._inflight.get(host)
+                if event is None:
+                    self._inflight[host] = threading.Event()
+                    break
+            event.wait()
+
+        start = time.monotonic()
+        infos, error = None, None
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            if not infos:
+                raise socket.gaierror(socket.EAI_NONAME, f"{host} 没有可用的地址")
+        except socket.gaierror as e:
+            error = e
+        finally:
+            # 只缓存解析成功和 gaierror；其他异常（无效的 IDNA 主机名、取消、超时）不缓存，照常抛出，
+            # 等待中的相同解析被唤醒后自己重新解析
+            with self._lock:
+                if infos or error is not None:
+                    value = self._store(host, infos, error, start)
+                self._inflight.pop(host).set()
+        if error is not None:
+            raise error
+        return value
+
+    async def resolve_async(self, host, port=0):
+        import asyncio            # 只在 asyncio 引擎中用到
+        if _is_ip(host):
+            return [(socket.AF_INET6 if ':' in host else socket.AF_INET, host)]
+        while True:
+            with self._lock:
+                value = self._cached(host)
+                if value is not None:
+                    return self._answer(value)
+                waiter = self._inflight.get(host)
+                if waiter is None:
+                    self._inflight[host] = asyncio.get_running_loop().create_future()
+                    break
+            await asyncio.shield(waiter)
+
+        start = time.monotonic()
+        infos, error = None, None
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            if not infos:
+                raise socket.gaierror(socket.EAI_NONAME, f"{host} 没有可用的地址")
+        except socket.gaierror as e:
+            error = e
+        finally:
+            # 只缓存解析成功和 gaierror；其他异常（无效的 IDNA 主机名、取消、超时）不缓存，照常抛出，
+            # 等待中的相同解析被唤醒后自己重新解析
+            with self._lock:
+                if infos or error is not None:
+                    value = self._store(host, infos, error, start)
+                self._inflight.pop(host).set_result(None)
+        if error is not None:
+            raise error
+        return value
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio 检测引擎
+单个事件循环里同时保持数百个探测在途，检测逻辑与线程引擎相同（check_steps），
+FFmpeg 进程由独立的媒体协程限制并发。
+主机没空 / 未到发送时间的检测和重试前的退避用 call_later 到点放回 HTTP 队列，不占 HTTP 协程
+依赖 aiohttp：pip install aiohttp
+"""
+
+import asyncio
+import time
+from urllib.parse import urljoin
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
+from .ops import (Exchange, ExchangeResult, Fetch, FetchResult, MediaProbe, MediaResult, Sleep, describe_error,
+                  exchange_timeout_phase, redirect_failed)
+from .pipeline import (FRESH, RESUME, CheckTask, queue_item, record_check, record_depth,
+                       stage_timer, timed)
+from .probe import ProbeResult
+from .redirects import MAX_HOPS, REDIRECT_STATUSES
+from .scheduler import interleave_by_host
+from .urls import host_of
+
+if AIOHTTP_AVAILABLE:
+    from .pool_async import build_client_session, connect_failed, release_async, timeout_phase
+
+
+async def read_upto(stream, n):
+    """读取至多 n 字节（读满或读到 EOF）"""
+    buf = b""
+    while len(buf) < n:
+        chunk = await stream.read(n - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
+async def fetch_async(session, op, stats, timeouts, redirects=None):
+    """timeouts 为 (连接, 读取) 超时秒数；跳转逐跳跟随、正文字节计数，同 engine_thread.fetch_sync"""
+    timeout = aiohttp.ClientTimeout(sock_connect=timeouts[0], sock_read=timeouts[1])
+    url, hops, jumped = op.url, [], []
+    if redirects is not None:
+        url = redirects.resolve(op.url)
+        if url != op.url:
+            jumped.append(op.url)
+    received, resp = 0, None
+    try:
+        with timed(stats, 'ttfb') as ttfb:
+            for _ in range(MAX_HOPS + 1):
+                resp = await session.request(op.method, url, headers=op.headers, timeout=timeout,
+                                             ssl=False, allow_redirects=False)
+                location = resp.headers.get('Location')
+                if resp.status not in REDIRECT_STATUSES or not location or len(hops) >= MAX_HOPS:
+                    break
+                next_url = urljoin(url, location)
+                hops.append((url, resp.status, next_url, resp.headers.get('Cache-Control'),
+                             resp.headers.get('Expires')))
+                received += await release_async(resp)
+                resp.release()
+                url = redirects.resolve(next_url) if redirects is not None else next_url
+                if url != next_url:
+                    jumped.append(next_url)
+        body = b""
+        if resp.status in (200, 206):
+            try:
+                with timed(stats, 'body') as read:
+                    body = await read_upto(resp.content, op.max_bytes)
+            except Exception:
+                pass
+        received += len(body) + await release_async(resp)
+        return FetchResult(resp.status, body, final_url=url, content_type=resp.headers.get('Content-Type'),
+                           timeouts=timeouts, ttfb_ms=ttfb.ms, body_ms=read.ms if body else None,
+                           redirects=tuple(hops), jumped=tuple(jumped))
+    except Exception as e:
+        return FetchResult(error=e, unreachable=connect_failed(e), timeouts=timeouts, redirects=tuple(hops),
+                           jumped=tuple(jumped))
+    finally:
+        # 拿到回应后无论读完、出错还是被取消都要交还连接（release 可重复调用）
+        if resp is not None:
+            resp.release()
+        stats.incr('bytes_in', received)
+
+
+async def connect_async(host, port, timeout, dns):
+    """依次尝试 DNS 缓存中的地址，全部连不上时抛出最后一个错误"""
+    error = None
+    for _, ip in await dns.resolve_async(host, port):
+        try:
+            return await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            error = e
+    raise error
+
+
+async def exchange_async(op, dns, timeouts):
+    connect_timeout, read_timeout = timeouts
+    start = time.monotonic()
+    try:
+        reader, writer = await connect_async(op.host, op.port, connect_timeout, dns)
+    except (OSError, asyncio.TimeoutError) as e:
+        return ExchangeResult(error=e, unreachable=True, timeouts=timeouts)
+    connected = time.monotonic()
+    result = ExchangeResult(timeouts=timeouts, connect_ms=(connected - start) * 1000)
+    try:
+        if op.payload:
+            writer.write(op.payload)
+            await writer.drain()
+        data = b""
+        while len(data) < op.max_bytes and not (op.until and op.until in data):
+            chunk = await asyncio.wait_for(reader.read(op.max_bytes - len(data)), read_timeout)
+            if not chunk:
+                break
+            if not data:
+                result.ttfb_ms = (time.monotonic() - connected) * 1000
+            data += chunk
+        result.data = data
+    except Exception as e:
+        result.error = e
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+    return result
+
+
+async def media_probe_async(op):
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *op.cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    except Exception as e:
+        return MediaResult(error=e)
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), op.timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return MediaResult(timed_out=True)
+    return MediaResult(proc.returncode, stdout.decode('utf-8', errors='ignore'))
+
+
+class AsyncPipeline:
+    def __init__(self, profile, on_result, ctx, session):
+        self.profile = profile
+        self.on_result = on_result
+        self.ctx = ctx
+        self.session = session
+        self.http_queue = asyncio.PriorityQueue()
+        self.media_queue = asyncio.Queue()
+        self.done = asyncio.Event()
+        self.slots = asyncio.Semaphore(ctx.max_pending)
+        self._pending = 0
+        self._feeding = True
+
+    async def feed(self, entries):
+        """边读取（解析）边入队；在途条目达到上限时等待，等检测腾出位置"""
+        try:
+            for n, entry in enumerate(entries, 1):
+                await self.slots.acquire()
+                self._pending += 1
+                self.http_queue.put_nowait(queue_item(CheckTask(entry, self.profile), FRESH))
+                record_depth(self.ctx.stats, 'http', self.http_queue)
+                if n % 100 == 0:
+                    await asyncio.sleep(0)   # 解析是同步代码，定期让出事件循环
+        finally:
+            self._feeding = False
+            if self._pending == 0:
+                self.done.set()
+
+    def complete(self, task, result):
+        try:
+            # 缓存 / 历史写入失败不影响结论，也不能让工作者退出、在途计数卡住
+            self.ctx.finish(task.url, result)
+            record_check(self.ctx.stats, task, result)
+        except Exception as e:
+            print(f"   [记录失败] {task.entry[1]}: {describe_error(e)}")
+        try:
+            self.on_result(*task.entry, result)
+        finally:
+            self.slots.release()
+            self._pending -= 1
+            if self._pending == 0 and not self._feeding:
+                self.done.set()
+
+    def fail(self, task, error):
+        """流水线内部异常：记为失效，避免整个运行卡住"""
+        print(f"   [异常] {task.entry[1]}: {describe_error(error)}")
+        self.complete(task, ProbeResult(reason=describe_error(error)))
+
+    def hand_off(self, task):
+        """检测的下一步交给对应阶段"""
+        if task.op is None:
+            self.complete(task, task.result)
+        elif isinstance(task.op, MediaProbe):
+            self.media_queue.put_nowait(task)
+            record_depth(self.ctx.stats, 'media', self.media_queue)
+        else:
+            self.http_queue.put_nowait(queue_item(task, RESUME))
+            record_depth(self.ctx.stats, 'http', self.http_queue)
+
+    def later(self, seconds, task):
+        """seconds 秒后把 task 放回 HTTP 队列"""
+        asyncio.get_running_loop().call_later(seconds, self.http_queue.put_nowait, queue_item(task, RESUME))
+
+    def acquire(self, task, url):
+        """占用 url 所在主机的在途名额；还不能发时把检测暂存起来并返回 False，HTTP 协程去处理别的主机"""
+        delay = self.ctx.scheduler.try_acquire(host_of(url), task, charge=not task.charged)
+        if delay is None:
+            return False
+        task.charged = True
+        if delay > 0:
+            self.later(delay, task)
+            return False
+        return True
+
+    def release(self, url):
+        waiting = self.ctx.scheduler.release(host_of(url))
+        if waiting is not None:
+            self.http_queue.put_nowait(queue_item(waiting, RESUME))
+
+    # ================== HTTP 阶段 ==================
+    async def http_worker(self):
+        stats = self.ctx.stats
+        while True:
+            _, _, task = await self.http_queue.get()
+            record_depth(stats, 'http', self.http_queue)
+            try:
+                await self.run_http(task)
+            except Exception as e:
+                self.fail(task, e)
+
+    async def fetch(self, op):
+        # 源站拒绝 Range（400 / 405 / 416 / 501）：去掉 Range 重发一次，之后该主机不再带 Range
+        ranged = self.ctx.ranges.prepare(op)
+        result = await self.fetch_redirected(ranged)
+        if ranged is not op and self.ctx.ranges.learn(op.url, result):
+            result = await self.fetch_redirected(op)
+        return result
+
+    async def fetch_redirected(self, op):
+        # 按跳转缓存直达的最终地址失败了：丢掉用过的跳转，从入口重新走一遍
+        result = await self.fetch_once(op, self.ctx.redirects)
+        if result.jumped and redirect_failed(result):
+            self.ctx.redirects.forget(result.jumped)
+            result = await self.fetch_once(op, None)
+        return result
+
+    async def fetch_once(self, op, redirects):
+        blocked = self.ctx.host_blocked(op.url)
+        if blocked is not None:
+            return FetchResult(error=blocked)
+        timeouts = self.ctx.timeouts_for(op.url, op.timeout)
+        with stage_timer(self.ctx.stats, 'http'):
+            result = await fetch_async(self.session, op, self.ctx.stats, timeouts, redirects)
+        self.ctx.host_reached(op.url, result)
+        self.ctx.learn_timeouts(op.url, op.timeout, result, timeout_phase(result.error))
+        self.ctx.redirects.learn(result.redirects)
+        return result
+
+    async def exchange(self, op, url):
+        blocked = self.ctx.host_blocked(url)
+        if blocked is not None:
+            return ExchangeResult(error=blocked)
+        with stage_timer(self.ctx.stats, 'http'):
+            result = await exchange_async(op, self.ctx.dns, self.ctx.timeouts_for(url, op.timeout))
+        self.ctx.host_reached(url, result)
+        self.ctx.learn_timeouts(url, op.timeout, result, exchange_timeout_phase(result))
+        return result
+
+    async def run_http(self, task):
+        if not task.started:
+            cached = self.ctx.cached_result(task.url)
+            if cached is not None:
+                self.complete(task, cached)
+                return
+            task.advance()
+
+        while isinstance(task.op, (Fetch, Exchange, Sleep)):
+            op = task.op
+            if isinstance(op, Sleep):
+                # 重试前的退避：下一步先取出来，到点后再放回 HTTP 队列执行
+                task.advance()
+                self.later(op.seconds, task)
+                return
+            url = task.url if isinstance(op, Exchange) else op.url
+            # 已熔断的主机不占名额，直接得到 HostUnavailable；拿到名额后由 fetch / exchange 再确认一次
+            held = self.ctx.host_blocked(url, claim=False) is None
+            if held and not self.acquire(task, url):
+                return
+            try:
+                if isinstance(op, Exchange):
+                    result = await self.exchange(op, url)
+                elif op.memo:
+                    result = await self.ctx.playlists.get_async(op.url, lambda: self.fetch(op))
+                else:
+                    result = await self.fetch(op)
+            finally:
+                if held:
+                    self.release(url)
+            task.advance(result)
+        self.hand_off(task)
+
+    # ================== 媒体阶段 ==================
+    async def media_worker(self):
+        stats = self.ctx.stats
+        while True:
+            task = await self.media_queue.get()
+            record_depth(stats, 'media', self.media_queue)
+            try:
+                await self.run_media(task)
+            except Exception as e:
+                self.fail(task, e)
+
+    async def run_media(self, task):
+        # 媒体阶段只受 media_workers 限制，不占主机的 HTTP 名额（速率在检测开始联网时已计过）
+        with stage_timer(self.ctx.stats, 'media'):
+            result = await media_probe_async(task.op)
+        task.advance(result)
+        self.hand_off(task)
+
+
+async def _run(entries, profile, on_result, ctx):
+    # 所有协程共用一个连接池
+    async with build_client_session(ctx) as session:
+        pipeline = AsyncPipeline(profile, on_result, ctx, session)
+
+        feeder = asyncio.create_task(pipeline.feed(interleave_by_host(entries)))
+        workers = [asyncio.create_task(pipeline.http_worker())
+                   for _ in range(ctx.concurrency)]
+        workers += [asyncio.create_task(pipeline.media_worker())
+                    for _ in range(ctx.media_workers)]
+        try:
+            await pipeline.done.wait()
+            await feeder          # 读取输入时的异常在这里抛出
+        finally:
+            feeder.cancel()
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+def run_async(entries, profile, on_result, ctx):
+    if not AIOHTTP_AVAILABLE:
+        raise RuntimeError("asyncio 引擎需要 aiohttp：pip install aiohttp")
+    asyncio.run(_run(entries, profile, on_result, ctx))
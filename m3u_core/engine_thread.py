@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+多线程检测引擎（v7.x / v8.x 原有模式）
+HTTP 线程阻塞执行 requests 请求，FFmpeg 进程由独立的媒体线程池运行。
+主机没空 / 未到发送时间的检测和重试前的退避都放进延迟队列，由延迟线程到点放回 HTTP 队列，不占 HTTP 线程
+"""
+
+import heapq
+import queue
+import socket
+import subprocess
+import threading
+import time
+from urllib.parse import urljoin
+
+from .ops import (Exchange, ExchangeResult, Fetch, FetchResult, MediaProbe, MediaResult, Sleep, describe_error,
+                  exchange_timeout_phase, redirect_failed)
+from .pipeline import (FRESH, RESUME, CheckTask, queue_item, record_check, record_depth,
+                       stage_timer, timed)
+from .pool import build_session, connect_failed, release_sync, timeout_phase
+from .probe import ProbeResult
+from .redirects import MAX_HOPS, REDIRECT_STATUSES
+from .scheduler import interleave_by_host
+from .urls import host_of
+
+
+def fetch_sync(session, op, stats, timeouts, redirects=None):
+    """
+    timeouts 为 (连接, 读取) 超时秒数。跳转逐跳跟随：每一跳记入 FetchResult.redirects，
+    下一跳地址在跳转缓存（redirects）里有记录时直接跳到缓存的最终地址。
+    读到的正文字节数（含为复用连接读完的剩余内容）计入 stats 的 bytes_in
+    """
+    url, hops, jumped = op.url, [], []
+    if redirects is not None:
+        url = redirects.resolve(op.url)
+        if url != op.url:
+            jumped.append(op.url)
+    resp, received = None, 0
+    try:
+        with timed(stats, 'ttfb') as ttfb:
+            for _ in range(MAX_HOPS + 1):
+                resp = session.request(op.method, url, timeout=timeouts, stream=True, verify=False,
+                                       headers=op.headers, allow_redirects=False)
+                location = resp.headers.get('Location')
+                if resp.status_code not in REDIRECT_STATUSES or not location or len(hops) >= MAX_HOPS:
+                    break
+                next_url = urljoin(url, location)
+                hops.append((url, resp.status_code, next_url, resp.headers.get('Cache-Control'),
+                             resp.headers.get('Expires')))
+                received += release_sync(resp)
+                resp = None
+                url = redirects.resolve(next_url) if redirects is not None else next_url
+                if url != next_url:
+                    jumped.append(next_url)
+        body = b""
+        if resp.status_code in (200, 206):
+            try:
+                with timed(stats, 'body') as read:
+                    body = resp.raw.read(op.max_bytes, decode_content=True)
+            except Exception:
+                pass
+        received += len(body)
+        return FetchResult(resp.status_code, body, final_url=url, content_type=resp.headers.get('Content-Type'),
+                           timeouts=timeouts, ttfb_ms=ttfb.ms, body_ms=read.ms if body else None,
+                           redirects=tuple(hops), jumped=tuple(jumped))
+    except Exception as e:
+        return FetchResult(error=e, unreachable=connect_failed(e), timeouts=timeouts, redirects=tuple(hops),
+                           jumped=tuple(jumped))
+    finally:
+        if resp is not None:
+            received += release_sync(resp)
+        stats.incr('bytes_in', received)
+
+
+def connect_sync(host, port, timeout, dns):
+    """依次尝试 DNS 缓存中的地址，全部连不上时抛出最后一个错误"""
+    error = None
+    for _, ip in dns.resolve_sync(host, port):
+        try:
+            return socket.create_connection((ip, port), timeout=timeout)
+        except OSError as e:
+            error = e
+    raise error
+
+
+def exchange_sync(op, dns, timeouts):
+    connect_timeout, read_timeout = timeouts
+    start = time.monotonic()
+    try:
+        sock = connect_sync(op.host, op.port, connect_timeout, dns)
+    except OSError as e:
+        return ExchangeResult(error=e, unreachable=True, timeouts=timeouts)
+    connected = time.monotonic()
+    result = ExchangeResult(timeouts=timeouts, connect_ms=(connected - start) * 1000)
+    try:
+        with sock:
+            sock.settimeout(read_timeout)
+            if op.payload:
+                sock.sendall(op.payload)
+            data = b""
+            while len(data) < op.max_bytes and not (op.until and op.until in data):
+                chunk = sock.recv(op.max_bytes - len(data))
+                if not chunk:
+                    break
+                if not data:
+                    result.ttfb_ms = (time.monotonic() - connected) * 1000
+                data += chunk
+            result.data = data
+    except Exception as e:
+        result.error = e
+    return result
+
+
+def media_probe_sync(op):
+    try:
+        result = subprocess.run(op.cmd, capture_output=True, text=True, timeout=op.timeout)
+        return MediaResult(result.returncode, result.stdout)
+    except subprocess.TimeoutExpired:
+        return MediaResult(timed_out=True)
+    except Exception as e:
+        return MediaResult(error=e)
+
+
+class ThreadPipeline:
+    def __init__(self, profile, on_result, ctx, session):
+        self.profile = profile
+        self.on_result = on_result
+        self.ctx = ctx
+        self.session = session
+        self.http_queue = queue.PriorityQueue()
+        self.media_queue = queue.Queue()
+        self.done = threading.Event()
+        self.slots = threading.BoundedSemaphore(ctx.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._feeding = True
+        self._delayed = []        # (到期时刻, 队列项)，堆
+        self._delay_wake = threading.Condition()
+
+    def feed(self, entries):
+        """边读取（解析）边入队；在途条目达到上限时阻塞，等检测腾出位置"""
+        try:
+            for entry in entries:
+                self.slots.acquire()
+                with self._lock:
+                    self._pending += 1
+                self.http_queue.put(queue_item(CheckTask(entry, self.profile), FRESH))
+                record_depth(self.ctx.stats, 'http', self.http_queue)
+        finally:
+            with self._lock:
+                self._feeding = False
+                if self._pending == 0:
+                    self.done.set()
+
+    def complete(self, task, result):
+        try:
+            # 缓存 / 历史写入失败不影响结论，也不能让工作者退出、在途计数卡住
+            self.ctx.finish(task.url, result)
+            record_check(self.ctx.stats, task, result)
+        except Exception as e:
+            print(f"   [记录失败] {task.entry[1]}: {describe_error(e)}")
+        try:
+            self.on_result(*task.entry, result)
+        finally:
+            self.slots.release()
+            with self._lock:
+                self._pending -= 1
+                if self._pending == 0 and not self._feeding:
+                    self.done.set()
+
+    def fail(self, task, error):
+        """流水线内部异常：记为失效，避免整个运行卡住"""
+        print(f"   [异常] {task.entry[1]}: {describe_error(error)}")
+        self.complete(task, ProbeResult(reason=describe_error(error)))
+
+    def hand_off(self, task):
+        """检测的下一步交给对应阶段"""
+        if task.op is None:
+            self.complete(task, task.result)
+        elif isinstance(task.op, MediaProbe):
+            self.media_queue.put(task)
+            record_depth(self.ctx.stats, 'media', self.media_queue)
+        else:
+            self.http_queue.put(queue_item(task, RESUME))
+            record_depth(self.ctx.stats, 'http', self.http_queue)
+
+    def later(self, seconds, task):
+        """seconds 秒后把 task 放回 HTTP 队列"""
+        with self._delay_wake:
+            heapq.heappush(self._delayed, (time.monotonic() + seconds, queue_item(task, RESUME)))
+            self._delay_wake.notify()
+
+    def delay_worker(self):
+        while not self.done.is_set():
+            with self._delay_wake:
+                now = time.monotonic()
+                due = []
+                while self._delayed and self._delayed[0][0] <= now:
+                    due.append(heapq.heappop(self._delayed)[1])
+                if not due:
+                    self._delay_wake.wait(min(self._delayed[0][0] - now, 0.2) if self._delayed else 0.2)
+                    continue
+            for item in due:
+                self.http_queue.put(item)
+            record_depth(self.ctx.stats, 'http', self.http_queue)
+
+    def acquire(self, task, url):
+        """占用 url 所在主机的在途名额；还不能发时把检测暂存起来并返回 False，HTTP 线程去处理别的主机"""
+        delay = self.ctx.scheduler.try_acquire(host_of(url), task, charge=not task.charged)
+        if delay is None:
+            return False
+        task.charged = True
+        if delay > 0:
+            self.later(delay, task)
+            return False
+        return True
+
+    def release(self, url):
+        waiting = self.ctx.scheduler.release(host_of(url))
+        if waiting is not None:
+            self.http_queue.put(queue_item(waiting, RESUME))
+
+    # ================== HTTP 阶段 ==================
+    def http_worker(self):
+        stats = self.ctx.stats
+        while not self.done.is_set():
+            try:
+                _, _, task = self.http_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            record_depth(stats, 'http', self.http_queue)
+            try:
+                self.run_http(task)
+            except Exception as e:
+                self.fail(task, e)
+
+    def fetch(self, op):
+        # 源站拒绝 Range（400 / 405 / 416 / 501）：去掉 Range 重发一次，之后该主机不再带 Range
+        ranged = self.ctx.ranges.prepare(op)
+        result = self.fetch_redirected(ranged)
+        if ranged is not op and self.ctx.ranges.learn(op.url, result):
+            result = self.fetch_redirected(op)
+        return result
+
+    def fetch_redirected(self, op):
+        # 按跳转缓存直达的最终地址失败了：丢掉用过的跳转，从入口重新走一遍
+        result = self.fetch_once(op, self.ctx.redirects)
+        if result.jumped and redirect_failed(result):
+            self.ctx.redirects.forget(result.jumped)
+            result = self.fetch_once(op, None)
+        return result
+
+    def fetch_once(self, op, redirects):
+        blocked = self.ctx.host_blocked(op.url)
+        if blocked is not None:
+            return FetchResult(error=blocked)
+        with stage_timer(self.ctx.stats, 'http'):
+            timeouts = self.ctx.timeouts_for(op.url, op.timeout)
+            result = fetch_sync(self.session, op, self.ctx.stats, timeouts, redirects)
+        self.ctx.host_reached(op.url, result)
+        self.ctx.learn_timeouts(op.url, op.timeout, result, timeout_phase(result.error))
+        self.ctx.redirects.learn(result.redirects)
+        return result
+
+    def exchange(self, op, url):
+        blocked = self.ctx.host_blocked(url)
+        if blocked is not None:
+            return ExchangeResult(error=blocked)
+        with stage_timer(self.ctx.stats, 'http'):
+            result = exchange_sync(op, self.ctx.dns, self.ctx.timeouts_for(url, op.timeout))
+        self.ctx.host_reached(url, result)
+        self.ctx.learn_timeouts(url, op.timeout, result, exchange_timeout_phase(result))
+        return result
+
+    def run_http(self, task):
+        if not task.started:
+            cached = self.ctx.cached_result(task.url)
+            if cached is not None:
+                self.complete(task, cached)
+                return
+            task.advance()
+
+        while isinstance(task.op, (Fetch, Exchange, Sleep)):
+            op = task.op
+            if isinstance(op, Sleep):
+                # 重试前的退避：下一步先取出来，到点后再放回 HTTP 队列执行
+                task.advance()
+                self.later(op.seconds, task)
+                return
+            url = task.url if isinstance(op, Exchange) else op.url
+            # 已熔断的主机不占名额，直接得到 HostUnavailable；拿到名额后由 fetch / exchange 再确认一次
+            held = self.ctx.host_blocked(url, claim=False) is None
+            if held and not self.acquire(task, url):
+                return
+            try:
+                if isinstance(op, Exchange):
+                    result = self.exchange(op, url)
+                elif op.memo:
+                    result = self.ctx.playlists.get_sync(op.url, lambda: self.fetch(op))
+                else:
+                    result = self.fetch(op)
+            finally:
+                if held:
+                    self.release(url)
+            task.advance(result)
+        self.hand_off(task)
+
+    # ================== 媒体阶段 ==================
+    def media_worker(self):
+        stats = self.ctx.stats
+        while not self.done.is_set():
+            try:
+                task = self.media_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            record_depth(stats, 'media', self.media_queue)
+            try:
+                self.run_media(task)
+            except Exception as e:
+                self.fail(task, e)
+
+    def run_media(self, task):
+        # 媒体阶段只受 media_workers 限制，不占主机的 HTTP 名额（速率在检测开始联网时已计过）
+        with stage_timer(self.ctx.stats, 'media'):
+            result = media_probe_sync(task.op)
+        task.advance(result)
+        self.hand_off(task)
+
+
+def run_threaded(entries, profile, on_result, ctx):
+    # 所有线程共用一个 Session，连接按主机复用
+    session = build_session(ctx)
+    pipeline = ThreadPipeline(profile, on_result, ctx, session)
+    feeder = threading.Thread(target=pipeline.feed, args=(interleave_by_host(entries),), daemon=True)
+
+    workers = [feeder, threading.Thread(target=pipeline.delay_worker, daemon=True)]
+    workers += [threading.Thread(target=pipeline.http_worker, daemon=True)
+                for _ in range(ctx.threads)]
+    workers += [threading.Thread(target=pipeline.media_worker, daemon=True)
+                for _ in range(ctx.media_workers)]
+    for t in workers: t.start()
+    for t in workers: t.join()
+    session.close()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+检测历史（SQLite）：每次联网检测的结论都追加到 history 表，url_stats 表按 URL 汇总
+（检测次数、结论翻转次数、当前结论连续出现的次数、上次结论），用来安排下一次检测的先后：
+  1. 新条目（从没检测过）
+  2. 最近翻转过的（当前结论连续出现不到 RECENT_FLIP 次）
+  3. 其余按结论改变的估计概率从高到低：翻转率高、距上次检测久的在前，长期稳定的排在最后
+设置了时间预算时，按这个顺序检测；预算用完后还没开始检测的沿用上次的结论（新条目没有结论，照常检测）。
+"""
+
+import sqlite3
+import threading
+import time
+
+from .probe import ProbeResult
+from .urls import normalize_url
+
+COMMIT_EVERY = 200
+KEEP_DAYS = 90            # history 表保留的天数（url_stats 的汇总不受影响）
+RECENT_FLIP = 3
+DAY = 86400
+NEW, FLIPPED, STABLE = 0, 1, 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    url        TEXT NOT NULL,
+    ok         INTEGER NOT NULL,
+    status     INTEGER,
+    method     TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_url ON history (url, checked_at);
+CREATE TABLE IF NOT EXISTS url_stats (
+    url          TEXT PRIMARY KEY,
+    first_seen   REAL NOT NULL,
+    checks       INTEGER NOT NULL,
+    flips        INTEGER NOT NULL,
+    streak       INTEGER NOT NULL,
+    last_ok      INTEGER NOT NULL,
+    last_status  INTEGER,
+    last_method  TEXT NOT NULL,
+    last_reason  TEXT NOT NULL DEFAULT '',
+    last_checked REAL NOT NULL
+);
+"""
+
+
+def change_probability(checks, flips, last_checked, now):
+    """
+    下次检测结论与上次不同的估计概率：每次检测的翻转率（拉普拉斯平滑，检测次数少时偏向 1/2）
+    按每天检测一次折算到距上次检测的天数
+    """
+    rate = (flips + 1) / (checks + 2)
+    periods = 1 + max(now - last_checked, 0) / DAY
+    return 1 - (1 - rate) ** periods
+
+
+def priority(row, now):
+    """排序键（小的先检测）；row 为 url_stats 中的 (checks, flips, streak, last_checked)，None 为新条目"""
+    if row is None:
+        return NEW, 0.0
+    checks, flips, streak, last_checked = row
+    tier = FLIPPED if flips and streak < RECENT_FLIP else STABLE
+    return tier, -change_probability(checks, flips, last_checked, now)
+
+
+class ResultHistory:
+    def __init__(self, path, stats=None, readonly=False):
+        self.path = path
+        self.readonly = readonly      # 只读：record / close 不写库（多进程检测的子进程，结论由父进程统一写）
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._pending = 0
+        # 线程模式多线程共用一个连接，由 _lock 串行化；多进程检测时子进程各开一个只读连接
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if readonly:
+            return
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def _count(self, key, n=1):
+        if self.stats is not None:
+            self.stats.incr(key, n)
+
+    def record(self, url, result):
+        """记下一次联网检测的结论（缓存 / 日志 / 历史沿用的不算）"""
+        if result.cached or self.readonly:
+            return
+        key = normalize_url(url)
+        checked_at = result.checked_at or time.time()
+        ok = int(result.ok)
+        with self._lock:
+            self._db.execute("INSERT INTO history (url, ok, status, method, checked_at) VALUES (?, ?, ?, ?, ?)",
+                             (key, ok, result.status, result.method, checked_at))
+            row = self._db.execute("SELECT last_ok FROM url_stats WHERE url = ?", (key,)).fetchone()
+            if row is None:
+                self._db.execute(
+                    "INSERT INTO url_stats (url, first_seen, checks, flips, streak, last_ok, last_status, "
+                    "last_method, last_reason, last_checked) VALUES (?, ?, 1, 0, 1, ?, ?, ?, ?, ?)",
+                    (key, checked_at, ok, result.status, result.method, result.reason, checked_at))
+            else:
+                flipped = int(row[0] != ok)
+                self._db.execute(
+                    "UPDATE url_stats SET checks = checks + 1, flips = flips + ?, "
+                    "streak = CASE WHEN ? THEN 1 ELSE streak + 1 END, last_ok = ?, last_status = ?, "
+                    "last_method = ?, last_reason = ?, last_checked = ? WHERE url = ?",
+                    (flipped, flipped, ok, result.status, result.method, result.reason, checked_at, key))
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def order(self, entries):
+        """按 priority 排好 entries 后逐条放行（需要先读完全部条目）"""
+        now = time.time()
+        with self._lock:
+            known = {row[0]: row[1:] for row in self._db.execute(
+                "SELECT url, checks, flips, streak, last_checked FROM url_stats")}
+        ordered = [(priority(known.get(normalize_url(entry[2])), now), n, entry)
+                   for n, entry in enumerate(entries)]
+        del known
+        ordered.sort(key=lambda item: item[:2])
+        self._count('history_scheduled', len(ordered))
+        for _, _, entry in ordered:
+            yield entry
+
+    def last_result(self, url):
+        """上次检测的结论 ProbeResult(cached=True)，从没检测过返回 None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT last_ok, last_status, last_method, last_reason, last_checked FROM url_stats WHERE url = ?",
+                (normalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        self._count('history_deferred')
+        ok, status, method, reason, checked_at = row
+        return ProbeResult(bool(ok), status, method, reason, cached=True, checked_at=checked_at)
+
+    def close(self):
+        with self._lock:
+            if not self.readonly:
+                self._db.execute("DELETE FROM history WHERE checked_at < ?", (time.time() - KEEP_DAYS * DAY,))
+                self._db.commit()
+            self._db.close()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+原生 HLS 校验（纯 Python，不启动 FFmpeg）
+master playlist → 选一个 variant（相对 URI 按播放列表地址解析）→ 取 media playlist →
+对一个分片发一个小的 Range 请求，确认真的能下载。
+抓取的播放列表在本次运行内缓存（Fetch.memo），多个频道共用的 variant 只抓一次；
+直播的 media playlist 窗口一直在滚动，只缓存一个目标时长（见 memo_ttl）。
+"""
+
+import re
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
+
+from .ops import Fetch
+
+PLAYLIST_BYTES = 256 * 1024
+SEGMENT_BYTES = 1024
+MAX_DEPTH = 2             # master 嵌套 master 时最多再跟一层
+LIVE_TTL = 6.0            # 没有 EXT-X-TARGETDURATION 的直播列表缓存多久（秒）
+
+_TARGET_DURATION = re.compile(rb'#EXT-X-TARGETDURATION:\s*(\d+(?:\.\d+)?)')
+
+
+@dataclass
+class Playlist:
+    kind: str = None                                 # 'master' | 'media' | None（不是播放列表）
+    variants: list = field(default_factory=list)     # [(bandwidth, url)]
+    segments: list = field(default_factory=list)     # [url]
+    init_url: str = None                             # EXT-X-MAP 初始化分片
+    endlist: bool = False                            # 点播（有 EXT-X-ENDLIST）
+
+
+def _attr(line, name):
+    """从 #EXT-X-...: 属性列表中取值，如 BANDWIDTH=800000 / URI="init.mp4" """
+    key = f'{name}='
+    pos = line.find(key)
+    while pos > 0 and line[pos - 1] not in ':,':
+        pos = line.find(key, pos + 1)
+    if pos < 0:
+        return None
+    value = line[pos + len(key):]
+    if value.startswith('"'):
+        return value[1:].split('"', 1)[0]
+    return value.split(',', 1)[0]
+
+
+def parse_playlist(text, base_url, truncated=False):
+    """解析 m3u8 文本；truncated 表示只读到了前一部分，最后一行可能不完整"""
+    lines = text.splitlines()
+    if truncated and lines:
+        lines = lines[:-1]
+    pl = Playlist()
+    if not lines or not lines[0].lstrip('\ufeff').strip().startswith('#EXTM3U'):
+        return pl
+
+    pending = None        # 'variant' | 'segment'
+    bandwidth = 0
+    for raw in lines[1:]:
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            if line.startswith('#EXT-X-STREAM-INF'):
+                pending = 'variant'
+                try:
+                    bandwidth = int(_attr(line, 'BANDWIDTH') or 0)
+                except ValueError:
+                    bandwidth = 0
+            elif line.startswith('#EXTINF'):
+                pending = 'segment'
+            elif line.startswith('#EXT-X-MAP'):
+                uri = _attr(line, 'URI')
+                if uri:
+                    pl.init_url = urljoin(base_url, uri)
+            elif line.startswith('#EXT-X-ENDLIST'):
+                pl.endlist = True
+            continue
+        if pending == 'variant':
+            pl.variants.append((bandwidth, urljoin(base_url, line)))
+        elif pending == 'segment':
+            pl.segments.append(urljoin(base_url, line))
+        pending = None
+
+    if pl.variants:
+        pl.kind = 'master'
+    elif pl.segments or pl.init_url:
+        pl.kind = 'media'
+    return pl
+
+
+def looks_like_media(chunk):
+    """分片开头不能是 HTML / 文本错误页（更细的格式判断见内容嗅探）"""
+    head = chunk[:64].lstrip().lower()
+    return bool(chunk) and not head.startswith((b'<', b'{', b'#extm3u'))
+
+
+def memo_ttl(resp):
+    """
+    抓到的播放列表（FetchResult）在本次运行内缓存多久：master 和点播（EXT-X-ENDLIST）整次运行有效，
+    直播的 media playlist 只在一个目标时长内有效，之后的频道重新抓，不去探测已经滚出窗口的分片
+    """
+    body = resp.body or b''
+    if b'#EXT-X-STREAM-INF' in body or b'#EXT-X-ENDLIST' in body or b'#EXTINF' not in body:
+        return None
+    m = _TARGET_DURATION.search(body)
+    return float(m.group(1)) if m else LIVE_TTL
+
+
+def pick_segment(pl):
+    """点播取第一个分片；直播取最新的分片（滑动窗口开头的分片可能已被 CDN 删除）"""
+    if pl.segments:
+        return pl.segments[0] if pl.endlist else pl.segments[-1]
+    return pl.init_url
+
+
+def hls_steps(url, body, headers, timeout, truncated=False, segment_bytes=SEGMENT_BYTES):
+    """
+    校验一个已拿到开头内容的 HLS 播放列表，return (ok, reason, segment)。
+    url 为播放列表的最终地址（重定向之后），用于解析相对 URI。
+    segment 为分片请求的 FetchResult（没请求分片时为 None）；测速时 segment_bytes 取大一些。
+    """
+    pl = parse_playlist(body.decode('utf-8', errors='ignore'), url, truncated)
+    for _ in range(MAX_DEPTH):
+        if pl.kind != 'master':
+            break
+        # 选码率最低的 variant，少传数据
+        variant = min(pl.variants)[1]
+        resp = yield Fetch(variant, dict(headers), timeout, PLAYLIST_BYTES, memo=True)
+        if resp.error is not None or resp.status != 200:
+            return False, f"variant 播放列表不可用（{resp.status or '连接失败'}）", None
+        pl = parse_playlist(resp.body.decode('utf-8', errors='ignore'), resp.final_url or variant,
+                            truncated=len(resp.body) >= PLAYLIST_BYTES)
+
+    segment = pick_segment(pl) if pl.kind == 'media' else None
+    if not segment:
+        return False, "播放列表中没有分片", None
+
+    seg_headers = dict(headers, Range=f'bytes=0-{segment_bytes - 1}')
+    resp = yield Fetch(segment, seg_headers, timeout, segment_bytes)
+    if resp.error is not None or resp.status not in (200, 206):
+        return False, f"分片不可用（{resp.status or '连接失败'}）", resp
+    if not looks_like_media(resp.body):
+        return False, "分片内容不是媒体数据", resp
+    return True, '', resp
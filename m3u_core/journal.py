@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+检测结果日志（JSON Lines）：每出一个结论就追加一行，运行中断也不会丢失已完成的检测。
+重新运行时读取日志，已有结论的 URL 不再探测；_有效 / _失效 文件最后由日志生成。
+"""
+
+import json
+import os
+import threading
+import time
+
+from .probe import ProbeResult
+from .urls import normalize_url
+
+FSYNC_EVERY = 50          # 每写入多少条结论同步一次磁盘（手机突然断电也最多丢这么多）
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+class ResultJournal:
+    """
+    第一行记录本次检测的输入文件；resume=True 且输入文件相同时接着上次的日志写，
+    否则清空重来
+    """
+
+    def __init__(self, path, sources=(), resume=True, stats=None):
+        self.path = path
+        self.sources = [os.path.abspath(p) for p in sources]
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._done = set()       # 日志中已有的 (group, title, url)
+        self._verdicts = {}      # 规范化 URL -> 日志中的结论
+        self.resumed = resume and self._load()
+        if self.resumed:
+            self._file = open(path, 'a', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+            self._write({'sources': self.sources, 'started': time.time()})
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('sources') != self.sources:
+                    return False
+                for group, title, url, result in self._records(f):
+                    self._done.add((group, title, url))
+                    self._verdicts[normalize_url(url)] = result
+            # 上次中断时最后一行可能只写了一半，补一个换行，不影响之后追加的记录
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        with open(self.path, 'a', encoding='utf-8') as out:
+                            out.write('\n')
+        except (OSError, ValueError):
+            return False
+        return True
+
+    @staticmethod
+    def _records(lines):
+        for line in lines:
+            try:
+                rec = json.loads(line)
+                timeouts = rec.get('timeouts')
+                result = ProbeResult(rec['ok'], rec.get('status'), rec.get('method', 'http'),
+                                     rec.get('reason', ''), checked_at=rec.get('at'),
+                                     timeouts=tuple(timeouts) if timeouts else None,
+                                     ttfb_ms=rec.get('ttfb_ms'), throughput=rec.get('bps'),
+                                     final_url=rec.get('final'))
+                yield rec['group'], rec['title'], rec['url'], result
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def _write(self, rec):
+        self._file.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    @property
+    def resumed_count(self):
+        return len(self._done)
+
+    def record(self, group, title, url, result):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write({'group': group, 'title': title, 'url': url, 'ok': result.ok,
+                         'status': result.status, 'method': result.method,
+                         'reason': result.reason, 'at': result.checked_at, 'timeouts': result.timeouts,
+                         'ttfb_ms': _round(result.ttfb_ms), 'bps': _round(result.throughput),
+                         'final': result.final_url})
+            self._unsynced += 1
+            if self._unsynced >= FSYNC_EVERY:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def filter(self, entries, on_result):
+        """跳过日志中已有结论的 URL：结论直接交给 on_result，只放行还没检测的条目"""
+        for entry in entries:
+            result = self._verdicts.get(normalize_url(entry[2]))
+            if result is None:
+                yield entry
+                continue
+            if self.stats is not None:
+                self.stats.incr('resumed')
+            if tuple(entry) not in self._done:
+                # URL 检测过，但这一条（另一分组 / 名称）还没记下
+                self.record(*entry, result)
+            on_result(*entry, ProbeResult(result.ok, result.status, result.method, result.reason,
+                                          cached=True, checked_at=result.checked_at, final_url=result.final_url))
+
+    def recorder(self, on_result):
+        """包装 on_result：先写日志再回调"""
+        def record_then_report(group, title, url, result):
+            self.record(group, title, url, result)
+            on_result(group, title, url, result)
+        return record_then_report
+
+    def results(self):
+        """按写入顺序返回日志中的全部结论 (group, title, url, ProbeResult)，同一条目只取一次"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+        seen = set()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            f.readline()
+            for group, title, url, result in self._records(f):
+                if (group, title, url) in seen:
+                    continue
+                seen.add((group, title, url))
+                yield group, title, url, result
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def complete(self):
+        """整次检测正常结束：删除日志，下次运行从头开始"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+单次运行内的请求结果缓存：同一 URL 只请求一次，并发的相同请求等待第一个完成后共用结果。
+ttl_of 按结果给出有效秒数（如直播播放列表只在一个目标时长内有效），None 为整次运行有效
+"""
+
+import threading
+import time
+
+
+class RunMemo:
+    def __init__(self, stats=None, name='memo', ttl_of=None):
+        self.stats = stats
+        self.name = name
+        self.ttl_of = ttl_of      # 结果 -> 有效秒数（None 整次运行有效，<= 0 不缓存）
+        self._lock = threading.Lock()
+        self._done = {}           # key -> (结果, 过期时刻 time.monotonic() 或 None)
+        self._inflight = {}
+
+    def _count(self, suffix):
+        if self.stats is not None:
+            self.stats.incr(f'{self.name}_{suffix}')
+
+    def _lookup(self, key):
+        """仍然有效的结果（调用方持有 _lock），过期的顺手删掉"""
+        entry = self._done.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._done[key]
+            self._count('expired')
+            return None
+        return value
+
+    def _claim(self, key, event_factory):
+        """返回 (已有结果, 需要等待的事件, 是否由自己请求)"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value, None, False
+            event = self._inflight.get(key)
+            if event is not None:
+                return None, event, False
+            self._inflight[key] = event_factory()
+            return None, None, True
+
+    def _store(self, key, value):
+        ttl = self.ttl_of(value) if value is not None and self.ttl_of is not None else None
+        with self._lock:
+            if value is not None and (ttl is None or ttl > 0):
+                self._done[key] = (value, None if ttl is None else time.monotonic() + ttl)
+            return self._inflight.pop(key)
+
+    def get_sync(self, key, compute):
+        value, event, owner = self._claim(key, threading.Event)
+        if not owner and event is None:
+            self._count('hit')
+            return value
+        if event is not None:
+            event.wait()
+            with self._lock:
+                value = self._lookup(key)
+            if value is not None:
+                self._count('hit')
+                return value
+            return compute()
+        self._count('miss')
+        value = None
+        try:
+            value = compute()
+            return value
+        finally:
+            self._store(key, value).set()
+
+    async def get_async(self, key, compute):
+        import asyncio            # 只在 asyncio 引擎中用到，不在导入时加载
+        value, event, owner = self._claim(key, asyncio.Event)
+        if not owner and event is None:
+            self._count('hit')
+            return value
+        if event is not None:
+            await event.wait()
+            with self._lock:
+                value = self._lookup(key)
+            if value is not None:
+                self._count('hit')
+                return value
+            return await compute()
+        self._count('miss')
+        value = None
+        try:
+            value = await compute()
+            return value
+        finally:
+            self._store(key, value).set()
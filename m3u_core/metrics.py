@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+延迟直方图与实时速率（由 RunStats 持有，按事件更新，不保存原始样本）
+直方图按对数分桶，内存固定；分位数取所在桶的上界，误差不超过一个桶宽（约 15%）
+"""
+
+import bisect
+import math
+import time
+from collections import deque
+
+BUCKET_MIN_MS = 0.5
+BUCKET_GROWTH = 1.15
+BUCKET_COUNT = 110        # 0.5ms × 1.15^110 ≈ 2000s，足够覆盖最长的 FFmpeg 超时
+BOUNDS = [BUCKET_MIN_MS * BUCKET_GROWTH ** i for i in range(BUCKET_COUNT)]
+
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (BUCKET_COUNT + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.buckets[bisect.bisect_left(BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(BOUNDS[i], self.max) if i < BUCKET_COUNT else self.max
+        return self.max
+
+    def state(self):
+        """原始数据（可序列化，用于把其他进程的直方图合并进来）"""
+        return {'buckets': list(self.buckets), 'count': self.count, 'total': self.total, 'max': self.max}
+
+    def merge(self, state):
+        for i, n in enumerate(state['buckets']):
+            self.buckets[i] += n
+        self.count += state['count']
+        self.total += state['total']
+        self.max = max(self.max, state['max'])
+
+    def to_dict(self):
+        d = {'count': self.count,
+             'mean_ms': round(self.total / self.count, 1) if self.count else 0.0,
+             'max_ms': round(self.max, 1)}
+        for p in PERCENTILES:
+            d[f'p{p}_ms'] = round(self.percentile(p), 1)
+        return d
+
+
+class RateMeter:
+    """最近 window 秒内每秒的事件数"""
+
+    def __init__(self, window=10):
+        self.window = window
+        self.started = time.monotonic()
+        self._slots = deque()     # [整秒, 次数]
+
+    def mark(self, n=1, now=None):
+        sec = int(now or time.monotonic())
+        if self._slots and self._slots[-1][0] == sec:
+            self._slots[-1][1] += n
+        else:
+            self._slots.append([sec, n])
+        while self._slots and self._slots[0][0] <= sec - self.window:
+            self._slots.popleft()
+
+    def rate(self, now=None):
+        now = now or time.monotonic()
+        cutoff = int(now) - self.window
+        events = sum(n for sec, n in self._slots if sec > cutoff)
+        span = min(self.window, now - self.started)
+        return events / span if span > 0 else 0.0
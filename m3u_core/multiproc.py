@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+多进程检测：父进程解析输入、分发条目、汇总结论，每个子进程运行自己的检测引擎（线程或 asyncio），
+FFmpeg 输出解析、分片解码、打印等不再挤在同一个 GIL 里。
+条目按主机（主机名 + 端口）分给进程，同一主机只在一个进程里探测：每主机的限速 / 并发上限、
+熔断、自适应超时和 URL 去重与单进程时完全相同；新出现的主机交给目前分到条目最少的进程。
+结论全部回到父进程，由父进程写结果日志、结果缓存和检测历史（子进程只读，SQLite 同时只能有一个写者），
+输出文件与单进程检测相同。
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+
+from . import run_checks
+from .ops import describe_error
+from .urls import endpoint_of
+
+BATCH = 64                # 每次发给子进程的条目数
+QUEUE_BATCHES = 8         # 每个子进程最多积压的批次（背压：子进程忙时父进程暂停分发）
+STATS_EVERY = 1.0         # 子进程上报统计的间隔（秒）
+
+
+def default_processes():
+    return multiprocessing.cpu_count() or 1
+
+
+# ================== 子进程 ==================
+def _worker(index, make_context, profile, inbox, outbox):
+    ctx = make_context()
+    lock = threading.Lock()
+    reported = [time.monotonic()]
+
+    def entries():
+        while True:
+            batch = inbox.get()
+            if batch is None:
+                return
+            yield from batch
+
+    def on_result(group, title, url, result):
+        outbox.put(('result', (group, title, url, result)))
+        now = time.monotonic()
+        with lock:
+            due = now - reported[0] >= STATS_EVERY
+            if due:
+                reported[0] = now
+        if due:
+            outbox.put(('stats', index, ctx.stats.state()))
+
+    try:
+        run_checks(entries(), profile, on_result, ctx)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if ctx.cache is not None:
+            ctx.cache.close()
+        if ctx.history is not None:
+            ctx.history.close()
+        outbox.put(('done', index, ctx.stats.state(), ctx.timeouts.to_dict(profile.timeout)))
+
+
+# ================== 父进程 ==================
+class _Dispatcher:
+    """按主机把条目分给子进程，同一主机固定在同一个进程"""
+
+    def __init__(self, inboxes, procs):
+        self.inboxes = inboxes
+        self.procs = procs
+        self.assigned = [0] * len(inboxes)
+        self.owner = {}           # 主机:端口 -> 进程序号
+        self.error = None
+
+    def _put(self, idx, item):
+        # 子进程意外退出时不要一直卡在它的队列上
+        while self.procs[idx].is_alive():
+            try:
+                self.inboxes[idx].put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self, entries):
+        batches = [[] for _ in self.inboxes]
+        try:
+            for entry in entries:
+                endpoint = endpoint_of(entry[2])
+                idx = self.owner.get(endpoint)
+                if idx is None:
+                    idx = self.owner[endpoint] = min(range(len(self.assigned)), key=self.assigned.__getitem__)
+                self.assigned[idx] += 1
+                batch = batches[idx]
+                batch.append(entry)
+                if len(batch) >= BATCH:
+                    self._put(idx, batch)
+                    batches[idx] = []
+        except Exception as e:
+            self.error = e
+        finally:
+            for idx, batch in enumerate(batches):
+                if batch:
+                    self._put(idx, batch)
+                self._put(idx, None)
+
+
+def run_processes(entries, profile, on_result, ctx, make_context, processes):
+    """
+    用 processes 个子进程检测，返回各主机当前的超时（合并自所有子进程，用于导出统计）。
+    make_context 为可 pickle 的无参函数（如 functools.partial），在子进程里创建 RunContext；
+    ctx 为父进程的 RunContext：结果日志、缓存和历史在父进程写（make_context 创建的子进程 RunContext 应只读），
+    检测顺序（ctx.history）在父进程排，子进程的统计合并进 ctx.stats。
+    """
+    if ctx.journal is not None:
+        entries = ctx.journal.filter(entries, on_result)
+        on_result = ctx.journal.recorder(on_result)
+    if ctx.history is not None and ctx.time_budget > 0:
+        entries = ctx.history.order(entries)
+
+    # spawn：父进程已有线程在跑（进度条、引擎预加载），fork 出的子进程可能继承到被持有的锁
+    mp = multiprocessing.get_context('spawn')
+    outbox = mp.Queue()
+    inboxes = [mp.Queue(QUEUE_BATCHES) for _ in range(processes)]
+    procs = [mp.Process(target=_worker, args=(i, make_context, profile, inboxes[i], outbox), daemon=True)
+             for i in range(processes)]
+    for p in procs:
+        p.start()
+    dispatcher = _Dispatcher(inboxes, procs)
+    feeder = threading.Thread(target=dispatcher.run, args=(entries,), daemon=True)
+    feeder.start()
+
+    timeouts = {}
+    pending = set(range(processes))
+    try:
+        while pending:
+            try:
+                msg = outbox.get(timeout=1)
+            except queue.Empty:
+                for idx in [i for i in pending if not procs[i].is_alive()]:
+                    print(f"\n子进程 {idx + 1} 意外退出（返回码 {procs[idx].exitcode}），"
+                          f"它未完成的条目没有结论")
+                    pending.discard(idx)
+                continue
+            kind = msg[0]
+            if kind == 'result':
+                group, title, url, result = msg[1]
+                try:
+                    ctx.finish(url, result)
+                except Exception as e:
+                    print(f"   [记录失败] {title}: {describe_error(e)}")
+                on_result(group, title, url, result)
+            elif kind == 'stats':
+                ctx.stats.absorb(msg[1], msg[2])
+            elif kind == 'done':
+                _, idx, state, host_timeouts = msg
+                ctx.stats.absorb(idx, state)
+                timeouts.update(host_timeouts)
+                pending.discard(idx)
+    finally:
+        for p in procs:
+            if pending:           # 中断或出错：不等子进程把剩下的条目测完
+                p.terminate()
+            p.join(timeout=5)
+    feeder.join(timeout=5)
+    if dispatcher.error is not None:
+        raise dispatcher.error
+    return timeouts
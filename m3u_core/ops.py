@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+检测流程交给引擎执行的操作（HTTP 请求 / 原始 TCP 交换 / FFmpeg 进程 / 等待）及其结果
+"""
+
+from dataclasses import dataclass, field
+
+DRAIN_LIMIT = 64 * 1024   # Fetch 读完 max_bytes 后剩余内容不超过此大小时读完，让连接回到池里复用
+
+
+@dataclass
+class Fetch:
+    """
+    流式 GET（或 HEAD），跟随重定向，状态码 200/206 时读取前 max_bytes 字节。
+    timeout 为读取超时的上限，引擎按主机实际延迟选用更短的连接 / 读取超时（见 timeouts.py）
+    """
+    url: str
+    headers: dict = field(default_factory=dict)
+    timeout: float = 15
+    max_bytes: int = 4096
+    memo: bool = False        # 本次运行内缓存结果（同一播放列表只抓一次）
+    method: str = 'GET'       # 'GET' | 'HEAD'
+    ranged: bool = False      # 带 Range: bytes=0-(max_bytes-1)，主机拒绝 Range 时引擎改发普通 GET（见 ranges.py）
+
+
+@dataclass
+class FetchResult:
+    status: int = 0
+    body: bytes = b""
+    error: Exception = None
+    final_url: str = None     # 跟随重定向后的地址
+    content_type: str = None  # 最终响应的 Content-Type
+    unreachable: bool = False # 没连上主机（连接被拒 / 连接超时 / 域名解析失败），计入熔断
+    timeouts: tuple = None    # 引擎实际使用的 (连接, 读取) 超时秒数
+    ttfb_ms: float = None     # 收到响应头的耗时
+    body_ms: float = None     # 读取 body 的耗时（读到内容时才有）
+    redirects: tuple = ()     # 实际走过的跳转 ((源地址, 状态码, 下一跳地址, Cache-Control, Expires), ...)
+    jumped: tuple = ()        # 按跳转缓存直接跳过的地址（从这些地址出发的跳转没有实际请求）
+
+
+@dataclass
+class MediaProbe:
+    """运行 FFmpeg/ffprobe 命令"""
+    cmd: list
+    timeout: float
+
+
+@dataclass
+class MediaResult:
+    returncode: int = None
+    stdout: str = ""
+    timed_out: bool = False
+    error: Exception = None
+
+
+@dataclass
+class Exchange:
+    """非 HTTP 协议的轻量探测：建立 TCP 连接，发送 payload，读取回应直到 max_bytes / until / 对端关闭"""
+    host: str
+    port: int
+    payload: bytes = b""
+    max_bytes: int = 0        # 0 表示只测试能否连上
+    until: bytes = None       # 读到此标记即停止（如 RTSP 响应头结束的空行）
+    timeout: float = 15
+
+
+@dataclass
+class ExchangeResult:
+    data: bytes = b""
+    error: Exception = None
+    unreachable: bool = False
+    timeouts: tuple = None
+    connect_ms: float = None  # 建立 TCP 连接的耗时
+    ttfb_ms: float = None     # 发出 payload 到收到第一个字节的耗时
+
+
+@dataclass
+class Sleep:
+    seconds: float
+
+
+class HostUnavailable(Exception):
+    """主机已熔断，未发请求直接判失败"""
+
+
+def redirect_failed(result):
+    """直达跳转缓存里的最终地址失败了（该退回入口重走）；主机已熔断的不算，从入口重走也会跳到同一个主机"""
+    if isinstance(result.error, HostUnavailable):
+        return False
+    return result.error is not None or result.status >= 400
+
+
+def exchange_timeout_phase(result):
+    """Exchange 超时发生在哪个阶段：'connect' | 'read'，不是超时返回 None"""
+    if not isinstance(result.error, TimeoutError):
+        return None
+    return 'connect' if result.unreachable else 'read'
+
+
+def describe_error(e):
+    return str(e) or type(e).__name__
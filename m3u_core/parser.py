@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+M3U / TXT 播放列表解析（检测器和 split_m3u_auto_balance.py 共用）
+单遍、逐行的状态机，边读边产出 (group, title, url)，支持的写法可以混在同一个文件里：
+
+  #EXTINF:-1 group-title="分组",名称      标准 M3U（分组也可以写在 #EXTGRP: 行）
+  URL
+  [分组] 名称,URL                         非标准 TXT
+  名称,URL                                TXT（多个地址可用 # 连接：名称,URL1#URL2）
+  分组,#genre#                            TXT 分类行，之后的条目都属于这个分组
+
+read_lines(path, use_mmap=True) 把文件映射进内存、按块解码，和逐行读文本文件速度相近；
+映射的文件页会计入 RSS（属于页缓存，可回收），适合文件在 tmpfs / 网络盘上、逐行读取系统调用较多的场合。
+"""
+
+import codecs
+import mmap
+import os
+import re
+
+DEFAULT_GROUP = '默认分组'
+DEFAULT_TITLE = '未知频道'
+MMAP_CHUNK = 4 * 1024 * 1024
+
+_SCHEMES = r'(?:https?|rtmp|rtsp|p3p)://'
+_URL = re.compile(_SCHEMES, re.IGNORECASE)
+# 名称是第一个不在引号里的逗号之后的部分（tvg-name="a,b" 中的逗号不算）
+_EXTINF_TITLE = re.compile(r'#EXTINF:[^,"]*(?:"[^"]*"[^,"]*)*,(.*)')
+_GROUP_TITLE = re.compile(r'group-title="([^"]*)"')
+# TXT 一行：[分组] 名称,URL / 名称,URL / 分组,#genre#
+_TXT_LINE = re.compile(r'(?:\[([^\]]+)\]\s*)?([^,]*),\s*(#genre#|' + _SCHEMES + r'.*)', re.IGNORECASE)
+_MULTI_URL = re.compile(r'#(?=' + _SCHEMES + ')', re.IGNORECASE)
+
+
+def parse_entries(lines, default_group=DEFAULT_GROUP):
+    """
+    逐行解析，边读边产出 (group, title, url)；lines 可以直接是打开的文件。
+    default_group 为没有分组信息时的分组名，也可以是 title -> 分组名 的函数。
+    """
+    group_of = default_group if callable(default_group) else None
+    url_match, txt_match = _URL.match, _TXT_LINE.match
+    title = group = None      # 上一个 #EXTINF / #EXTGRP 给出的名称和分组，用于下一个 URL
+    section = None            # TXT 分类行给出的分组，一直有效到下一个分类行
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        if line[0] == '#':
+            if line.startswith('#EXTINF:'):
+                m = _EXTINF_TITLE.match(line)
+                title = m.group(1).strip() or None if m else None
+                g = _GROUP_TITLE.search(line) if 'group-title' in line else None
+                group = g.group(1).strip() or None if g else None
+            elif line.startswith('#EXTGRP:'):
+                group = line[8:].strip() or None
+            continue
+
+        if url_match(line):
+            t = title or DEFAULT_TITLE
+            yield group or section or (group_of(t) if group_of else default_group), t, line
+            title = group = None
+            continue
+
+        m = txt_match(line)
+        if m is None:
+            continue
+        line_group, name, url = m.groups()
+        if url == '#genre#':
+            section = name.strip() or None
+            continue
+        t = name.strip() or DEFAULT_TITLE
+        g = line_group.strip() if line_group else section or (group_of(t) if group_of else default_group)
+        if '#' in url:
+            for u in _MULTI_URL.split(url):
+                yield g, t, u.strip()
+        else:
+            yield g, t, url
+
+
+def read_lines(path, use_mmap=False):
+    """逐行读取 UTF-8 文本（去掉 BOM，无法解码的字节忽略）"""
+    if not use_mmap:
+        with open(path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+            yield from f
+        return
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = len(codecs.BOM_UTF8) if mm[:3] == codecs.BOM_UTF8 else 0
+            while start < size:
+                # 每块在换行处截断（UTF-8 的多字节字符里不会出现 \n）
+                end = size
+                if start + MMAP_CHUNK < size:
+                    end = mm.rfind(b'\n', start, start + MMAP_CHUNK) + 1
+                    if end <= start:      # 超长的一行
+                        end = mm.find(b'\n', start + MMAP_CHUNK) + 1 or size
+                yield from mm[start:end].decode('utf-8', errors='ignore').split('\n')
+                start = end
+
+
+def parse_file(path, default_group=DEFAULT_GROUP, use_mmap=False):
+    """解析一个文件，边读边产出 (group, title, url)"""
+    return parse_entries(read_lines(path, use_mmap), default_group)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+检测流水线的公共部分
+HTTP 阶段和媒体（FFmpeg/ffprobe）阶段各有自己的队列和并发上限：
+检测走到 MediaProbe 时交给媒体阶段，HTTP 工作者立即处理下一条；
+媒体阶段之后若还需要 HTTP（如 v8.1 重试），以更高优先级放回 HTTP 队列。
+"""
+
+import itertools
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from .probe import check_steps
+from .urls import host_of
+
+RESUME, FRESH = 0, 1      # HTTP 队列优先级：接续的检测先于新条目
+
+_seq = itertools.count()
+
+
+class CheckTask:
+    """一条 URL 的检测过程：check_steps 生成器 + 当前等待执行的操作"""
+
+    def __init__(self, entry, profile):
+        self.entry = entry
+        self.url = entry[2]
+        self.steps = (profile.steps or check_steps)(*entry, profile)
+        self.op = None
+        self.result = None
+        self.started = False
+        self.started_at = None
+        self.charged = False      # 已按主机速率计过这次检测（之后的请求不再计）
+
+    def advance(self, value=None):
+        """把上一步的结果送回生成器，返回下一步操作；检测结束返回 None"""
+        try:
+            if self.started:
+                self.op = self.steps.send(value)
+            else:
+                self.started = True
+                self.started_at = time.monotonic()
+                self.op = next(self.steps)
+        except StopIteration as stop:
+            self.op, self.result = None, stop.value
+        return self.op
+
+
+def queue_item(task, priority):
+    return (priority, next(_seq), task)
+
+
+@contextmanager
+def stage_timer(stats, stage):
+    """累计阶段的操作次数和忙碌时间"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        ms = (time.monotonic() - start) * 1000
+        stats.incr(f'{stage}_ops')
+        stats.incr(f'{stage}_busy_ms', int(ms))
+        stats.observe(stage, ms)
+
+
+@contextmanager
+def timed(stats, key):
+    """
+    把一段代码的耗时记入直方图 key（抛出异常的不计，超时不混进延迟分布）；
+    with ... as t 得到的 t.ms 为这次的耗时
+    """
+    timing = SimpleNamespace(ms=None)
+    start = time.monotonic()
+    yield timing
+    timing.ms = (time.monotonic() - start) * 1000
+    stats.observe(key, timing.ms)
+
+
+def record_check(stats, task, result):
+    """一条检测结束：计入实时速率；联网探测的还记录总耗时和主机成败"""
+    stats.mark('checks')
+    if result.sniffed:
+        stats.incr(f'sniff_{result.sniffed}')
+    if result.cached or task.started_at is None:
+        return
+    ms = (time.monotonic() - task.started_at) * 1000
+    stats.observe('check', ms)
+    stats.host_result(host_of(task.url), result.ok, ms)
+
+
+def record_depth(stats, stage, q):
+    stats.gauge(f'{stage}_queue', q.qsize())
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+共享连接池（requests，线程模式）：所有检测线程共用一个按主机划分的 keep-alive 连接池，
+同一 CDN 主机上的大量短 m3u8 请求不再反复 TCP/TLS 握手，并统计连接复用情况；
+新建连接时的域名解析走 ctx.dns（所有线程共用的 DNS 缓存）
+asyncio 模式的连接池见 pool_async.py
+"""
+
+import socket
+import time
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+
+from .ops import DRAIN_LIMIT
+
+MAX_HOSTS = 1000          # 缓存的主机连接池数量（requests 默认只有 10，主机多时会被挤掉）
+
+# 探测时不校验证书（verify=False），屏蔽每个请求都会出现的 HTTPS 警告
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+def _timed_connection(base, ctx):
+    stats, dns, timeouts = ctx.stats, ctx.dns, ctx.timeouts
+
+    class TimedConnection(base):
+        def _new_conn(self):
+            """与 urllib3 相同，只是地址来自共享 DNS 缓存"""
+            try:
+                addrs = dns.resolve_sync(self._dns_host, self.port)
+            except socket.gaierror as e:
+                raise NameResolutionError(self.host, self, e) from e
+            error = None
+            for _, ip in addrs:
+                try:
+                    return connection.create_connection(
+                        (ip, self.port), self.timeout,
+                        source_address=self.source_address, socket_options=self.socket_options)
+                except socket.timeout as e:
+                    error = ConnectTimeoutError(
+                        self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})")
+                    error.__cause__ = e
+                except OSError as e:
+                    error = NewConnectionError(self, f"Failed to establish a new connection: {e}")
+                    error.__cause__ = e
+            raise error or NewConnectionError(self, f"{self.host} 没有可用地址")
+
+        def connect(self):
+            start = time.monotonic()
+            ok = False
+            try:
+                super().connect()
+                ok = True
+            finally:
+                ms = (time.monotonic() - start) * 1000
+                stats.observe('connect', ms)
+                if ok:
+                    timeouts.observe_connect(f"{self.host}:{self.port}", ms)
+
+    return TimedConnection
+
+
+def _counting_pool(base, ctx):
+    stats = ctx.stats
+
+    class CountingPool(base):
+        ConnectionCls = _timed_connection(base.ConnectionCls, ctx)
+
+        def _get_conn(self, timeout=None):
+            stats.incr('conn_requests')
+            return super()._get_conn(timeout)
+
+        def _new_conn(self):
+            stats.incr('conn_new')
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class CountingAdapter(HTTPAdapter):
+    """按主机保留 ctx.pool_per_host 个连接，并把新建连接数计入 ctx.stats"""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        super().__init__(pool_connections=MAX_HOSTS, pool_maxsize=ctx.pool_per_host)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.ctx),
+            'https': _counting_pool(HTTPSConnectionPool, self.ctx),
+        }
+
+
+def build_session(ctx):
+    """所有检测线程共用的 Session"""
+    session = requests.Session()
+    adapter = CountingAdapter(ctx)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def connect_failed(error):
+    """requests 的异常是否发生在连接阶段（主机连不上，而不是连上后出错）"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    reason = getattr(error.args[0], 'reason', error.args[0])   # MaxRetryError.reason
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def timeout_phase(error):
+    """超时发生在哪个阶段：'connect' | 'read'，不是超时返回 None"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return 'connect'
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'read'
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # 读取响应内容时超时（stream=True），requests 包装成 ConnectionError
+        if isinstance(getattr(error.args[0], 'reason', error.args[0]), urllib3.exceptions.ReadTimeoutError):
+            return 'read'
+    return None
+
+
+def release_sync(resp):
+    """已读到 EOF 或剩余内容很小时把连接放回连接池，否则关闭（直播流不能读完）；返回为此多读的字节数"""
+    raw = resp.raw
+    drained = 0
+    try:
+        if not raw.closed:
+            remaining = raw.length_remaining
+            if remaining is not None and remaining <= DRAIN_LIMIT:
+                drained = len(raw.read(remaining))
+        if raw.closed:
+            raw.release_conn()
+            return drained
+    except Exception:
+        pass
+    try: resp.close()
+    except Exception: pass
+    return drained
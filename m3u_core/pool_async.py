@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+共享连接池（aiohttp，asyncio 模式）：所有检测协程共用一个 TCPConnector，
+并通过 TraceConfig 统计连接复用和建立连接的耗时；域名解析走 ctx.dns（与线程模式相同的 DNS 缓存）
+"""
+
+import asyncio
+import socket
+import time
+from urllib.parse import urljoin
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from .ops import DRAIN_LIMIT
+from .urls import endpoint_of
+
+
+class CachingResolver(AbstractResolver):
+    """aiohttp 的解析器接口，解析结果来自共享的 DnsCache"""
+
+    def __init__(self, dns):
+        self.dns = dns
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        addrs = await self.dns.resolve_async(host, port)
+        hosts = [{'hostname': host, 'host': ip, 'port': port, 'family': fam, 'proto': 0,
+                  'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV}
+                 for fam, ip in addrs if family in (socket.AF_UNSPEC, fam)]
+        if not hosts:
+            raise OSError(None, f"{host} 没有可用地址")
+        return hosts
+
+    async def close(self):
+        pass
+
+
+def _connection_trace(stats, timeouts):
+    async def on_request_start(session, trace_ctx, params):
+        trace_ctx.endpoint = endpoint_of(str(params.url))
+
+    async def on_redirect(session, trace_ctx, params):
+        location = params.response.headers.get('Location', '')
+        trace_ctx.endpoint = endpoint_of(urljoin(str(params.url), location))
+
+    async def on_create_start(session, trace_ctx, params):
+        trace_ctx.connect_start = time.monotonic()
+
+    async def on_create(session, trace_ctx, params):
+        stats.incr('conn_requests')
+        stats.incr('conn_new')
+        ms = (time.monotonic() - trace_ctx.connect_start) * 1000
+        stats.observe('connect', ms)
+        timeouts.observe_connect(trace_ctx.endpoint, ms)
+
+    async def on_reuse(session, trace_ctx, params):
+        stats.incr('conn_requests')
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_redirect.append(on_redirect)
+    trace.on_connection_create_start.append(on_create_start)
+    trace.on_connection_create_end.append(on_create)
+    trace.on_connection_reuseconn.append(on_reuse)
+    return trace
+
+
+def build_client_session(ctx, **kwargs):
+    """所有检测协程共用的 ClientSession（需在事件循环内调用）"""
+    connector = aiohttp.TCPConnector(limit=ctx.concurrency, limit_per_host=ctx.pool_per_host, ssl=False,
+                                     resolver=CachingResolver(ctx.dns), use_dns_cache=False)
+    trace = _connection_trace(ctx.stats, ctx.timeouts)
+    return aiohttp.ClientSession(connector=connector, trace_configs=[trace], **kwargs)
+
+
+def connect_failed(error):
+    """aiohttp 的异常是否发生在连接阶段（主机连不上，而不是连上后出错）"""
+    if isinstance(error, aiohttp.ClientSSLError):      # 连上了，TLS 握手失败
+        return False
+    return isinstance(error, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError))
+
+
+def timeout_phase(error):
+    """超时发生在哪个阶段：'connect' | 'read'，不是超时返回 None"""
+    if isinstance(error, aiohttp.ConnectionTimeoutError):
+        return 'connect'
+    if isinstance(error, (aiohttp.ServerTimeoutError, asyncio.TimeoutError)):
+        return 'read'
+    return None
+
+
+async def release_async(resp):
+    """剩余内容很小时读完，让 aiohttp 在退出 async with 时复用连接；返回为此多读的字节数"""
+    if resp.content.at_eof():
+        return 0
+    length = resp.content_length
+    if length is not None and length <= DRAIN_LIMIT:
+        try:
+            return len(await resp.content.read())
+        except Exception:
+            pass
+    return 0
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+检测逻辑（与 IO 无关）
+check_steps 是一个生成器：yield 出需要执行的网络 / 进程操作，
+由线程引擎或 asyncio 引擎执行后 send 回结果，最终 return 是否有效。
+"""
+
+import json
+import random
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from .hls import SEGMENT_BYTES, hls_steps
+from .ops import Fetch, HostUnavailable, MediaProbe, Sleep, describe_error
+from .quality import throughput_of
+from .schemes import METHODS, NATIVE_SCHEMES, address_error, scheme_of, stream_steps
+from .sniff import sniff
+
+DEFAULT_USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+)
+
+MAX_BYTES = 4096          # 首次请求读取的字节数
+HEADER_BYTES = 1024       # 直链媒体文件只取开头这么多（够识别文件头）
+PROBE_MODES = ('get', 'range', 'head')
+MEDIA_EXTS = ('.ts', '.mp4', '.m4v', '.flv', '.mkv', '.mp3', '.aac', '.m4a')
+MEDIA_TYPES = ('video/', 'audio/', 'application/mp4')
+FFPROBE_ARGS = ['-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams']
+
+
+# ================== 检测策略 ==================
+@dataclass
+class CheckProfile:
+    """单个检测脚本的检测策略（v7.4 / v8.0 / v8.1 的差异都在这里）"""
+    timeout: float = 15
+    retry_count: int = 0              # 额外重试次数，总尝试次数 = 1 + retry_count
+    retry_delay: tuple = (1, 3)
+    user_agents: tuple = DEFAULT_USER_AGENTS
+    random_ua: bool = False           # 随机 UA（v7.4），同一主机固定用同一个
+    force_ffmpeg_keywords: tuple = ()  # 命中关键字的源强制 FFmpeg 验证（v8.x: cgtn / 0472.org）
+    ffmpeg_mode: str = 'body'         # 何时回退 FFmpeg：'body' 返回 200 但不是播放列表 | 'fail' 任何失败 | 'force' 仅关键源
+    ffmpeg_cmd: list = None           # None 表示 FFmpeg 不可用
+    ffmpeg_duration: int = 3
+    ffmpeg_extra_args: tuple = ()
+    ffmpeg_timeout: float = 12
+    hls_validate: bool = True         # 播放列表继续校验 variant 和分片（纯 Python），通过则不再启动 FFmpeg
+    sniff: bool = True                # 不是播放列表时按文件头识别（TS / MP4 / FLV / HTML 等），能确定的不再启动 FFmpeg
+    probe_mode: str = 'range'         # 主请求：'get' 流式 GET 读 4KB | 'range' 带 Range 只取需要的字节 |
+                                      # 'head' 同 range，直链媒体文件先发 HEAD，状态码和类型能说明问题就不再 GET
+    measure_bytes: int = 0            # > 0 时给有效的源测速：多读这么多字节（HLS 读一个分片）计算下载速度
+    steps: object = None              # 自定义检测流程 (group, title, url, profile) -> 生成器，None 为 check_steps
+
+    def pick_ua(self, url=''):
+        if self.random_ua:
+            # 每次运行随机，但同一主机始终相同，请求特征稳定，连接也能复用
+            host = urlsplit(url).hostname or ''
+            return self.user_agents[hash(host) % len(self.user_agents)]
+        return self.user_agents[0]
+
+
+# ================== 检测结论 ==================
+@dataclass
+class ProbeResult:
+    ok: bool = False
+    status: int = None        # 最后一次 HTTP 状态码（连接失败时为 None）
+    method: str = 'http'      # 得出结论的方式：'http' | 'head' | 'hls' | 'sniff' | 'ffmpeg' | 'rtsp' | 'rtmp' | 'tcp'
+    reason: str = ''
+    cached: bool = False      # 来自结果缓存，本次未探测
+    checked_at: float = None  # 探测时间（time.time()）
+    timeouts: tuple = None    # 最后一次探测主请求实际使用的 (连接, 读取) 超时秒数
+    ttfb_ms: float = None     # 主请求收到响应头的耗时
+    throughput: float = None  # 测速得到的下载速度（字节/秒），未测速为 None
+    payload: object = None    # 自定义检测流程附带的数据（如 TVBox 配置内容），不写入日志和缓存
+    final_url: str = None     # 主请求跟随跳转后的地址（没有跳转为 None）
+    sniffed: str = None       # 按文件头识别出的格式（见 sniff.RULES），无法判断为 'unknown'，未识别为 None
+
+
+# ================== 内容判断 ==================
+def is_direct_media(url):
+    """地址直接指向媒体文件（.ts / .mp4 等），不是播放列表"""
+    return urlsplit(url).path.lower().endswith(MEDIA_EXTS)
+
+
+def is_playlist_chunk(chunk):
+    """前 4KB 是否为 master playlist 或 segment list"""
+    if not chunk:
+        return False
+    text = chunk.decode('utf-8', errors='ignore').lstrip('\ufeff').strip()
+    if not text.startswith('#EXTM3U'):
+        return False
+    lines = text.splitlines()
+    has_stream = any(line.startswith('#EXT-X-STREAM-INF') for line in lines)
+    has_segment = any(line.startswith('#EXTINF:') or '.m3u8' in line for line in lines)
+    return has_stream or has_segment
+
+
+def ffprobe_ok(stdout):
+    try:
+        data = json.loads(stdout)
+    except (ValueError, TypeError):
+        return False
+    return bool(data.get('streams') or data.get('format'))
+
+
+# ================== 检测流程 ==================
+def ffmpeg_steps(title, url, profile):
+    cmd = list(profile.ffmpeg_cmd) + FFPROBE_ARGS + [
+        '-t', str(profile.ffmpeg_duration),
+        '-user_agent', profile.pick_ua(url),
+        *profile.ffmpeg_extra_args,
+        url,
+    ]
+    result = yield MediaProbe(cmd, profile.ffmpeg_timeout)
+    if result.timed_out:
+        print(f"   [FFmpeg 超时] {title}")
+    elif result.error is not None:
+        print(f"   [FFmpeg 异常] {title}: {describe_error(result.error)}")
+    elif result.returncode != 0:
+        print(f"   [FFmpeg 返回码 {result.returncode}] {title}")
+    elif ffprobe_ok(result.stdout):
+        print(f"   [FFmpeg 确认] {title}")
+        return True
+    return False
+
+
+def needs_ffmpeg(profile, resp, force_ffmpeg):
+    if not profile.ffmpeg_cmd:
+        return False
+    if force_ffmpeg or profile.ffmpeg_mode == 'fail':
+        return True
+    if profile.ffmpeg_mode == 'body':
+        return resp.status in (200, 206) and len(resp.body) > 0
+    return False
+
+
+def head_steps(title, url, profile):
+    """
+    直链媒体文件先发 HEAD：2xx 且类型是音视频即有效，404 / 410 即失效，不传正文；
+    源站不支持 HEAD、类型不明或其他状态码时 return None，交给后面的 GET
+    """
+    resp = yield Fetch(url, {'User-Agent': profile.pick_ua(url)}, profile.timeout, 0, method='HEAD')
+    if resp.error is not None:
+        return None
+    final_url = resp.final_url if resp.final_url != url else None
+    if 200 <= resp.status < 300 and (resp.content_type or '').lower().startswith(MEDIA_TYPES):
+        print(f"   [HEAD {resp.content_type}] {title}")
+        return ProbeResult(True, resp.status, 'head', timeouts=resp.timeouts, ttfb_ms=resp.ttfb_ms,
+                           final_url=final_url)
+    if resp.status in (404, 410):
+        print(f"   [HTTP {resp.status}] {title}")
+        return ProbeResult(False, resp.status, 'head', f"HTTP {resp.status}", timeouts=resp.timeouts,
+                           ttfb_ms=resp.ttfb_ms, final_url=final_url)
+    return None
+
+
+def measure_steps(url, profile):
+    """直接读取流本身测速（非 HLS 的有效源），return 字节/秒 或 None"""
+    resp = yield Fetch(url, {'User-Agent': profile.pick_ua(url)}, profile.timeout, profile.measure_bytes)
+    if resp.error is not None or resp.status not in (200, 206):
+        return None
+    return throughput_of(resp)
+
+
+def native_steps(title, url, profile, force_ffmpeg):
+    """rtsp / rtmp / p3p：协议自己的轻量探测，不发 HTTP 请求"""
+    scheme = scheme_of(url)
+    error = address_error(url)
+    if error:
+        print(f"   [{scheme.upper()} 失败] {title}: {error}")
+        return ProbeResult(method=METHODS[scheme], reason=error)
+
+    result = ProbeResult(method=METHODS[scheme])
+    for attempt in range(profile.retry_count + 1):
+        if attempt > 0:
+            print(f"   [重试 {attempt}/{profile.retry_count}] {title}")
+            yield Sleep(random.uniform(*profile.retry_delay))
+        ok, status, reason, reply = yield from stream_steps(url, profile.pick_ua(url), profile.timeout)
+        result = ProbeResult(ok, status, METHODS[scheme], reason, timeouts=reply.timeouts,
+                             ttfb_ms=reply.ttfb_ms)
+        if ok:
+            break
+        print(f"   [{scheme.upper()} 失败] {title}: {reason}")
+        if isinstance(reply.error, HostUnavailable):
+            break             # 主机已熔断，重试也不会发请求
+
+    # 握手只说明服务在线；关键源再让 FFmpeg 确认真的能拉流（p3p FFmpeg 不支持）
+    if result.ok and force_ffmpeg and profile.ffmpeg_cmd and scheme != 'p3p':
+        result.method = 'ffmpeg'
+        if not (yield from ffmpeg_steps(title, url, profile)):
+            result.ok, result.reason = False, "FFmpeg 验证失败"
+    return result
+
+
+def check_steps(group, title, url, profile):
+    """单条 URL 的完整检测流程，return ProbeResult"""
+    url_lower, title_lower = url.lower(), title.lower()
+    force_ffmpeg = any(kw in url_lower or kw in title_lower for kw in profile.force_ffmpeg_keywords)
+    if force_ffmpeg:
+        print(f"   [关键源，强制 FFmpeg 验证] {title}")
+
+    if scheme_of(url) in NATIVE_SCHEMES:
+        return (yield from native_steps(title, url, profile, force_ffmpeg))
+
+    ranged = profile.probe_mode != 'get'
+    direct = ranged and is_direct_media(url)
+    # 测速和关键源反正要完整拉流，HEAD 省不了什么
+    if direct and profile.probe_mode == 'head' and not force_ffmpeg and not profile.measure_bytes:
+        result = yield from head_steps(title, url, profile)
+        if result is not None:
+            return result
+
+    result = ProbeResult()
+    for attempt in range(profile.retry_count + 1):
+        if attempt > 0:
+            print(f"   [重试 {attempt}/{profile.retry_count}] {title}")
+            yield Sleep(random.uniform(*profile.retry_delay))
+
+        resp = yield Fetch(url, {'User-Agent': profile.pick_ua(url)}, profile.timeout,
+                           HEADER_BYTES if direct else MAX_BYTES, ranged=ranged)
+        if isinstance(resp.error, HostUnavailable):
+            print(f"   [熔断] {title}: {describe_error(resp.error)}")
+            result = ProbeResult(reason=describe_error(resp.error))
+            break             # 主机已熔断，重试也不会发请求
+        if resp.error is not None:
+            print(f"   [异常] {title}: {describe_error(resp.error)}")
+            result = ProbeResult(reason=describe_error(resp.error), timeouts=resp.timeouts)
+            continue
+
+        http_ok, sniffed = False, None
+        result = ProbeResult(status=resp.status, timeouts=resp.timeouts, ttfb_ms=resp.ttfb_ms,
+                             final_url=resp.final_url if resp.final_url != url else None)
+        if resp.status not in (200, 206):
+            print(f"   [HTTP {resp.status}] {title}")
+            result.reason = f"HTTP {resp.status}"
+        else:
+            http_ok = is_playlist_chunk(resp.body)
+            result.reason = '' if http_ok else "不是 M3U8 播放列表"
+            if not http_ok and profile.sniff:
+                sniffed = sniff(resp.body)
+                result.sniffed = sniffed.kind if sniffed.conclusive else 'unknown'
+
+        # 原生 HLS 校验：variant → media playlist → 分片，通过即可免去 FFmpeg（包括关键源）
+        if http_ok and profile.hls_validate:
+            headers = {'User-Agent': profile.pick_ua(url)}
+            hls_ok, reason, segment = yield from hls_steps(
+                resp.final_url or url, resp.body, headers, profile.timeout,
+                truncated=len(resp.body) >= MAX_BYTES, segment_bytes=profile.measure_bytes or SEGMENT_BYTES)
+            if hls_ok:
+                result.ok, result.method = True, 'hls'
+                if profile.measure_bytes:
+                    result.throughput = throughput_of(segment)
+                return result
+            print(f"   [HLS 校验失败] {title}: {reason}")
+            http_ok, result.method, result.reason = False, 'hls', reason
+        elif http_ok and not force_ffmpeg:
+            result.ok = True
+            return result
+
+        # 文件头已能确定：媒体流直接判有效，错误页直接判失效，都不再启动 FFmpeg（关键源仍由 FFmpeg 确认）
+        if sniffed is not None and sniffed.conclusive and not force_ffmpeg:
+            result.method = 'sniff'
+            if sniffed.media:
+                print(f"   [文件头 {sniffed.kind.upper()}] {title}")
+                result.ok, result.reason = True, ''
+                if profile.measure_bytes:
+                    result.throughput = yield from measure_steps(url, profile)
+                return result
+            print(f"   [返回 {sniffed.kind.upper()}] {title}")
+            result.reason = f"返回的是 {sniffed.kind.upper()}，不是视频流"
+            continue
+
+        # FFmpeg 备用 / 二次验证
+        if needs_ffmpeg(profile, resp, force_ffmpeg):
+            result.method = 'ffmpeg'
+            if (yield from ffmpeg_steps(title, url, profile)):
+                result.ok, result.reason = True, ''
+                if profile.measure_bytes:
+                    result.throughput = yield from measure_steps(url, profile)
+                return result
+            result.reason = "FFmpeg 验证失败"
+    return result
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+各版本检测器的检测策略（原 m3u_checker.py / m3u_checker_FFmpeg.py / m3u_checker_FFmpeg2.py）
+"""
+
+from .probe import CheckProfile
+
+# v7.4 UA 轮换
+USER_AGENTS = (
+    'Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 Chrome/120',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120 Safari/537.36',
+)
+
+# v8.x 伪装浏览器 UA（关键！）
+BROWSER_UA = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+CGTN_FFMPEG_ARGS = (
+    '-headers', 'Referer: https://www.cgtn.com/\r\n',
+    '-reconnect', '1',
+    '-reconnect_at_eof', '1',
+    '-reconnect_streamed', '1',
+    '-reconnect_delay_max', '5',
+)
+
+BANNERS = {
+    'v7.4': ("M3U 检测器 v7.4 (修复 302 重定向 + 防封 IP)",
+             "   自动扫描 Download 文件夹 | 支持 CGTN 等 HLS 源"),
+    'v8.0': ("M3U 检测器 v8.0 (最终完美版)",
+             "   支持 CGTN 全系列 | 强制 FFmpeg 验证 | 防封 IP"),
+    'v8.1': ("M3U 检测器 v8.1 (最终完美版 - 增强重试)",
+             "   支持 CGTN 全系列 | 强制 FFmpeg 验证 | 防封 IP"),
+}
+
+
+def v74_profile(timeout=15, retry_count=1, ffmpeg_cmd=None, hls_validate=True, sniff=True):
+    """v7.4 检测策略：随机 UA，返回 200 但不是播放列表时 FFmpeg 备用验证"""
+    return CheckProfile(
+        timeout=timeout,
+        user_agents=USER_AGENTS,
+        random_ua=True,
+        ffmpeg_mode='body',
+        ffmpeg_cmd=ffmpeg_cmd,
+        ffmpeg_duration=3,
+        hls_validate=hls_validate,
+        sniff=sniff,
+        ffmpeg_timeout=12,
+    )
+
+
+def v80_profile(timeout=15, retry_count=1, ffmpeg_cmd=None, hls_validate=True, sniff=True):
+    """v8.0 检测策略：固定浏览器 UA，关键源强制 FFmpeg，HTTP 未通过时 FFmpeg 二次验证"""
+    return CheckProfile(
+        timeout=timeout,
+        retry_count=0,
+        retry_delay=(1, 3),
+        user_agents=(BROWSER_UA,),
+        force_ffmpeg_keywords=('cgtn', '0472.org'),
+        ffmpeg_mode='fail',
+        ffmpeg_cmd=ffmpeg_cmd,
+        ffmpeg_duration=8,
+        ffmpeg_extra_args=CGTN_FFMPEG_ARGS,
+        hls_validate=hls_validate,
+        sniff=sniff,
+        ffmpeg_timeout=20,
+    )
+
+
+def v81_profile(timeout=15, retry_count=1, ffmpeg_cmd=None, hls_validate=True, sniff=True):
+    """v8.1 检测策略：固定浏览器 UA，关键源强制 FFmpeg，失败后重试 retry_count 次"""
+    return CheckProfile(
+        timeout=timeout,
+        retry_count=retry_count,
+        retry_delay=(1, 3),
+        user_agents=(BROWSER_UA,),
+        force_ffmpeg_keywords=('cgtn', '0472.org'),
+        ffmpeg_mode='force',
+        ffmpeg_cmd=ffmpeg_cmd,
+        ffmpeg_duration=8,
+        ffmpeg_extra_args=CGTN_FFMPEG_ARGS,
+        hls_validate=hls_validate,
+        sniff=sniff,
+        ffmpeg_timeout=20,
+    )
+
+
+PROFILES = {
+    'v7.4': v74_profile,
+    'v8.0': v80_profile,
+    'v8.1': v81_profile,
+}
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+源质量：测速结果的计算与同名频道的镜像排序
+同一频道（标题规范化后相同）的多个有效地址按预计起播时间排序：
+  TTFB + 下载 STARTUP_BYTES 所需时间（按测得的下载速度）
+测过速的排在没测速（如来自结果缓存）的前面，没测速的按 TTFB，再按原顺序。
+"""
+
+import re
+import unicodedata
+from collections import OrderedDict
+
+MIN_MEASURE_BYTES = 64 * 1024     # 读到的内容少于此大小时速度不可信（如播放列表、很小的分片）
+STARTUP_BYTES = 1024 * 1024       # 估算起播时间用的缓冲量
+
+_BRACKETS = re.compile(r'\[[^\]]*\]|【[^】]*】|\([^)]*\)|（[^）]*）')
+_QUALITY_TAGS = re.compile(r'(?:超清|高清|标清|蓝光|4k|8k|uhd|fhd|hd|sd|\d{3,4}[pi])$')
+_SEPARATORS = re.compile(r'[\s\-_·|/]+')
+_INDEX = re.compile(r'\W*\d+$')
+
+
+def throughput_of(resp):
+    """Fetch 结果的下载速度（字节/秒）；没读到足够内容时返回 None"""
+    if resp is None or not resp.body_ms or len(resp.body) < MIN_MEASURE_BYTES:
+        return None
+    return len(resp.body) / (resp.body_ms / 1000)
+
+
+def normalize_title(title, strip_index=False):
+    """
+    频道名规范化：全角转半角、小写，去掉 [待验证] /（备用）之类的括注、末尾的清晰度标记和分隔符。
+    strip_index=True 时再去掉末尾编号（岛国🍓01 / 岛国🍓03 视为同一频道）；
+    默认不去，否则 CCTV1 和 CCTV2 会被当成同一个频道。
+    """
+    name = unicodedata.normalize('NFKC', title).lower()
+    name = _BRACKETS.sub('', name)
+    name = _SEPARATORS.sub('', name)
+    name = _QUALITY_TAGS.sub('', name)
+    if strip_index:
+        name = _INDEX.sub('', name) or name
+    return name or title
+
+
+def startup_seconds(result):
+    """预计起播时间（秒），没有测速数据时返回 None"""
+    if result.throughput is None or result.ttfb_ms is None:
+        return None
+    return result.ttfb_ms / 1000 + STARTUP_BYTES / result.throughput
+
+
+def _rank_key(item):
+    pos, (_, _, _, result) = item
+    startup = startup_seconds(result)
+    if startup is not None:
+        return 0, startup, pos
+    if result.ttfb_ms is not None:
+        return 1, result.ttfb_ms, pos
+    return 2, 0, pos
+
+
+def rank_mirrors(results, top_n=0, strip_index=False):
+    """
+    results 为 (group, title, url, ProbeResult)，只保留有效的，按频道分组排序。
+    返回 [(频道名, [(group, title, url, ProbeResult), ...])]，频道按首次出现的顺序，
+    每个频道内最快的在前；top_n > 0 时每个频道只保留前 top_n 个。
+    """
+    channels = OrderedDict()
+    for pos, item in enumerate(results):
+        if item[3].ok:
+            channels.setdefault(normalize_title(item[1], strip_index), []).append((pos, item))
+    ranked = []
+    for name, mirrors in channels.items():
+        mirrors.sort(key=_rank_key)
+        if top_n > 0:
+            mirrors = mirrors[:top_n]
+        ranked.append((name, [item for _, item in mirrors]))
+    return ranked
+
+
+def write_ranked(path, ranked):
+    """写出排序后的播放列表，返回写入的条目数"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("#EXTM3U\n")
+        for _, mirrors in ranked:
+            for group, title, url, _ in mirrors:
+                f.write(f"#EXTINF:-1 group-title=\"{group}\",{title}\n{url}\n")
+                count += 1
+    return count
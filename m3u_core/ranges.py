@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+按主机（主机名 + 端口）记住对 Range 请求的支持情况：
+主请求带 Range: bytes=0-(max_bytes-1)，源站只发这么多字节，不会在我们读够、断开之前继续往连接里塞数据。
+  supported  回 206
+  ignored    回 200 和整个内容（仍然只读 max_bytes 就断开）
+  rejected   回 400 / 405 / 416 / 501：去掉 Range 重发一次普通 GET，之后该主机不再带 Range
+"""
+
+import threading
+from dataclasses import replace
+
+from .urls import endpoint_of
+
+SUPPORTED, IGNORED, REJECTED = 'supported', 'ignored', 'rejected'
+RANGE_REJECTED = (400, 405, 416, 501)
+
+
+class RangeTable:
+    def __init__(self, stats=None):
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._hosts = {}          # 主机:端口 -> SUPPORTED | IGNORED | REJECTED
+
+    def _count(self, key):
+        if self.stats is not None:
+            self.stats.incr(key)
+
+    def state(self, url):
+        return self._hosts.get(endpoint_of(url))
+
+    def prepare(self, op):
+        """op.ranged 的 GET 加上 Range 头（主机拒绝过 Range、或已自带 Range 的原样返回）"""
+        if not op.ranged or op.method != 'GET' or 'Range' in op.headers or self.state(op.url) == REJECTED:
+            return op
+        self._count('range_sent')
+        return replace(op, headers=dict(op.headers, Range=f'bytes=0-{op.max_bytes - 1}'))
+
+    def learn(self, url, result):
+        """记下带 Range 的请求得到的回应；返回 True 表示源站拒绝了 Range，应去掉 Range 重发"""
+        if result.error is not None:
+            return False
+        if result.status == 206:
+            state = SUPPORTED
+        elif result.status == 200:
+            state = IGNORED
+        elif result.status in RANGE_REJECTED:
+            state = REJECTED
+        else:
+            return False
+        endpoint = endpoint_of(url)
+        with self._lock:
+            previous = self._hosts.get(endpoint)
+            # 回过 206 的主机个别地址 416（如空文件）不代表整个主机不支持；忽略过 Range 的主机以新的回应为准
+            if previous is None or previous == IGNORED:
+                self._hosts[endpoint] = state
+        self._count(f'range_{state}')
+        return state == REJECTED
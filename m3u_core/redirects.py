@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+跳转缓存：记下每一跳（源地址 → Location、状态码、有效期），之后再请求同一个入口（短链、gh-proxy 之类）
+直接请求最终地址，不再一跳一跳重走。有效期：
+  Cache-Control: no-store / no-cache       不缓存
+  Cache-Control: max-age / s-maxage，Expires 按响应头
+  没有缓存头的 301 / 308                   整次运行有效
+  没有缓存头的 302 / 303 / 307             default_ttl 秒
+跳转由引擎逐跳跟随（不交给 HTTP 库），所以不同入口跳到同一个中间地址时，后面几跳也能直接跳过。
+直达的最终地址请求失败（出错或 4xx / 5xx）时，丢掉用到的跳转，从入口重新走一遍。
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from .urls import normalize_url
+
+DEFAULT_TTL = 600
+MAX_HOPS = 10             # 最多跟随的跳转数（与 requests 默认的 30 相比，直播源很少超过 3 跳）
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+PERMANENT = (301, 308)
+SHARED_TOP = 5            # 汇总里列出的共用最终地址数
+
+_MAX_AGE = re.compile(r'(?:s-maxage|max-age)\s*=\s*"?(\d+)', re.IGNORECASE)
+
+
+def hop_expiry(status, cache_control, expires, default_ttl, now=None):
+    """一跳的过期时刻（time.time()），None 表示整次运行有效，0 表示不缓存"""
+    now = now or time.time()
+    directives = (cache_control or '').lower()
+    if 'no-store' in directives or 'no-cache' in directives:
+        return 0
+    m = _MAX_AGE.search(directives)
+    if m:
+        return now + int(m.group(1)) if int(m.group(1)) > 0 else 0
+    if expires:
+        try:
+            return max(parsedate_to_datetime(expires).timestamp(), 0)
+        except (TypeError, ValueError, OverflowError):
+            return 0              # 无效的 Expires 视为已过期
+    if status in PERMANENT:
+        return None
+    return now + default_ttl if default_ttl > 0 else 0
+
+
+class RedirectCache:
+    def __init__(self, default_ttl=DEFAULT_TTL, stats=None):
+        self.default_ttl = default_ttl    # <= 0 时只缓存带缓存头 / 永久的跳转
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._hops = {}           # 规范化源地址 -> (下一跳地址, 状态码, 过期时刻)
+
+    def _count(self, key):
+        if self.stats is not None:
+            self.stats.incr(key)
+
+    def learn(self, hops):
+        """hops 为 FetchResult.redirects：((源地址, 状态码, 下一跳地址, Cache-Control, Expires), ...)"""
+        now = time.time()
+        for url, status, location, cache_control, expires in hops:
+            expiry = hop_expiry(status, cache_control, expires, self.default_ttl, now)
+            if expiry == 0 or expiry is not None and expiry <= now:
+                continue
+            with self._lock:
+                self._hops[normalize_url(url)] = (location, status, expiry)
+            self._count('redirect_learned')
+
+    def resolve(self, url):
+        """沿着仍然有效的跳转走到头，返回要直接请求的地址（没有缓存的跳转时返回 url 本身）"""
+        now = time.time()
+        target, seen = url, set()
+        with self._lock:
+            for _ in range(MAX_HOPS):
+                key = normalize_url(target)
+                hop = self._hops.get(key)
+                if hop is None or key in seen:
+                    break
+                seen.add(key)
+                location, _, expiry = hop
+                if expiry is not None and expiry <= now:
+                    del self._hops[key]
+                    break
+                target = location
+        if target != url:
+            self._count('redirect_hit')
+        return target
+
+    def forget(self, urls):
+        """直达的地址失败了：丢掉从这些地址出发的整条跳转"""
+        with self._lock:
+            for url in urls:
+                key = normalize_url(url)
+                for _ in range(MAX_HOPS):
+                    hop = self._hops.pop(key, None)
+                    if hop is None:
+                        break
+                    key = normalize_url(hop[0])
+        self._count('redirect_stale')
+
+
+def shared_targets(results):
+    """
+    results 为 (group, title, url, ProbeResult)：按最终地址归并经过跳转的条目，
+    返回 {最终地址: [(group, title, url), ...]}，只保留被两个以上不同入口共用的，条目多的在前
+    """
+    targets = OrderedDict()
+    for group, title, url, result in results:
+        if result.final_url:
+            targets.setdefault(result.final_url, []).append((group, title, url))
+    shared = [(final, entries) for final, entries in targets.items()
+              if len({normalize_url(url) for _, _, url in entries}) > 1]
+    shared.sort(key=lambda item: -len(item[1]))
+    return OrderedDict(shared)
+
+
+def shared_summary_lines(shared):
+    if not shared:
+        return []
+    entries = sum(len(items) for items in shared.values())
+    lines = [f"共用跳转目标：{len(shared)} 个最终地址被 {entries} 条不同入口的条目共用"]
+    for final, items in list(shared.items())[:SHARED_TOP]:
+        names = '、'.join(title for _, title, _ in items[:3]) + (' 等' if len(items) > 3 else '')
+        lines.append(f"  {final} ← {len(items)} 条（{names}）")
+    return lines
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+按主机调度：每个主机单独限制并发数和请求速率，取代每条检测后的全局随机延迟。
+对单个源站保持克制，总吞吐随不同主机数量增长。
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from itertools import islice
+
+from .urls import host_of
+
+
+def interleave_by_host(entries, window=512):
+    """
+    按主机轮转排列 (group, title, url)，避免同一主机的条目扎堆占满所有工作线程。
+    流式输入时每次只在 window 条的范围内重排。
+    """
+    entries = iter(entries)
+    while True:
+        buckets = OrderedDict()
+        for entry in islice(entries, window):
+            buckets.setdefault(host_of(entry[2]), []).append(entry)
+        if not buckets:
+            return
+        queues = [iter(b) for b in buckets.values()]
+        while queues:
+            alive = []
+            for it in queues:
+                entry = next(it, None)
+                if entry is not None:
+                    yield entry
+                    alive.append(it)
+            queues = alive
+
+
+class HostScheduler:
+    """
+    速率：GCRA（虚拟排程时间），每个主机每秒 rate 次检测，允许 burst 次突发；
+    一次检测只在开始联网时计一次，之后的 variant / 分片 / 重试 / FFmpeg 不再计。rate <= 0 表示不限速。
+    并发：每个主机同时最多 concurrency 个请求。
+    不阻塞调用方：主机没空或还没到发送时间时告诉引擎，引擎把检测暂存起来，工作者先去处理别的主机。
+    """
+
+    def __init__(self, concurrency=4, rate=20.0, burst=2, stats=None):
+        self.concurrency = concurrency
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.tolerance = self.interval * max(burst - 1, 0)
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._tat = defaultdict(float)      # 主机 -> 理论下一次可发时间
+        self._active = defaultdict(int)     # 主机 -> 在途请求数
+        self._waiting = defaultdict(deque)  # 主机 -> 等在途名额的检测（引擎的任务对象）
+
+    def reserve(self, host):
+        """预约一次检测，返回需要等待的秒数"""
+        with self._lock:
+            delay = self._reserve(host)
+        self._count_wait(delay)
+        return delay
+
+    def _reserve(self, host):
+        if not self.interval:
+            return 0.0
+        now = time.monotonic()
+        tat = max(self._tat[host], now)
+        start = max(now, tat - self.tolerance)
+        self._tat[host] = tat + self.interval
+        return start - now
+
+    def _count_wait(self, delay):
+        if delay > 0 and self.stats is not None:
+            self.stats.incr('sched_waits')
+            self.stats.incr('sched_wait_ms', int(delay * 1000))
+
+    def try_acquire(self, host, item, charge):
+        """
+        为 item 占用 host 的一个在途名额；charge 为 True 时先按速率预约一次检测。返回：
+          0      已预约并占用名额（调用方用完后 release）
+          > 0    已预约，但还要等这么多秒（没占名额，到点后以 charge=False 再来）
+          None   在途名额已满，没有预约，item 暂存在该主机的等待队列，有名额空出时由 release 交回
+        """
+        with self._lock:
+            if self._active.get(host, 0) >= self.concurrency:
+                self._waiting[host].append(item)
+                return None
+            delay = self._reserve(host) if charge else 0.0
+            if delay <= 0:
+                self._active[host] += 1
+        self._count_wait(delay)
+        return max(delay, 0.0)
+
+    def release(self, host):
+        """归还名额；返回该主机等待队列里的下一个 item（没有为 None），调用方把它放回队列"""
+        with self._lock:
+            self._active[host] -= 1
+            if self._active[host] <= 0:
+                del self._active[host]
+            waiting = self._waiting.get(host)
+            if not waiting:
+                return None
+            item = waiting.popleft()
+            if not waiting:
+                del self._waiting[host]
+            return item
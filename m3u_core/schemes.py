@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+非 HTTP 直播源的轻量探测（不发 GET、不启动 FFmpeg）
+  rtsp://  发一个 DESCRIBE，回应 RTSP/1.0 200 说明流存在
+  rtmp://  完成 RTMP 握手的前半段（C0+C1 → S0+S1），确认对端是 RTMP 服务
+  p3p://   私有 P2P 协议，只能确认主机端口能连上
+"""
+
+import os
+import re
+from urllib.parse import urlsplit
+
+from .ops import Exchange, ExchangeResult, describe_error
+
+DEFAULT_PORTS = {'rtsp': 554, 'rtmp': 1935}
+NATIVE_SCHEMES = ('rtsp', 'rtmp', 'p3p')
+METHODS = {'rtsp': 'rtsp', 'rtmp': 'rtmp', 'p3p': 'tcp'}
+
+RTSP_REPLY_BYTES = 4096
+RTMP_VERSION = 3
+RTMP_SIG_SIZE = 1536
+
+_RTSP_STATUS = re.compile(rb'^RTSP/\d\.\d\s+(\d{3})')
+
+
+def scheme_of(url):
+    return url.split('://', 1)[0].lower() if '://' in url else ''
+
+
+def _address(url, scheme):
+    """返回 (host, port)；端口不合法（如 p3p 常见的 75234）时抛 ValueError"""
+    parts = urlsplit(url)
+    port = parts.port or DEFAULT_PORTS.get(scheme)
+    if not parts.hostname or not port:
+        raise ValueError("缺少主机或端口")
+    return parts.hostname, port
+
+
+def address_error(url):
+    """地址本身无法连接时返回原因（重试也没用），否则 None"""
+    scheme = scheme_of(url)
+    try:
+        _address(url, scheme)
+    except ValueError as e:
+        return f"{scheme} 地址无效（{e}）"
+    return None
+
+
+def rtsp_describe(url, user_agent, cseq=1):
+    return (f"DESCRIBE {url} RTSP/1.0\r\n"
+            f"CSeq: {cseq}\r\n"
+            f"Accept: application/sdp\r\n"
+            f"User-Agent: {user_agent}\r\n\r\n").encode('utf-8', errors='ignore')
+
+
+def rtmp_c0c1():
+    # C1：4 字节时间 + 4 字节 0 + 1528 字节随机数
+    return bytes([RTMP_VERSION]) + bytes(8) + os.urandom(RTMP_SIG_SIZE - 8)
+
+
+def stream_steps(url, user_agent, timeout):
+    """
+    探测一个非 HTTP 地址，return (ok, status, reason, reply)
+    status 为 RTSP 状态码，其余为 None；reply 为引擎返回的 ExchangeResult
+    """
+    scheme = scheme_of(url)
+    error = address_error(url)
+    if error:
+        return False, None, error, ExchangeResult(error=ValueError(error))
+    host, port = _address(url, scheme)
+
+    if scheme == 'rtsp':
+        reply = yield Exchange(host, port, rtsp_describe(url, user_agent), RTSP_REPLY_BYTES,
+                               until=b'\r\n\r\n', timeout=timeout)
+        if reply.error is not None:
+            return False, None, f"RTSP 连接失败（{describe_error(reply.error)}）", reply
+        m = _RTSP_STATUS.match(reply.data)
+        if not m:
+            return False, None, "不是 RTSP 服务", reply
+        status = int(m.group(1))
+        return status == 200, status, '' if status == 200 else f"RTSP {status}", reply
+
+    if scheme == 'rtmp':
+        reply = yield Exchange(host, port, rtmp_c0c1(), 1 + RTMP_SIG_SIZE, timeout=timeout)
+        if reply.error is not None:
+            return False, None, f"RTMP 连接失败（{describe_error(reply.error)}）", reply
+        if len(reply.data) < 1 + RTMP_SIG_SIZE or reply.data[0] != RTMP_VERSION:
+            return False, None, "RTMP 握手失败", reply
+        return True, None, '', reply
+
+    reply = yield Exchange(host, port, timeout=timeout)
+    if reply.error is not None:
+        return False, None, f"{scheme} 端口连不上（{describe_error(reply.error)}）", reply
+    return True, None, '', reply
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+分片：把 (group, title, url) 按分组装进 N 个大小相近的分片，每个分片交给一台机器 / 一个进程检测。
+按条目数（'count'）或预计探测开销（'cost'，见 estimate_cost）均衡；分组尽量不拆开，
+只有超过上限（默认为平均每片的大小）的分组才切成几段。分配用 LPT：从大到小放进当前最轻的分片。
+分片列表和各分片的组成写在 manifest.json 里。
+"""
+
+import heapq
+import json
+import os
+import re
+import time
+
+from .schemes import NATIVE_SCHEMES, scheme_of
+
+MANIFEST_FILE = 'manifest.json'
+BALANCE_MODES = ('count', 'cost')
+
+# 预计探测开销，单位约为一次 HTTP 请求
+HLS_COST = 3.0            # 播放列表 + variant + 一个分片
+HTTP_COST = 1.0
+NATIVE_COST = 1.0         # rtsp DESCRIBE / rtmp 握手 / p3p 建连
+CACHED_COST = 0.05        # 结果缓存有效期内的 URL 不会联网
+
+_HLS = re.compile(r'\.m3u8?(?:$|[?#])', re.IGNORECASE)
+
+
+def estimate_cost(url, cache=None):
+    """一条 URL 的预计探测开销；cache 为 ResultCache 时，缓存里还有效的按 CACHED_COST 计"""
+    if cache is not None and cache.get(url) is not None:
+        return CACHED_COST
+    if scheme_of(url) in NATIVE_SCHEMES:
+        return NATIVE_COST
+    return HLS_COST if _HLS.search(url) else HTTP_COST
+
+
+class Shard:
+    __slots__ = ('index', 'weight', 'groups')
+
+    def __init__(self, index):
+        self.index = index
+        self.weight = 0.0
+        self.groups = {}          # 分组 -> 本分片中该分组的条目（同一分组的几段合在一起）
+
+    def add(self, group, items, weight):
+        self.groups.setdefault(group, []).extend(items)
+        self.weight += weight
+
+    @property
+    def entries(self):
+        return [entry for items in self.groups.values() for entry in items]
+
+    def __len__(self):
+        return sum(len(items) for items in self.groups.values())
+
+
+def _pieces(group, items, weights, cap):
+    """按 cap 切开过大的分组，返回 [(权重, group, items)]"""
+    if sum(weights) <= cap:
+        return [(sum(weights), group, items)]
+    pieces, start, acc = [], 0, 0.0
+    for i, w in enumerate(weights):
+        if acc and acc + w > cap:
+            pieces.append((acc, group, items[start:i]))
+            start, acc = i, 0.0
+        acc += w
+    pieces.append((acc, group, items[start:]))
+    return pieces
+
+
+def balance(entries, shards, by='count', cap=None, cache=None):
+    """
+    entries 为 (group, title, url)，返回 shards 个 Shard（空分片不返回）。
+    cap 为单个分组不拆开时允许的最大权重，默认为平均每片的权重；
+    分片内同一分组的条目排在一起，保持原顺序。
+    """
+    if by not in BALANCE_MODES:
+        raise ValueError(f"未知的均衡方式: {by}（可选 {' / '.join(BALANCE_MODES)}）")
+    grouped = {}
+    for entry in entries:
+        items, weights = grouped.setdefault(entry[0], ([], []))
+        items.append(entry)
+        weights.append(1.0 if by == 'count' else estimate_cost(entry[2], cache))
+
+    shards = max(1, shards)
+    total = sum(sum(w) for _, w in grouped.values())
+    cap = cap or total / shards
+    pieces = []
+    for group, (items, weights) in grouped.items():
+        pieces.extend(_pieces(group, items, weights, cap))
+    # 稳定排序：权重相同的按分组首次出现的顺序
+    order = sorted(range(len(pieces)), key=lambda i: -pieces[i][0])
+
+    result = [Shard(i) for i in range(shards)]
+    heap = [(0.0, i) for i in range(shards)]
+    for i in order:
+        weight, group, items = pieces[i]
+        _, idx = heapq.heappop(heap)
+        result[idx].add(group, items, weight)
+        heapq.heappush(heap, (result[idx].weight, idx))
+    return [s for s in result if s.groups]
+
+
+def write_shards(output_dir, shards, source='', by='count', prefix='shard'):
+    """写出 <prefix>_01.m3u ... 和 manifest.json，返回 manifest 路径"""
+    os.makedirs(output_dir, exist_ok=True)
+    width = max(2, len(str(len(shards))))
+    listing = []
+    for n, shard in enumerate(shards, 1):
+        name = f"{prefix}_{n:0{width}d}.m3u"
+        with open(os.path.join(output_dir, name), 'w', encoding='utf-8-sig') as f:
+            f.write("#EXTM3U\n")
+            for group, title, url in shard.entries:
+                f.write(f'#EXTINF:-1 group-title="{group}",{title}\n{url}\n')
+        listing.append({'file': name, 'entries': len(shard), 'weight': round(shard.weight, 2),
+                        'groups': {group: len(items) for group, items in shard.groups.items()}})
+    # 上次分得更多时留下的分片文件，不删的话容易被误当成这次的
+    names = {item['file'] for item in listing}
+    for name in os.listdir(output_dir):
+        if re.fullmatch(re.escape(prefix) + r'_\d+\.m3u', name) and name not in names:
+            os.remove(os.path.join(output_dir, name))
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'source': os.path.abspath(source) if source else '', 'created': time.time(),
+                   'balance': by, 'shards': listing}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def read_manifest(path):
+    """读取 manifest.json，分片文件名换成绝对路径"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    for shard in manifest['shards']:
+        shard['path'] = os.path.join(base, shard['file'])
+    return manifest
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+按文件头识别返回的内容（纯 Python，不启动 FFmpeg）
+返回 200 但不是播放列表时，先用规则表看前几 KB：MPEG-TS、MP4、FLV、MKV、音频流、DASH / Smooth Streaming
+清单直接判有效，HTML 页面（错误页、登录页）直接判失效。
+每条规则给出 0~1 的置信度，最高的不低于 CONFIDENT 才下结论；
+JSON / 纯文本可能是 FFmpeg 认识的其他清单格式，置信度低于 CONFIDENT，不下结论，仍交给 FFmpeg；
+只读到几个字节、TS 同步字节对不齐、不认识的格式也交给 FFmpeg。
+"""
+
+from dataclasses import dataclass
+
+CONFIDENT = 0.9
+TS_PACKET = 188
+M2TS_PACKET = 192         # 蓝光 / 部分 IPTV 组播转出的 TS，每包前多 4 字节时间戳
+TS_SYNC = 0x47
+TS_MIN_PACKETS = 3        # 至少对上这么多个包才算确定是 TS
+TEXT_PROBE = 512          # 判断是否为文本看的字节数
+UNSURE = 0.6              # JSON / 纯文本的置信度（低于 CONFIDENT，不下结论）
+
+# MP4 顶层 box：ftyp 是完整文件的开头，styp / moof / sidx 是 fMP4 分片的开头
+_MP4_BOXES = {b'ftyp': 1.0, b'styp': 0.95, b'moof': 0.95, b'sidx': 0.95, b'moov': 0.9, b'free': 0.6}
+_HTML_HEADS = (b'<!doctype html', b'<html', b'<head', b'<body', b'<script', b'<title')
+_XML_DECL = b'<?xml'
+
+
+@dataclass
+class Sniff:
+    kind: str = None          # 'ts' | 'mp4' | 'flv' | 'mkv' | 'mp3' | 'aac' | 'mpd' | 'ism' | 'html' | 'json' | 'text' | None
+    media: bool = False       # 是否为可以播放的媒体流
+    confidence: float = 0.0
+
+    @property
+    def conclusive(self):
+        return self.kind is not None and self.confidence >= CONFIDENT
+
+
+def _ts(chunk, packet=TS_PACKET, sync_at=0):
+    """同步字节每 packet 字节出现一次；流可能从包中间开始，所以在第一个包内找起点"""
+    best = 0.0
+    for start in range(sync_at, min(packet, len(chunk))):
+        if chunk[start] != TS_SYNC:
+            continue
+        syncs = chunk[start::packet]
+        if len(syncs) < 2:
+            break
+        matched = syncs.count(TS_SYNC)
+        best = max(best, matched / len(syncs) * min(1.0, len(syncs) / TS_MIN_PACKETS))
+        if best >= 1.0:
+            break
+    return best
+
+
+def _m2ts(chunk):
+    return _ts(chunk, M2TS_PACKET, sync_at=4)
+
+
+def _mp4(chunk):
+    size = int.from_bytes(chunk[:4], 'big')
+    if len(chunk) < 8 or size not in (0, 1) and size < 8:   # 0：box 到文件末尾，1：64 位长度
+        return 0.0
+    return _MP4_BOXES.get(chunk[4:8], 0.0)
+
+
+def _flv(chunk):
+    # FLV 版本 1，头长度 9，标志位只有音频（0x04）/ 视频（0x01）两位
+    if chunk[:4] != b'FLV\x01' or len(chunk) < 9:
+        return 0.0
+    return 1.0 if chunk[4] & ~0x05 == 0 and int.from_bytes(chunk[5:9], 'big') == 9 else 0.7
+
+
+def _mkv(chunk):
+    return 0.95 if chunk[:4] == b'\x1a\x45\xdf\xa3' else 0.0
+
+
+def _mp3(chunk):
+    return 0.9 if chunk[:3] == b'ID3' else 0.0
+
+
+def _aac(chunk):
+    """ADTS：12 位同步字；按帧长找到下一帧也对上同步字才确定"""
+    if len(chunk) < 7 or chunk[0] != 0xFF or chunk[1] & 0xF6 != 0xF0:
+        return 0.0
+    length = (chunk[3] & 0x03) << 11 | chunk[4] << 3 | chunk[5] >> 5
+    nxt = chunk[length:length + 2]
+    if length >= 7 and len(nxt) == 2:
+        return 0.95 if nxt[0] == 0xFF and nxt[1] & 0xF6 == 0xF0 else 0.0
+    return 0.5
+
+
+def _lead(chunk):
+    return chunk[:TEXT_PROBE].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+
+
+def _manifest(chunk, root):
+    """XML 清单：根元素（可能在 XML 声明、注释之后）为 root"""
+    head = _lead(chunk)
+    if head.startswith(root):
+        return 1.0
+    return 0.95 if head.startswith((_XML_DECL, b'<!--')) and root in head else 0.0
+
+
+def _mpd(chunk):
+    return _manifest(chunk, b'<mpd')
+
+
+def _ism(chunk):
+    return _manifest(chunk, b'<smoothstreamingmedia')
+
+
+def _html(chunk):
+    head = _lead(chunk)
+    if head.startswith(_HTML_HEADS):
+        return 1.0
+    return 0.9 if b'<html' in head or b'<body' in head else 0.0
+
+
+def _json(chunk):
+    head = _lead(chunk)
+    return UNSURE if head[:1] in (b'{', b'[') and head[1:2] in (b'"', b'{', b'[', b']', b'}') else 0.0
+
+
+def _text(chunk):
+    """没有控制字符的 UTF-8 文本（媒体流的头几百字节里总有非文本字节）"""
+    head = chunk[:TEXT_PROBE]
+    if len(head) < 16 or any(b < 0x20 and b not in (0x09, 0x0A, 0x0D) for b in head):
+        return 0.0
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:       # 末尾被截断的多字节字符不算
+            return 0.0
+    return UNSURE
+
+
+# (名称, 是否为媒体流, 判断函数)；按顺序比较，置信度相同时前面的优先
+RULES = (
+    ('ts', True, _ts),
+    ('ts', True, _m2ts),
+    ('mp4', True, _mp4),
+    ('flv', True, _flv),
+    ('mkv', True, _mkv),
+    ('mp3', True, _mp3),
+    ('aac', True, _aac),
+    ('mpd', True, _mpd),
+    ('ism', True, _ism),
+    ('html', False, _html),
+    ('json', False, _json),
+    ('text', False, _text),
+)
+
+
+def sniff(chunk):
+    """按规则表识别 chunk，返回置信度最高的 Sniff（都不像时 kind 为 None）"""
+    best = Sniff()
+    if not chunk:
+        return best
+    for kind, media, rule in RULES:
+        confidence = rule(chunk)
+        if confidence > best.confidence:
+            best = Sniff(kind, media, confidence)
+            if confidence >= 1.0:
+                break
+    return best
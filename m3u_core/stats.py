@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+运行统计：线程 / 协程安全的计数器、延迟直方图和按主机的成败统计，
+检测结束时输出汇总，也可导出为 JSON 用来调整并发数和超时。
+多进程检测时，各进程定期把 state() 发给父进程，父进程 absorb() 后读到的是所有进程的合计。
+"""
+
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+
+from .metrics import Histogram, RateMeter
+
+# 记录的耗时（毫秒）：
+#   dns / connect  域名解析（只记未命中 DNS 缓存的）/ 建立连接（含 TLS；线程模式的 connect 含查 DNS 缓存）
+#   ttfb           发出请求到收到响应头（需要新建连接时包含 dns / connect）
+#   body           读取响应内容
+#   media          FFmpeg/ffprobe 运行时间
+#   check          一条 URL 从开始探测到得出结论
+TIMINGS = (('check', '检测'), ('dns', 'DNS'), ('connect', '连接'), ('ttfb', 'TTFB'),
+           ('body', '读取'), ('media', 'FFmpeg'))
+TOP_HOSTS = 3
+
+
+def _fmt_ms(ms):
+    return f"{ms:.0f}ms" if ms < 1000 else f"{ms / 1000:.2f}s"
+
+
+def _fmt_bytes(n):
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == 'B' else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.2f}GB"
+
+
+class RunStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._gauges = {}
+        self._hists = defaultdict(Histogram)
+        self._rates = defaultdict(RateMeter)
+        self._hosts = defaultdict(Counter)
+        self._remote = {}         # 其他进程 -> 最近一次 state()
+        self.started = time.time()
+
+    def incr(self, key, n=1):
+        with self._lock:
+            self._counts[key] += n
+
+    def gauge(self, key, value):
+        """记录当前值（如队列深度），同时保留最大值 key_max"""
+        with self._lock:
+            self._gauges[key] = value
+            if value > self._counts[f'{key}_max']:
+                self._counts[f'{key}_max'] = value
+
+    def observe(self, key, ms):
+        """记录一次耗时（毫秒）到直方图 key"""
+        with self._lock:
+            self._hists[key].observe(ms)
+
+    def mark(self, key, n=1):
+        """计数并计入实时速率（如每秒检测条数）"""
+        with self._lock:
+            self._counts[key] += n
+            self._rates[key].mark(n)
+
+    def rate(self, key):
+        with self._lock:
+            meter = self._rates.get(key)
+            rate = meter.rate() if meter is not None else 0.0
+            return rate + sum(st['rates'].get(key, 0.0) for st in self._remote.values())
+
+    def percentile(self, key, p):
+        with self._lock:
+            hist = self._merged_hists().get(key)
+            return hist.percentile(p) if hist is not None else 0.0
+
+    def host_result(self, host, ok, ms=None):
+        with self._lock:
+            h = self._hosts[host]
+            h['ok' if ok else 'fail'] += 1
+            if ms is not None:
+                h['check_ms'] += ms
+
+    def current(self, key):
+        with self._lock:
+            return self._gauges.get(key, 0) + sum(st['gauges'].get(key, 0) for st in self._remote.values())
+
+    def get(self, key):
+        with self._lock:
+            return self._merged_counts()[key]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._merged_counts())
+
+    # ================== 多进程合并 ==================
+    def state(self):
+        """本进程的原始统计（可序列化）"""
+        with self._lock:
+            return {'counts': dict(self._counts), 'gauges': dict(self._gauges),
+                    'hists': {key: hist.state() for key, hist in self._hists.items()},
+                    'rates': {key: meter.rate() for key, meter in self._rates.items()},
+                    'hosts': {host: dict(h) for host, h in self._hosts.items()}}
+
+    def absorb(self, source, state):
+        """记下进程 source 最近一次的 state()（替换上一次的，不累加）"""
+        with self._lock:
+            self._remote[source] = state
+
+    def _merged_counts(self):
+        if not self._remote:
+            return self._counts
+        counts = Counter(self._counts)
+        for st in self._remote.values():
+            counts.update(st['counts'])
+        return counts
+
+    def _merged_hists(self):
+        if not self._remote:
+            return self._hists
+        hists = defaultdict(Histogram)
+        for key, hist in self._hists.items():
+            hists[key].merge(hist.state())
+        for st in self._remote.values():
+            for key, data in st['hists'].items():
+                hists[key].merge(data)
+        return hists
+
+    def _merged_hosts(self):
+        if not self._remote:
+            return self._hosts
+        hosts = defaultdict(Counter)
+        for host, h in self._hosts.items():
+            hosts[host].update(h)
+        for st in self._remote.values():
+            for host, h in st['hosts'].items():
+                hosts[host].update(h)
+        return hosts
+
+    def to_dict(self):
+        with self._lock:
+            gauges = dict(self._gauges)
+            for st in self._remote.values():
+                for key, value in st['gauges'].items():
+                    gauges[key] = gauges.get(key, 0) + value
+            hosts = {}
+            for host, h in self._merged_hosts().items():
+                n = h['ok'] + h['fail']
+                hosts[host] = {'ok': h['ok'], 'fail': h['fail'],
+                               'mean_check_ms': round(h['check_ms'] / n, 1) if n else 0.0}
+            return {
+                'started': self.started,
+                'duration_s': round(time.time() - self.started, 3),
+                'counters': dict(self._merged_counts()),
+                'gauges': gauges,
+                'latency': {key: hist.to_dict() for key, hist in self._merged_hists().items()},
+                'hosts': hosts,
+            }
+
+    def export_json(self, path, **extra):
+        """extra 为附加的顶层字段（如各主机当前的超时）"""
+        data = self.to_dict()
+        data.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def summary_lines(self):
+        c, d = self.snapshot(), self.to_dict()
+        lines = []
+        if c.get('resumed'):
+            lines.append(f"断点续检：{c['resumed']} 条沿用中断前已得出的结论")
+        if c.get('history_scheduled'):
+            lines.append(f"检测历史：{c['history_scheduled']} 条按变化概率排序，"
+                         f"时间预算用完后 {c.get('history_deferred', 0)} 条沿用上次结论")
+        if c.get('dedup_saved'):
+            saved, total = c['dedup_saved'], c.get('entries', 0)
+            pct = saved / total * 100 if total else 0
+            lines.append(f"URL 去重：{total} 条中 {saved} 条与其他条目重复，少探测 {saved} 次（{pct:.1f}%）")
+        if c.get('cache_hit') or c.get('cache_miss'):
+            hit, miss = c.get('cache_hit', 0), c.get('cache_miss', 0)
+            lines.append(f"结果缓存：命中 {hit}，未命中 {miss}（命中率 {hit / (hit + miss) * 100:.1f}%）")
+        if c.get('playlist_miss'):
+            expired = f"（直播列表过期重抓 {c['playlist_expired']} 次）" if c.get('playlist_expired') else ''
+            lines.append(f"HLS 播放列表：抓取 {c['playlist_miss']} 个，复用本次已抓取的 {c.get('playlist_hit', 0)} 次"
+                         + expired)
+        if c.get('conn_requests'):
+            reqs, new = c['conn_requests'], c.get('conn_new', 0)
+            reused = max(reqs - new, 0)
+            lines.append(f"连接复用：{reused}/{reqs} 次请求复用已有连接（{reused / reqs * 100:.1f}%），新建连接 {new}")
+        if c.get('dns_miss'):
+            fail = f"，其中 {c['dns_fail']} 个解析失败" if c.get('dns_fail') else ''
+            lines.append(f"DNS 缓存：解析 {c['dns_miss']} 次{fail}，命中缓存 {c.get('dns_hit', 0)} 次")
+        if c.get('breaker_open'):
+            lines.append(f"主机熔断：{c['breaker_open']} 次熔断，{c.get('breaker_fast_fail', 0)} 次请求直接判失败，"
+                         f"{c.get('breaker_closed', 0)} 个主机恢复")
+        if c.get('redirect_learned'):
+            stale = f"，其中 {c['redirect_stale']} 次最终地址失效、从入口重走" if c.get('redirect_stale') else ''
+            lines.append(f"跳转缓存：记下 {c['redirect_learned']} 跳，{c.get('redirect_hit', 0)} 次请求直达最终地址{stale}")
+        sniffed = {key[6:]: n for key, n in c.items() if key.startswith('sniff_')}
+        if sniffed:
+            unknown = sniffed.pop('unknown', 0)
+            kinds = ' / '.join(f"{kind.upper()} {n}" for kind, n in sorted(sniffed.items(), key=lambda kv: -kv[1]))
+            lines.append(f"文件头识别：{sum(sniffed.values())} 条直接得出结论" + (f"（{kinds}）" if kinds else '') +
+                         f"，{unknown} 条无法判断")
+        if c.get('range_sent'):
+            retry = f"，{c['range_rejected']} 次被拒绝后改发普通 GET" if c.get('range_rejected') else ''
+            lines.append(f"Range 请求：{c['range_sent']} 次，{c.get('range_supported', 0)} 次只返回所需字节，"
+                         f"{c.get('range_ignored', 0)} 次源站忽略 Range{retry}")
+        if c.get('bytes_in'):
+            checks = d['latency'].get('check', {}).get('count')
+            per_check = f"，平均每条检测 {_fmt_bytes(c['bytes_in'] / checks)}" if checks else ''
+            lines.append(f"流量：读取正文 {_fmt_bytes(c['bytes_in'])}{per_check}")
+        if c.get('timeout_adapted'):
+            expired = c.get('timeout_adapted_expired', 0)
+            lines.append(f"自适应超时：{c['timeout_adapted']} 次请求按主机延迟缩短了超时，"
+                         f"其中 {expired} 次到期（这些主机已退回默认超时）")
+        if c.get('sched_waits'):
+            lines.append(f"主机限速：等待 {c['sched_waits']} 次，共 {c.get('sched_wait_ms', 0) / 1000:.1f}s")
+        for stage, name in (('http', 'HTTP 阶段'), ('media', 'FFmpeg 阶段')):
+            if c.get(f'{stage}_ops'):
+                lines.append(f"{name}：{c[f'{stage}_ops']} 次操作，累计 {c.get(f'{stage}_busy_ms', 0) / 1000:.1f}s，"
+                             f"最大排队 {c.get(f'{stage}_queue_max', 0)}")
+        for key, name in TIMINGS:
+            h = d['latency'].get(key)
+            if h:
+                lines.append(f"{name}耗时 p50/p95/p99：{_fmt_ms(h['p50_ms'])} / {_fmt_ms(h['p95_ms'])} / "
+                             f"{_fmt_ms(h['p99_ms'])}（{h['count']} 次）")
+        failing = sorted(((h['fail'], host, h['ok']) for host, h in d['hosts'].items() if h['fail']),
+                         reverse=True)[:TOP_HOSTS]
+        if failing:
+            lines.append("失效最多的主机：" + "，".join(
+                f"{host} {fail}/{fail + ok}" for fail, host, ok in failing))
+        return lines
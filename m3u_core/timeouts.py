@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+按主机自适应超时：连接超时和读取超时分开设定，各自取该主机最近观测到的延迟 p95 的 FACTOR 倍，
+  连接超时  下限 CONNECT_FLOOR，上限 connect_timeout
+  读取超时  下限 READ_FLOOR，上限为检测策略的 timeout（Fetch.timeout）
+样本少于 MIN_SAMPLES 的主机直接用上限。下限留出 TCP 重传的余量，
+快主机偶发的一次慢响应不会被误判失效；缩短的超时一旦到期，该主机退回上限重新统计；
+慢主机的超时不会超过原来的固定值。
+"""
+
+import threading
+from collections import deque
+
+FACTOR = 4.0
+MIN_SAMPLES = 8
+WINDOW = 64               # 每个主机只看最近的 WINDOW 个样本，主机变慢时超时跟着放宽
+CONNECT_FLOOR = 3.0       # 秒，至少容得下一次 SYN 重传（1s）
+READ_FLOOR = 5.0
+
+
+def _p95(samples):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+
+class HostTimeouts:
+    def __init__(self, connect_timeout=10, adaptive=True, factor=FACTOR, min_samples=MIN_SAMPLES,
+                 stats=None):
+        self.connect_timeout = connect_timeout
+        self.adaptive = adaptive
+        self.factor = factor
+        self.min_samples = min_samples
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._connect = {}        # 主机:端口 -> 最近的建立连接耗时（毫秒）
+        self._ttfb = {}           # 主机:端口 -> 最近的 TTFB（毫秒）
+
+    def _observe(self, table, endpoint, ms):
+        if not self.adaptive:
+            return
+        with self._lock:
+            samples = table.get(endpoint)
+            if samples is None:
+                samples = table[endpoint] = deque(maxlen=WINDOW)
+            samples.append(ms)
+
+    def observe_connect(self, endpoint, ms):
+        self._observe(self._connect, endpoint, ms)
+
+    def observe_ttfb(self, endpoint, ms):
+        self._observe(self._ttfb, endpoint, ms)
+
+    def _adapt(self, table, endpoint, floor, ceiling):
+        samples = table.get(endpoint)
+        if samples is None or len(samples) < self.min_samples:
+            return ceiling
+        return min(max(_p95(samples) / 1000 * self.factor, floor), ceiling)
+
+    def _limits(self, endpoint, timeout):
+        connect_ceiling = min(self.connect_timeout or timeout, timeout)
+        if not self.adaptive:
+            return connect_ceiling, timeout, False
+        with self._lock:
+            connect = self._adapt(self._connect, endpoint, CONNECT_FLOOR, connect_ceiling)
+            read = self._adapt(self._ttfb, endpoint, READ_FLOOR, timeout)
+        return round(connect, 2), round(read, 2), connect < connect_ceiling or read < timeout
+
+    def pick(self, endpoint, timeout):
+        """返回 (连接超时, 读取超时) 秒；timeout 为检测策略的超时（读取超时的上限）"""
+        connect, read, adapted = self._limits(endpoint, timeout)
+        if adapted and self.stats is not None:
+            self.stats.incr('timeout_adapted')
+        return connect, read
+
+    def expired(self, endpoint, phase, used, timeout):
+        """
+        请求超时（phase 为 'connect' | 'read'，used 为当时的 (连接, 读取) 超时）。
+        若用的是缩短过的超时，清空该主机的样本，之后回到上限，直到重新攒够样本——
+        主机变慢时宁可多等，也不连续误判失效。
+        """
+        connect, read = used
+        if phase == 'connect':
+            table, shortened = self._connect, connect < min(self.connect_timeout or timeout, timeout)
+        else:
+            table, shortened = self._ttfb, read < timeout
+        if not shortened:
+            return
+        with self._lock:
+            table.pop(endpoint, None)
+        if self.stats is not None:
+            self.stats.incr('timeout_adapted_expired')
+
+    def to_dict(self, timeout):
+        """各主机当前的超时，导出到统计 JSON"""
+        with self._lock:
+            endpoints = sorted(set(self._connect) | set(self._ttfb))
+        result = {}
+        for endpoint in endpoints:
+            connect, read, _ = self._limits(endpoint, timeout)
+            result[endpoint] = {'connect_s': connect, 'read_s': read,
+                                'samples': len(self._ttfb.get(endpoint, ()))}
+        return result
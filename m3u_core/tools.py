@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+外部工具（FFmpeg）查找：只在需要时查找，结果缓存到磁盘。
+可执行文件的大小和修改时间没变就直接沿用上次的结论，不再每次启动都运行 `ffmpeg -version`。
+"""
+
+import json
+import os
+import shutil
+
+TERMUX_FFMPEG = '/data/data/com.termux/files/usr/bin/ffmpeg'
+CACHE_NAME = 'tools.json'
+
+
+def cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'm3u_checker')
+
+
+def _load(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path, data):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return [st.st_size, int(st.st_mtime)]
+
+
+def _runs(path, marker):
+    import subprocess             # 只在缓存未命中时用到
+    try:
+        result = subprocess.run([path, '-version'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0 and marker in result.stdout
+
+
+def find_tool(name, candidates=(), marker=None, cache_path=None):
+    """
+    依次尝试 candidates 和 PATH 中的 name，返回第一个能运行的路径，找不到返回 None。
+    marker 为 `-version` 输出中必须出现的文字（如 'ffmpeg version'）。
+    """
+    cache_path = cache_path or os.path.join(cache_dir(), CACHE_NAME)
+    cache = _load(cache_path)
+    marker = marker or f'{name} version'
+    paths = [p for p in candidates if p]
+    which = shutil.which(name)
+    if which:
+        paths.append(which)
+
+    for path in dict.fromkeys(paths):
+        try:
+            fingerprint = _fingerprint(path)
+        except OSError:
+            continue
+        key = f'{name}:{path}'
+        known = cache.get(key)
+        if known is not None and known['fingerprint'] == fingerprint:
+            ok = known['ok']
+        else:
+            ok = _runs(path, marker)
+            cache[key] = {'fingerprint': fingerprint, 'ok': ok}
+            _save(cache_path, cache)
+        if ok:
+            return path
+    return None
+
+
+def find_ffmpeg(path=None):
+    """返回 FFmpeg 命令（列表），找不到返回 None；path 为用户指定的路径，优先尝试"""
+    found = find_tool('ffmpeg', (path, TERMUX_FFMPEG))
+    return [found] if found else None
@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+"""
+TVBox 配置爬取与接口检测：
+
+  python -m m3u_core.tvbox av18.json                 # 本地文件或 URL 都可以
+  python -m m3u_core.tvbox https://.../av18.json -o tvbox_output --engine thread
+
+从入口配置出发逐层解析（多仓 urls / storeHouse → 单仓配置），每个 URL 只抓一次；
+再把所有配置里的 sites[].api、spider / jar、lives 的直播列表和频道地址交给检测引擎并发探测，
+最后为每个配置写出只保留可用站点 / 直播的精简版（入口里指向子配置的地址改为 ./文件名，
+整个输出目录放到同一个 HTTP 目录下即可使用），并写出每个地址的检测结果 tvbox_report.json。
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+from dataclasses import replace
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from . import run_checks
+from .context import RunContext
+from .ops import Fetch, HostUnavailable, describe_error
+from .parser import parse_entries
+from .probe import MAX_BYTES, ProbeResult, check_steps
+from .profiles import PROFILES
+
+TVBOX_UA = 'okhttp/3.15'      # TVBox 自己的 UA，部分接口只认它
+CONFIG_BYTES = 4 * 1024 * 1024
+PLAYLIST_BYTES = 1024 * 1024
+REPORT_FILE = 'tvbox_report.json'
+
+# 检测的节点类型（条目的 group）
+CONFIG = 'config'             # 配置（也可能是直接给出的直播列表）
+API_XML = 'api-xml'           # type 0 苹果 XML 接口
+API_JSON = 'api-json'         # type 1 苹果 JSON 接口
+API = 'api'                   # 其他类型的 HTTP 接口，返回 200 即可
+JAR = 'jar'                   # type 3 站点依赖的 spider jar
+LIVE = 'live'                 # 直播列表（m3u / txt）
+STREAM = 'stream'             # 频道直接给出的播放地址，按普通直播源检测
+
+SITE_KINDS = {0: API_XML, 1: API_JSON}
+_COMMENT = re.compile(r'^\s*//.*$', re.MULTILINE)
+
+
+# ================== 配置内容 ==================
+def load_config(text):
+    """解析配置 JSON（允许 // 注释行、**base64 包装），失败返回 None"""
+    text = text.lstrip('\ufeff').strip()
+    for candidate in (text, _COMMENT.sub('', text)):
+        try:
+            data = json.loads(candidate)
+            return data if isinstance(data, dict) else None
+        except ValueError:
+            pass
+    if '**' in text:
+        try:
+            return load_config(base64.b64decode(text.rsplit('**', 1)[1].strip()).decode('utf-8', 'ignore'))
+        except ValueError:
+            pass
+    return None
+
+
+def is_url(value):
+    return isinstance(value, str) and value.lower().startswith(('http://', 'https://'))
+
+
+def resolve(base, ref):
+    """配置里的相对地址（./xx.json）按配置本身的位置解析；本地配置解析成本地路径"""
+    if not isinstance(ref, str) or not ref.strip():
+        return None
+    ref = ref.strip()
+    if is_url(ref):
+        return ref
+    if is_url(base):
+        return urljoin(base, ref)
+    if ref.startswith('file://'):
+        ref = ref[len('file://'):]
+    return os.path.normpath(os.path.join(os.path.dirname(base), ref))
+
+
+def jar_target(spec, base):
+    """spider 写法：url;md5;xxx 或 img+url（jar 藏在图片后面），返回 (地址, 是否要求 zip 头)"""
+    if not isinstance(spec, str) or not spec.strip():
+        return None, False
+    url = spec.split(';', 1)[0].strip()
+    disguised = url.startswith('img+')
+    if disguised:
+        url = url[len('img+'):]
+    return resolve(base, url), not disguised
+
+
+def _dicts(value):
+    """手写配置里的数组字段：只取其中的对象，字符串 / 数组之类的条目跳过"""
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+
+def _urls(value):
+    """频道的 urls：地址数组，手写配置里也可能直接写一个地址"""
+    if isinstance(value, str):
+        return [value]
+    return [url for url in value if isinstance(url, str)] if isinstance(value, list) else []
+
+
+def live_target(url):
+    """proxy://do=live&type=txt&ext=<URL 或 base64(URL)> 取出真正的直播列表地址"""
+    if not isinstance(url, str) or not url.startswith('proxy://'):
+        return url
+    ext = parse_qs(url[len('proxy://'):]).get('ext', [''])[0]
+    if ext and not is_url(ext):
+        try:
+            ext = base64.b64decode(ext + '=' * (-len(ext) % 4)).decode('utf-8', 'ignore').strip()
+        except ValueError:
+            return None
+    return ext if is_url(ext) else None
+
+
+def children_of(config, base):
+    """多仓配置（urls / storeHouse）列出的子配置 [(名称, 地址)]"""
+    found = []
+    for item in config.get('urls') or ():
+        if isinstance(item, dict):
+            found.append((item.get('name') or '', resolve(base, item.get('url'))))
+    for item in config.get('storeHouse') or ():
+        if isinstance(item, dict):
+            found.append((item.get('sourceName') or '', resolve(base, item.get('sourceUrl'))))
+    return [(name, url) for name, url in found if url]
+
+
+def site_node(site, config, base):
+    """站点要检测的 (类型, 地址)；无法检测（如本地 jar、非 HTTP 接口）返回 None"""
+    if not isinstance(site, dict):
+        return None
+    if site.get('type') == 3:
+        url, zipped = jar_target(site.get('jar') or config.get('spider'), base)
+        return (JAR if zipped else API, url) if is_url(url) else None
+    api = resolve(base, site.get('api'))
+    if not is_url(api):
+        return None
+    return SITE_KINDS.get(site.get('type'), API), api
+
+
+def live_nodes(live):
+    """直播条目要检测的 [(类型, 名称, 原地址, 检测地址)]"""
+    if not isinstance(live, dict):
+        return []
+    nodes = []
+    url = live.get('url')
+    if isinstance(url, str) and url:
+        nodes.append((LIVE, live.get('name') or live.get('group') or '', url, live_target(url)))
+    for channel in _dicts(live.get('channels')):
+        name = channel.get('name') or ''
+        for url in _urls(channel.get('urls')):
+            if url.startswith('proxy://'):
+                nodes.append((LIVE, name, url, live_target(url)))
+            else:
+                nodes.append((STREAM, name, url, url))
+    return nodes
+
+
+def endpoints_of(config, base):
+    """一个配置里所有要检测的 (类型, 名称, 地址)"""
+    found = []
+    spider, zipped = jar_target(config.get('spider'), base)
+    if is_url(spider):
+        found.append((JAR if zipped else API, 'spider', spider))
+    for site in config.get('sites') or ():
+        node = site_node(site, config, base)
+        if node is not None:
+            found.append((node[0], site.get('name') or site.get('key') or '', node[1]))
+    for live in _dicts(config.get('lives')):
+        for kind, name, _, target in live_nodes(live):
+            if target:
+                found.append((kind, name, target))
+    return found
+
+
+# ================== 检测流程 ==================
+def _looks_json(text):
+    return text[:1] in ('{', '[')
+
+
+def _looks_xml(text):
+    head = text[:64].lower()
+    return head.startswith('<') and not head.startswith(('<!doctype html', '<html'))
+
+
+def node_steps(kind, name, url, profile):
+    """TVBox 节点的检测流程（CheckProfile.steps），return ProbeResult"""
+    if kind == STREAM:
+        return (yield from check_steps(kind, name, url, profile))
+
+    max_bytes = {CONFIG: CONFIG_BYTES, LIVE: PLAYLIST_BYTES}.get(kind, MAX_BYTES)
+    resp = yield Fetch(url, {'User-Agent': TVBOX_UA}, profile.timeout, max_bytes)
+    if resp.error is not None:
+        reason = describe_error(resp.error)
+        if not isinstance(resp.error, HostUnavailable):
+            print(f"   [异常] {name}: {reason}")
+        return ProbeResult(reason=reason, timeouts=resp.timeouts)
+    result = ProbeResult(status=resp.status, timeouts=resp.timeouts, ttfb_ms=resp.ttfb_ms)
+    if resp.status not in (200, 206):
+        print(f"   [HTTP {resp.status}] {name}")
+        result.reason = f"HTTP {resp.status}"
+        return result
+
+    text = resp.body.decode('utf-8', errors='ignore').lstrip('\ufeff').strip()
+    if kind == CONFIG:
+        result.payload = load_config(text)
+        if result.payload is None:
+            # 多仓里也会直接放直播列表（如 iptv18.m3u）
+            result.ok = any(True for _ in parse_entries(text.splitlines()))
+            result.method = 'playlist'
+            result.reason = '' if result.ok else "不是 TVBox 配置，也不是直播列表"
+        else:
+            result.ok, result.method = True, 'config'
+    elif kind == LIVE:
+        result.ok = any(True for _ in parse_entries(text.splitlines()))
+        result.reason = '' if result.ok else "直播列表里没有频道"
+    elif kind == JAR:
+        result.ok = resp.body.startswith(b'PK')
+        result.reason = '' if result.ok else "不是 jar（zip）文件"
+    elif kind == API_JSON:
+        result.ok = _looks_json(text)
+        result.reason = '' if result.ok else "接口返回的不是 JSON"
+    elif kind == API_XML:
+        result.ok = _looks_xml(text) or _looks_json(text)
+        result.reason = '' if result.ok else "接口返回的不是 XML"
+    else:
+        result.ok = True
+    return result
+
+
+# ================== 爬取 ==================
+class TvboxCrawl:
+    def __init__(self, ctx, profile):
+        self.ctx = ctx
+        self.profile = replace(profile, steps=node_steps)
+        self.configs = {}         # 地址 -> 配置内容（按抓取顺序）
+        self.names = {}           # 地址 -> 名称
+        self.kinds = {}           # 地址 -> 节点类型
+        self.verdicts = {}        # 地址 -> ProbeResult
+
+    def _probe(self, nodes):
+        def on_result(kind, name, url, result):
+            self.verdicts[url] = result
+            self.names.setdefault(url, name)
+            self.kinds.setdefault(url, kind)
+            print(f"{'可用' if result.ok else '失效'} [{kind}] {name}")
+        run_checks([n for n in nodes if n[2] not in self.verdicts], self.profile, on_result, self.ctx)
+
+    def _add_local(self, path, name):
+        with open(path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+            text = f.read()
+        config = load_config(text)
+        ok = config is not None or any(True for _ in parse_entries(text.splitlines()))
+        self.verdicts[path] = ProbeResult(ok, method='config' if config is not None else 'playlist',
+                                          reason='' if ok else "不是 TVBox 配置，也不是直播列表", payload=config)
+        if config is not None:
+            self.configs[path] = config
+        return config
+
+    def crawl(self, root):
+        """逐层解析配置，再并发检测所有接口；返回 self"""
+        wave = [(CONFIG, os.path.basename(root) if not is_url(root) else root, root)]
+        while wave:
+            remote = []
+            for node in wave:
+                self.names.setdefault(node[2], node[1])
+                self.kinds.setdefault(node[2], CONFIG)
+                if is_url(node[2]):
+                    remote.append(node)
+                elif node[2] not in self.verdicts and os.path.isfile(node[2]):
+                    self._add_local(node[2], node[1])
+            self._probe(remote)
+            next_wave = []
+            for _, _, url in wave:
+                result = self.verdicts.get(url)
+                if result is None or not result.ok or not isinstance(result.payload, dict):
+                    continue
+                self.configs.setdefault(url, result.payload)
+                for name, child in children_of(result.payload, url):
+                    if child not in self.verdicts and child not in self.names:
+                        next_wave.append((CONFIG, name, child))
+            wave = next_wave
+
+        endpoints = []
+        for url, config in self.configs.items():
+            endpoints.extend(endpoints_of(config, url))
+        print(f"\n{len(self.configs)} 个配置，{len(endpoints)} 个接口 / 直播地址待检测\n")
+        self._probe(endpoints)
+        return self
+
+    # ================== 精简配置 ==================
+    def ok(self, url):
+        """没检测（无法检测）的地址算可用，精简时保留"""
+        result = self.verdicts.get(url) if url else None
+        return result is None or result.ok
+
+    def site_ok(self, site, config, base):
+        node = site_node(site, config, base)
+        return node is None or self.ok(node[1])
+
+    def prune(self, config, base, local_names=None):
+        """只保留可用的站点、直播和子配置；local_names 为已写出的子配置地址 -> 文件名"""
+        local_names = local_names or {}
+        pruned = dict(config)
+        spider, _ = jar_target(config.get('spider'), base)
+        if is_url(spider) and not self.ok(spider):
+            del pruned['spider']      # 靠它的 type 3 站点（没写自己的 jar）在 site_ok 里一并去掉
+        if 'sites' in config:
+            pruned['sites'] = [site for site in _dicts(config['sites']) if self.site_ok(site, config, base)]
+        if 'lives' in config:
+            lives = []
+            for live in _dicts(config['lives']):
+                live = dict(live)
+                url = live.get('url')
+                if isinstance(url, str) and url and not self.ok(live_target(url) or url):
+                    continue
+                if 'channels' in live:
+                    channels = []
+                    for channel in _dicts(live['channels']):
+                        urls = [u for u in _urls(channel.get('urls')) if self.ok(live_target(u))]
+                        if urls:
+                            channels.append(dict(channel, urls=urls))
+                    if not channels:
+                        continue
+                    live['channels'] = channels
+                lives.append(live)
+            pruned['lives'] = lives
+        for key, url_key in (('urls', 'url'), ('storeHouse', 'sourceUrl')):
+            if key not in config:
+                continue
+            kept = []
+            for item in config[key]:
+                child = resolve(base, item.get(url_key)) if isinstance(item, dict) else None
+                if child is None or not self.ok(child):
+                    continue
+                kept.append(dict(item, **{url_key: './' + local_names[child]}) if child in local_names else item)
+            pruned[key] = kept
+        return pruned
+
+    def write(self, output_dir):
+        """写出精简后的各配置和检测报告，返回写出的文件名列表"""
+        os.makedirs(output_dir, exist_ok=True)
+        local_names, used = {}, set()
+        for url in self.configs:
+            name = os.path.basename(urlsplit(url).path) or 'config.json'
+            stem, ext = os.path.splitext(name)
+            n = 1
+            while name in used:
+                n += 1
+                name = f"{stem}_{n}{ext or '.json'}"
+            used.add(name)
+            local_names[url] = name
+        for url, config in self.configs.items():
+            with open(os.path.join(output_dir, local_names[url]), 'w', encoding='utf-8') as f:
+                json.dump(self.prune(config, url, local_names), f, ensure_ascii=False, indent=2)
+        report = {url: {'name': self.names.get(url, ''), 'kind': self.kinds.get(url, ''), 'ok': r.ok, 'status': r.status, 'reason': r.reason}
+                  for url, r in self.verdicts.items()}
+        with open(os.path.join(output_dir, REPORT_FILE), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return list(local_names.values())
+
+    def summary_lines(self):
+        lines = []
+        for url, config in self.configs.items():
+            parts = []
+            children = children_of(config, url)
+            if children:
+                parts.append(f"子配置 / 列表 {sum(1 for _, child in children if self.ok(child))}/{len(children)} 可用")
+            sites = [site_node(s, config, url) for s in config.get('sites') or ()]
+            if sites:
+                probed = [node for node in sites if node is not None]
+                skipped = f"（另有 {len(sites) - len(probed)} 个无法检测，保留）" if len(probed) < len(sites) else ""
+                parts.append(f"站点 {sum(1 for n in probed if self.ok(n[1]))}/{len(probed)} 可用{skipped}")
+            lives = [node for live in _dicts(config.get('lives')) for node in live_nodes(live)]
+            if lives:
+                parts.append(f"直播 {sum(1 for n in lives if n[3] and self.ok(n[3]))}/{len(lives)} 可用")
+            lines.append(f"{self.names.get(url) or url}：{'，'.join(parts) or '空配置'}")
+        return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m m3u_core.tvbox', description='TVBox 配置爬取与接口检测')
+    parser.add_argument('config', help='入口配置（本地文件或 URL）')
+    parser.add_argument('-o', '--output', default='tvbox_output', help='精简配置和检测报告的输出目录')
+    parser.add_argument('--engine', default='async', choices=['thread', 'async'])
+    parser.add_argument('--timeout', type=float, default=15)
+    parser.add_argument('--profile', default='v8.0', choices=list(PROFILES), help='频道地址的检测策略')
+    args = parser.parse_args()
+
+    root = args.config if is_url(args.config) else os.path.abspath(args.config)
+    ctx = RunContext(engine=args.engine)
+    crawl = TvboxCrawl(ctx, PROFILES[args.profile](args.timeout, 0, None, True)).crawl(root)
+    written = crawl.write(args.output)
+    print("\n" + "=" * 60)
+    for line in crawl.summary_lines():
+        print(line)
+    for line in ctx.stats.summary_lines():
+        print(line)
+    print(f"精简配置：{', '.join(written)}；检测结果：{REPORT_FILE}")
+    print(f"已保存至：{os.path.abspath(args.output)}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n用户已中断。")
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+URL 工具：主机名提取与规范化（缓存、去重的键）
+"""
+
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'rtmp': 1935, 'rtsp': 554}
+VERDICT_LIMIT = 20000     # 去重时保留的已出结论 URL 数（最近用到的优先保留）
+
+
+def host_of(url):
+    return (urlsplit(url).hostname or '').lower()
+
+
+def endpoint_of(url):
+    """主机名 + 端口（未写端口时按协议默认），用于区分同一主机上的不同服务"""
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return host_of(url)
+    return f"{(parts.hostname or '').lower()}:{port or DEFAULT_PORTS.get(parts.scheme.lower(), '')}"
+
+
+def normalize_url(url):
+    """协议和主机转小写、去掉默认端口和 #片段，路径和参数原样保留"""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if ':' in host:
+        host = f"[{host}]"
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username or parts.password:
+        userinfo = parts.username or ''
+        if parts.password:
+            userinfo += f":{parts.password}"
+        host = f"{userinfo}@{host}"
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class UrlDeduper:
+    """
+    流式去重：同一 URL 只放行第一条去探测；
+    其余条目在结论出来前挂起等待，之后出现的直接套用已有结论。
+    已有结论只保留最近用到的 limit 个（内存不随输入增长），更早的 URL 再出现时重新探测
+    """
+
+    def __init__(self, on_result, stats, limit=VERDICT_LIMIT):
+        self._on_result = on_result
+        self.stats = stats
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._waiting = {}     # 规范化 URL -> 等待结论的重复条目
+        self._verdicts = OrderedDict()    # 规范化 URL -> ProbeResult，按最近使用排序
+
+    def filter(self, entries):
+        for entry in entries:
+            self.stats.incr('entries')
+            key = normalize_url(entry[2])
+            first = False
+            with self._lock:
+                result = self._verdicts.get(key)
+                if result is not None:
+                    self._verdicts.move_to_end(key)
+                else:
+                    waiting = self._waiting.get(key)
+                    if waiting is None:
+                        self._waiting[key] = []
+                        first = True
+                    else:
+                        waiting.append(entry)
+            if first:
+                yield entry
+                continue
+            self.stats.incr('dedup_saved')
+            if result is not None:
+                self._on_result(*entry, result)
+
+    def on_result(self, group, title, url, result):
+        key = normalize_url(url)
+        with self._lock:
+            waiting = self._waiting.pop(key, [])
+            self._verdicts[key] = result
+            self._verdicts.move_to_end(key)
+            if len(self._verdicts) > self.limit:
+                self._verdicts.popitem(last=False)
+        self._on_result(group, title, url, result)
+        for entry in waiting:
+            self._on_result(*entry, result)
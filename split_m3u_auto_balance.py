@@ -1,10 +1,20 @@
+import argparse
 import os
 import re
 import sys
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+from m3u_core.parser import parse_file
+from m3u_core.shards import BALANCE_MODES, balance, write_shards
 
 OUTPUT_DIR = "m3u_output"
 
+# ================== 分片（SHARDS > 0 时启用） ==================
+SHARDS = 0                  # 0 每个分组一个文件；N > 0 装进 N 个大小相近的分片，另写 manifest.json
+BALANCE_BY = 'count'        # 'count' 按条目数 | 'cost' 按预计探测开销（HLS 约为直链的 3 倍）
+SHARD_CAP = 0               # 单个分组超过多少（条目数 / 开销）才拆开，0 为平均每片的大小
+CACHE_FILE = None           # 'cost' 模式下参考的检测结果缓存，缓存里还有效的 URL 几乎不占开销
+
 def choose_input_file():
     files = [f for f in os.listdir('.') if f.lower().endswith(('.m3u', '.m3u8', '.txt'))]
     if not files:
@@ -35,38 +45,8 @@ def normalize_group(name):
     return n if n else "未分类"
 
 def parse_any_format(file):
-    """自动识别格式并提取 (group, title, url)"""
-    with open(file, 'r', encoding='utf-8', errors='ignore') as f:
-        lines = [l.strip() for l in f if l.strip()]
-    entries = []
-
-    # 模式1：标准 M3U 格式
-    for i in range(len(lines)):
-        if lines[i].startswith("#EXTINF"):
-            m = re.search(r',\s*(.+)$', lines[i])
-            if m and i + 1 < len(lines):
-                title = m.group(1).strip()
-                url = lines[i + 1].strip()
-                if re.match(r'^(https?|p3p|rtmp)://', url):
-                    entries.append((normalize_group(title), title, url))
-
-    # 模式2：非标准 [分类] 名称,URL 格式
-    pattern_custom = re.compile(r'^\[([^\]]+)\]\s*(.+?),\s*(https?://.*)', re.IGNORECASE)
-    pattern_simple = re.compile(r'^(.+?),\s*(https?://.*)', re.IGNORECASE)
-
-    for line in lines:
-        if not line.startswith("#"):
-            m = pattern_custom.match(line)
-            if m:
-                group, title, url = m.groups()
-                entries.append((group.strip(), title.strip(), url.strip()))
-                continue
-            m2 = pattern_simple.match(line)
-            if m2:
-                title, url = m2.groups()
-                entries.append((normalize_group(title), title.strip(), url.strip()))
-
-    return entries
+    """自动识别格式并提取 (group, title, url)；没有分组信息的条目按名称前缀分组"""
+    return list(parse_file(file, default_group=normalize_group))
 
 def remove_duplicates(entries):
     seen = set()
@@ -106,6 +86,50 @@ def group_and_output(file):
 
     print(f"\n📁 所有结果已保存到：{os.path.abspath(OUTPUT_DIR)}")
 
+def shard_and_output(file, shards, by=BALANCE_BY, cap=SHARD_CAP, cache_file=CACHE_FILE):
+    entries = parse_any_format(file)
+    if not entries:
+        print("❌ 未检测到有效频道，请检查文件格式（支持 #EXTINF 或 [分类] 名称,URL）")
+        return
+    entries = remove_duplicates(entries)
+    print(f"📦 去重后共 {len(entries)} 条频道，按{'条目数' if by == 'count' else '预计探测开销'}分成 {shards} 片。")
+
+    cache = None
+    if by == 'cost' and cache_file and os.path.exists(cache_file):
+        from m3u_core.cache import ResultCache
+        cache = ResultCache(cache_file)
+    try:
+        parts = balance(entries, shards, by, cap or None, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    manifest = write_shards(OUTPUT_DIR, parts, source=file, by=by)
+
+    print("\n📂 输出结果：")
+    for n, shard in enumerate(parts, 1):
+        print(f"  ✅ 分片 {n}: {len(shard)} 条 / {len(shard.groups)} 个分组 / 权重 {shard.weight:.1f}")
+    owners = Counter(group for shard in parts for group in shard.groups)
+    split = sum(1 for count in owners.values() if count > 1)
+    weights = [shard.weight for shard in parts]
+    print(f"\n⚖️ 最重 / 最轻 = {max(weights) / max(min(weights), 1e-9):.2f}，拆开的分组 {split} 个")
+    print(f"📁 分片和清单已保存到：{os.path.abspath(manifest)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='M3U / TXT 按分组拆分，或均衡装进 N 个分片')
+    parser.add_argument('file', nargs='?', help='输入文件（默认在当前目录中选择）')
+    parser.add_argument('--shards', type=int, default=SHARDS, help='分片数（0 每个分组一个文件）')
+    parser.add_argument('--by', choices=BALANCE_MODES, default=BALANCE_BY, help='均衡依据')
+    parser.add_argument('--cap', type=float, default=SHARD_CAP, help='分组超过多少才拆开（0 为平均每片的大小）')
+    parser.add_argument('--cache', default=CACHE_FILE, help="'cost' 模式参考的检测结果缓存（SQLite）")
+    args = parser.parse_args()
+
+    filename = args.file or choose_input_file()
+    if args.shards > 0:
+        shard_and_output(filename, args.shards, args.by, args.cap, args.cache)
+    else:
+        group_and_output(filename)
+
+
 if __name__ == "__main__":
-    filename = choose_input_file()
-    group_and_output(filename)
\ No newline at end of file
+    main()
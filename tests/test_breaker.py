@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""主机熔断：连续连不上后快速失败，冷却后只放一个试探请求"""
+
+from m3u_core import breaker
+from m3u_core.breaker import HostBreaker
+from m3u_core.ops import HostUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(breaker.time, 'monotonic', clock)
+    return HostBreaker(**kwargs), clock
+
+
+def test_opens_after_threshold(monkeypatch):
+    hosts, _ = make(monkeypatch, threshold=3, cooldown=60)
+    for _ in range(2):
+        hosts.record('a', reachable=False)
+        assert hosts.check('a') is None
+    hosts.record('a', reachable=False)
+    assert isinstance(hosts.check('a'), HostUnavailable)
+    assert hosts.check('b') is None
+
+
+def test_reachable_resets_failures(monkeypatch):
+    hosts, _ = make(monkeypatch, threshold=2)
+    hosts.record('a', reachable=False)
+    hosts.record('a', reachable=True)
+    hosts.record('a', reachable=False)
+    assert hosts.check('a') is None
+
+
+def test_half_open_probe(monkeypatch):
+    hosts, clock = make(monkeypatch, threshold=1, cooldown=60)
+    hosts.record('a', reachable=False)
+    clock.now += 61
+    # 只看状态不占用试探名额
+    assert hosts.check('a', claim=False) is None
+    assert hosts.check('a') is None
+    assert isinstance(hosts.check('a'), HostUnavailable)
+    # 试探仍连不上：再熔断一个冷却期
+    hosts.record('a', reachable=False)
+    clock.now += 30
+    assert isinstance(hosts.check('a'), HostUnavailable)
+    clock.now += 31
+    assert hosts.check('a') is None
+    hosts.record('a', reachable=True)
+    assert hosts.check('a') is None and hosts.check('a') is None
+
+
+def test_disabled():
+    hosts = HostBreaker(threshold=0)
+    for _ in range(10):
+        hosts.record('a', reachable=False)
+    assert hosts.check('a') is None
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""检测结果日志：中断后接着上次的结论继续，半行记录不影响续写"""
+
+from m3u_core.journal import ResultJournal
+from m3u_core.probe import ProbeResult
+
+SOURCES = ['a.m3u']
+
+
+def test_resume_skips_checked_urls(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ResultJournal(path, SOURCES)
+    journal.record('G', 'one', 'http://a/1', ProbeResult(True, 200))
+    journal.record('G', 'two', 'http://a/2', ProbeResult(False, 404, reason='HTTP 404'))
+    journal.close()
+
+    journal = ResultJournal(path, SOURCES)
+    assert journal.resumed and journal.resumed_count == 2
+    reported = []
+    pending = list(journal.filter([('G', 'one', 'http://a/1'), ('H', 'dup', 'HTTP://A/2'), ('G', 'three', 'http://a/3')],
+                                  lambda *args: reported.append(args)))
+    assert pending == [('G', 'three', 'http://a/3')]
+    assert [(title, result.ok, result.cached) for _, title, _, result in reported] == [('one', True, True),
+                                                                                      ('dup', False, True)]
+    # 同一 URL 的新条目（另一分组 / 名称）也记进日志
+    assert [title for _, title, _, _ in journal.results()] == ['one', 'two', 'dup']
+    journal.close()
+
+
+def test_torn_last_line(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = ResultJournal(str(path), SOURCES)
+    journal.record('G', 'one', 'http://a/1', ProbeResult(True, 200))
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"group": "G", "title": "two", "url": "http://a/2", "o')
+
+    journal = ResultJournal(str(path), SOURCES)
+    assert journal.resumed_count == 1
+    record = journal.recorder(lambda *args: None)
+    record('G', 'three', 'http://a/3', ProbeResult(True, 200))
+    assert [title for _, title, _, _ in journal.results()] == ['one', 'three']
+    journal.close()
+
+
+def test_other_sources_start_over(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ResultJournal(path, SOURCES)
+    journal.record('G', 'one', 'http://a/1', ProbeResult(True, 200))
+    journal.close()
+    journal = ResultJournal(path, ['b.m3u'])
+    assert not journal.resumed and list(journal.results()) == []
+    journal.complete()
+    journal = ResultJournal(path, SOURCES)
+    assert not journal.resumed
+    journal.close()
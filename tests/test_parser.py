@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""播放列表解析：M3U / TXT 写法混用、分组继承、一行多个地址、BOM 和 mmap 读取"""
+
+from m3u_core import parser
+from m3u_core.parser import DEFAULT_GROUP, DEFAULT_TITLE, parse_entries, parse_file
+
+MIXED = '''#EXTM3U
+#EXTINF:-1 tvg-name="CCTV,1" group-title="央视",CCTV-1
+http://a/1.m3u8
+#EXTINF:-1,无分组
+#EXTGRP:地方
+http://a/2.m3u8
+http://a/3.m3u8
+卫视,#genre#
+湖南卫视,http://b/1.m3u8
+浙江卫视,http://b/2.m3u8#http://b/3.m3u8
+[体育] CCTV-5,rtmp://c/5
+不是条目的一行
+'''
+
+EXPECTED = [
+    ('央视', 'CCTV-1', 'http://a/1.m3u8'),
+    ('地方', '无分组', 'http://a/2.m3u8'),
+    (DEFAULT_GROUP, DEFAULT_TITLE, 'http://a/3.m3u8'),
+    ('卫视', '湖南卫视', 'http://b/1.m3u8'),
+    ('卫视', '浙江卫视', 'http://b/2.m3u8'),
+    ('卫视', '浙江卫视', 'http://b/3.m3u8'),
+    ('体育', 'CCTV-5', 'rtmp://c/5'),
+]
+
+
+def test_mixed_formats():
+    assert list(parse_entries(MIXED.splitlines())) == EXPECTED
+
+
+def test_default_group_callable():
+    lines = ['#EXTINF:-1,CCTV-1', 'http://a/1', '湖南卫视,http://b/1']
+    entries = list(parse_entries(lines, default_group=lambda title: 'CCTV' if 'CCTV' in title else '其他'))
+    assert [group for group, _, _ in entries] == ['CCTV', '其他']
+
+
+def test_parse_file_with_bom(tmp_path):
+    path = tmp_path / 'list.m3u'
+    path.write_bytes(b'\xef\xbb\xbf' + MIXED.encode('utf-8'))
+    assert list(parse_file(str(path))) == EXPECTED
+    assert list(parse_file(str(path), use_mmap=True)) == EXPECTED
+
+
+def test_mmap_chunks_split_at_newlines(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser, 'MMAP_CHUNK', 64)
+    path = tmp_path / 'list.txt'
+    lines = [f'频道{i},http://a/{i}.m3u8' for i in range(200)]
+    path.write_text('\n'.join(lines), encoding='utf-8')
+    titles = [title for _, title, _ in parse_file(str(path), use_mmap=True)]
+    assert titles == [f'频道{i}' for i in range(200)]
+    path.write_text('', encoding='utf-8')
+    assert list(parse_file(str(path), use_mmap=True)) == []
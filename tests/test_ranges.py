@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Range 探测：按主机记住 206 / 200 / 拒绝，拒绝过的主机不再带 Range"""
+
+from m3u_core.ops import Fetch, FetchResult
+from m3u_core.ranges import IGNORED, REJECTED, SUPPORTED, RangeTable
+
+URL = 'http://cdn.example.com/live/1.m3u8'
+
+
+def test_prepare_adds_range():
+    table = RangeTable()
+    op = table.prepare(Fetch(URL, ranged=True, max_bytes=4096))
+    assert op.headers == {'Range': 'bytes=0-4095'}
+    for op in (Fetch(URL), Fetch(URL, ranged=True, method='HEAD'),
+               Fetch(URL, ranged=True, headers={'Range': 'bytes=100-'})):
+        assert table.prepare(op) is op
+
+
+def test_rejected_host_drops_range():
+    table = RangeTable()
+    assert table.learn(URL, FetchResult(status=416))
+    assert table.state('http://CDN.example.com:80/other') == REJECTED
+    op = Fetch(URL, ranged=True)
+    assert table.prepare(op) is op
+    # 同一主机的其他端口是另一个服务
+    assert table.prepare(Fetch('http://cdn.example.com:8080/x', ranged=True)).headers
+
+
+def test_supported_host_keeps_range_after_one_416():
+    table = RangeTable()
+    assert not table.learn(URL, FetchResult(status=206))
+    # 这个地址去掉 Range 重发，但主机仍记为支持
+    assert table.learn(URL, FetchResult(status=416))
+    assert table.state(URL) == SUPPORTED
+    assert table.prepare(Fetch(URL, ranged=True)).headers
+
+
+def test_ignored_host_follows_new_answers():
+    table = RangeTable()
+    table.learn(URL, FetchResult(status=200))
+    assert table.state(URL) == IGNORED
+    table.learn(URL, FetchResult(status=206))
+    assert table.state(URL) == SUPPORTED
+
+
+def test_errors_and_other_statuses_are_not_learned():
+    table = RangeTable()
+    assert not table.learn(URL, FetchResult(error=OSError('reset')))
+    assert not table.learn(URL, FetchResult(status=404))
+    assert table.state(URL) is None
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""跳转缓存：按缓存头定有效期、沿缓存的跳转直达、失败后整条丢掉"""
+
+from m3u_core import redirects
+from m3u_core.probe import ProbeResult
+from m3u_core.redirects import RedirectCache, hop_expiry, shared_targets
+
+NOW = 1_000_000.0
+
+
+def test_hop_expiry():
+    assert hop_expiry(302, 'no-store', None, 600, NOW) == 0
+    assert hop_expiry(301, 'private, max-age=60', None, 600, NOW) == NOW + 60
+    assert hop_expiry(302, 'max-age=0', None, 600, NOW) == 0
+    assert hop_expiry(302, None, 'Thu, 01 Jan 1970 00:00:00 GMT', 600, NOW) == 0
+    assert hop_expiry(302, None, 'not a date', 600, NOW) == 0
+    assert hop_expiry(301, None, None, 600, NOW) is None
+    assert hop_expiry(302, None, None, 600, NOW) == NOW + 600
+    assert hop_expiry(307, None, None, 0, NOW) == 0
+
+
+def test_resolve_follows_cached_chain():
+    cache = RedirectCache()
+    cache.learn([('http://short/x', 302, 'http://proxy/x', None, None),
+                 ('http://proxy/x', 301, 'http://cdn/x.m3u8', None, None),
+                 ('http://short/y', 302, 'http://cdn/y', 'no-cache', None)])
+    assert cache.resolve('HTTP://SHORT/x') == 'http://cdn/x.m3u8'
+    # 不同入口跳到同一个中间地址，后面几跳也直接跳过
+    assert cache.resolve('http://proxy/x#frag') == 'http://cdn/x.m3u8'
+    assert cache.resolve('http://short/y') == 'http://short/y'
+
+
+def test_loop_and_forget():
+    cache = RedirectCache()
+    cache.learn([('http://a/', 301, 'http://b/', None, None), ('http://b/', 301, 'http://a/', None, None)])
+    # 跳转成环时走一圈就停
+    assert cache.resolve('http://a/') == 'http://a/'
+    cache.forget(['http://a/'])
+    assert cache.resolve('http://a/') == 'http://a/' and cache.resolve('http://b/') == 'http://b/'
+
+
+def test_expired_hop_is_dropped(monkeypatch):
+    cache = RedirectCache(default_ttl=10)
+    cache.learn([('http://short/x', 302, 'http://cdn/x', None, None)])
+    assert cache.resolve('http://short/x') == 'http://cdn/x'
+    now = redirects.time.time()
+    monkeypatch.setattr(redirects.time, 'time', lambda: now + 11)
+    assert cache.resolve('http://short/x') == 'http://short/x'
+
+
+def test_shared_targets():
+    results = [('G', 'a', 'http://short/1', ProbeResult(True, final_url='http://cdn/live')),
+               ('G', 'b', 'http://short/2', ProbeResult(True, final_url='http://cdn/live')),
+               ('H', 'a', 'HTTP://SHORT/1', ProbeResult(True, final_url='http://cdn/live')),
+               ('G', 'c', 'http://short/3', ProbeResult(True, final_url='http://cdn/other')),
+               ('G', 'd', 'http://short/4', ProbeResult(False))]
+    shared = shared_targets(results)
+    assert list(shared) == ['http://cdn/live']
+    assert [title for _, title, _ in shared['http://cdn/live']] == ['a', 'b', 'a']
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""主机调度：按主机轮转、每条检测只计一次速率、主机没空时不阻塞调用方"""
+
+from m3u_core.scheduler import HostScheduler, interleave_by_host
+from m3u_core.stats import RunStats
+
+
+def test_interleave_by_host():
+    entries = [('g', str(i), f'http://{host}/{i}') for i, host in enumerate('aaabbc')]
+    hosts = [url.split('/')[2] for _, _, url in interleave_by_host(entries)]
+    assert hosts == ['a', 'b', 'c', 'a', 'b', 'a']
+    assert sorted(interleave_by_host(entries)) == sorted(entries)
+
+
+def test_rate_counts_checks_not_requests():
+    scheduler = HostScheduler(concurrency=4, rate=1.0, burst=1)
+    assert scheduler.try_acquire('a', 'check1', charge=True) == 0
+    # 同一检测的后续请求不再计速率
+    assert scheduler.try_acquire('a', 'check1', charge=False) == 0
+    delay = scheduler.try_acquire('a', 'check2', charge=True)
+    assert 0.9 < delay <= 1.0
+    # 到点后以 charge=False 再来，不会再预约一次
+    assert scheduler.try_acquire('a', 'check2', charge=False) == 0
+    # 其他主机不受影响
+    assert scheduler.try_acquire('b', 'check3', charge=True) == 0
+
+
+def test_burst_and_unlimited():
+    scheduler = HostScheduler(rate=1.0, burst=2)
+    assert [scheduler.reserve('a') for _ in range(2)] == [0, 0]
+    assert scheduler.reserve('a') > 0
+    unlimited = HostScheduler(rate=0)
+    assert all(unlimited.reserve('a') == 0 for _ in range(100))
+
+
+def test_full_host_parks_without_charging():
+    stats = RunStats()
+    scheduler = HostScheduler(concurrency=1, rate=1.0, burst=1, stats=stats)
+    assert scheduler.try_acquire('a', 'first', charge=True) == 0
+    assert scheduler.try_acquire('a', 'second', charge=True) is None
+    assert scheduler.try_acquire('a', 'third', charge=True) is None
+    # 名额空出时按等待顺序交回
+    assert scheduler.release('a') == 'second'
+    # 排队期间没有预约：'second' 回来时第一次计速率，要等 'first' 之后的一个间隔
+    assert scheduler.try_acquire('a', 'second', charge=True) > 0
+    assert scheduler.try_acquire('a', 'second', charge=False) == 0
+    assert scheduler.release('a') == 'third'
+    assert scheduler.release('a') is None
+    assert stats.get('sched_waits') == 1
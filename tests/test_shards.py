@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""分片：分组尽量不拆开、LPT 装箱大小相近、manifest 和分片文件一致"""
+
+import pytest
+
+from m3u_core.parser import parse_file
+from m3u_core.shards import CACHED_COST, HLS_COST, HTTP_COST, balance, estimate_cost, read_manifest, write_shards
+
+
+def entries(sizes):
+    return [(group, f'{group}{i}', f'http://{group}/{i}') for group, n in sizes.items() for i in range(n)]
+
+
+def test_groups_stay_together_lpt():
+    # 从大到小放进当前最轻的分片：a→0，b→1，c→1，d→0
+    shards = balance(entries({'a': 6, 'b': 4, 'c': 3, 'd': 3}), 2)
+    assert [(sorted(s.groups), len(s)) for s in shards] == [(['a', 'd'], 9), (['b', 'c'], 7)]
+    assert [e[1] for e in shards[0].entries] == [f'a{i}' for i in range(6)] + [f'd{i}' for i in range(3)]
+    # 条目比分片少：空分片不返回
+    assert [len(s) for s in balance(entries({'a': 2}), 4)] == [1, 1]
+
+
+def test_oversized_group_is_split_in_order():
+    shards = balance(entries({'big': 9, 'small': 3}), 3)
+    assert sorted(len(s) for s in shards) == [4, 4, 4]
+    pieces = [s.groups['big'] for s in shards if 'big' in s.groups]
+    assert len(pieces) == 3
+    assert sorted(entry for piece in pieces for entry in piece) == sorted(entries({'big': 9}))
+    for piece in pieces:
+        assert [int(e[1][3:]) for e in piece] == sorted(int(e[1][3:]) for e in piece)
+
+
+def test_cost_balance():
+    assert estimate_cost('http://a/live.m3u8?token=1') == HLS_COST
+    assert estimate_cost('http://a/stream.flv') == HTTP_COST
+
+    class Cache:
+        def get(self, url):
+            return object()
+    assert estimate_cost('http://a/live.m3u8', Cache()) == CACHED_COST
+
+    mixed = [('hls', str(i), f'http://a/{i}.m3u8') for i in range(2)] + \
+            [('flv', str(i), f'http://b/{i}.flv') for i in range(6)]
+    shards = balance(mixed, 2, by='cost')
+    assert sorted(s.weight for s in shards) == [6.0, 6.0]
+    with pytest.raises(ValueError):
+        balance(mixed, 2, by='size')
+
+
+def test_write_and_read_manifest(tmp_path):
+    (tmp_path / 'shard_09.m3u').write_text('stale', encoding='utf-8')
+    shards = balance(entries({'a': 3, 'b': 2}), 2)
+    manifest = read_manifest(write_shards(str(tmp_path), shards, source='in.m3u'))
+    assert [s['file'] for s in manifest['shards']] == ['shard_01.m3u', 'shard_02.m3u']
+    assert not (tmp_path / 'shard_09.m3u').exists()
+    written = [entry for s in manifest['shards'] for entry in parse_file(s['path'])]
+    assert sorted(written) == sorted(entries({'a': 3, 'b': 2}))
+    assert [s['entries'] for s in manifest['shards']] == [len(s) for s in shards]
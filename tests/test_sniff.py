@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""文件头识别：清单类的文本不能被当成错误页判失效"""
+
+from m3u_core.ops import Fetch, FetchResult, MediaProbe
+from m3u_core.probe import check_steps, is_playlist_chunk
+from m3u_core.profiles import v80_profile
+from m3u_core.sniff import sniff
+
+URL = 'http://example.com/live/1'
+
+MPD = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+       b'<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="dynamic" profiles="urn:mpeg:dash:profile:isoff-live:2011">\n'
+       b'  <Period id="0"><AdaptationSet mimeType="video/mp4"/></Period>\n</MPD>\n')
+BOM_PLAYLIST = '\ufeff#EXTM3U\n#EXT-X-TARGETDURATION:6\n#EXTINF:6,\nseg1.ts\n'.encode('utf-8')
+
+
+def first_op(body, ffmpeg_cmd='ffmpeg'):
+    """把 body 作为主请求的回应送进 check_steps，返回下一步操作或检测结论"""
+    steps = check_steps('G', 'ch', URL, v80_profile(ffmpeg_cmd=ffmpeg_cmd, hls_validate=False))
+    op = next(steps)
+    assert isinstance(op, Fetch)
+    try:
+        return steps.send(FetchResult(status=200, body=body, final_url=URL))
+    except StopIteration as stop:
+        return stop.value
+
+
+def test_mpd_manifest_is_media():
+    found = sniff(MPD)
+    assert (found.kind, found.media, found.conclusive) == ('mpd', True, True)
+    result = first_op(MPD)
+    assert result.ok and result.method == 'sniff'
+
+
+def test_text_and_json_are_not_conclusive():
+    assert not sniff(b'{"code": 403, "msg": "forbidden"}').conclusive
+    assert not sniff(b'some manifest format ffmpeg may still understand\n').conclusive
+    assert isinstance(first_op(b'some manifest format ffmpeg may still understand\n'), MediaProbe)
+
+
+def test_html_is_still_rejected_without_ffmpeg():
+    result = first_op(b'<!DOCTYPE html><html><body>404</body></html>', ffmpeg_cmd=None)
+    assert not result.ok and result.method == 'sniff'
+
+
+def test_playlist_with_bom():
+    assert is_playlist_chunk(BOM_PLAYLIST)
+    result = first_op(BOM_PLAYLIST)
+    assert result.ok and result.sniffed is None
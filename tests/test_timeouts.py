@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""按主机自适应超时：样本够了才缩短，有上下限，缩短的超时到期后退回上限"""
+
+from m3u_core.timeouts import CONNECT_FLOOR, MIN_SAMPLES, READ_FLOOR, HostTimeouts
+
+HOST = 'a:80'
+
+
+def observe(timeouts, connect_ms, ttfb_ms, n=MIN_SAMPLES):
+    for _ in range(n):
+        timeouts.observe_connect(HOST, connect_ms)
+        timeouts.observe_ttfb(HOST, ttfb_ms)
+
+
+def test_ceiling_until_enough_samples():
+    timeouts = HostTimeouts(connect_timeout=10)
+    observe(timeouts, 50, 100, n=MIN_SAMPLES - 1)
+    assert timeouts.pick(HOST, 15) == (10, 15)
+    # 连接超时不超过检测策略的超时
+    assert timeouts.pick(HOST, 6) == (6, 6)
+
+
+def test_fast_host_is_shortened_to_floor():
+    timeouts = HostTimeouts(connect_timeout=10)
+    observe(timeouts, 50, 100)
+    assert timeouts.pick(HOST, 15) == (CONNECT_FLOOR, READ_FLOOR)
+    assert timeouts.pick('b:80', 15) == (10, 15)
+
+
+def test_slow_host_scales_with_p95_and_keeps_ceiling():
+    timeouts = HostTimeouts(connect_timeout=10, factor=4)
+    observe(timeouts, 1000, 3000)
+    assert timeouts.pick(HOST, 15) == (4.0, 12.0)
+    observe(timeouts, 5000, 9000, n=64)
+    assert timeouts.pick(HOST, 15) == (10, 15)
+
+
+def test_expired_short_timeout_resets_samples():
+    timeouts = HostTimeouts(connect_timeout=10)
+    observe(timeouts, 50, 100)
+    used = timeouts.pick(HOST, 15)
+    # 用的是上限时超时不清样本
+    timeouts.expired(HOST, 'read', (used[0], 15), 15)
+    assert timeouts.pick(HOST, 15) == used
+    timeouts.expired(HOST, 'read', used, 15)
+    assert timeouts.pick(HOST, 15) == (CONNECT_FLOOR, 15)
+    timeouts.expired(HOST, 'connect', used, 15)
+    assert timeouts.pick(HOST, 15) == (10, 15)
+
+
+def test_not_adaptive():
+    timeouts = HostTimeouts(connect_timeout=10, adaptive=False)
+    observe(timeouts, 50, 100)
+    assert timeouts.pick(HOST, 15) == (10, 15)